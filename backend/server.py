@@ -1,5 +1,8 @@
-from fastapi import FastAPI, APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, APIRouter, UploadFile, File, HTTPException, Query, Response
+from fastapi.routing import APIRoute
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 import os
@@ -8,309 +11,3046 @@ from pathlib import Path
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timezone, date
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool, PoolError
+from psycopg2.extras import RealDictCursor, execute_values
 import pandas as pd
 import io
-from sentence_transformers import SentenceTransformer
+import csv
+import base64
 import numpy as np
 import json
+import time
+import shutil
+import socket
+import hashlib
+import math
+import threading
+import contextvars
+import functools
+import inspect
+import cProfile
+import multiprocessing
+from contextlib import contextmanager
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from vector_store import NumpyVectorStore
+
+# Reference point for the module timing reported by /api/health/ready
+MODULE_STARTED = time.perf_counter()
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-app = FastAPI()
-api_router = APIRouter(prefix="/api")
+# Per-request profiling: when enabled, a request with ?profile=1 or an
+# X-Profile: 1 header is run under cProfile and the stats file is written to
+# PROFILE_DIR (named in the X-Profile-File response header).
+PROFILE_REQUESTS = os.environ.get('PROFILE_REQUESTS', 'false').lower() in ('1', 'true', 'yes')
+PROFILE_DIR = Path(os.environ.get('PROFILE_DIR', str(ROOT_DIR / 'profiles')))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096)
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in labels.values())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in self._values.items():
+                lines.append(f"{self.name}{_format_labels(dict(key))} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.setdefault(key, {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0})
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][i] += 1
+                    break
+            series['sum'] += value
+            series['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in self._series.items():
+                labels = dict(key)
+                cumulative = 0
+                for bound, count in zip(self.buckets, series['counts']):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': bound})} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {series['count']}")
+                lines.append(f"{self.name}_sum{_format_labels(labels)} {series['sum']}")
+                lines.append(f"{self.name}_count{_format_labels(labels)} {series['count']}")
+        return lines
+
+class MetricsRegistry:
+    # Minimal Prometheus text exposition. Metrics are per process; with several
+    # workers each one is scraped (or aggregated) separately.
+    def __init__(self):
+        self._metrics = []
+        self._callbacks = []
+
+    def counter(self, name, help_text):
+        metric = Counter(name, help_text)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, help_text, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def callback(self, name, help_text, kind, collect):
+        # For values already tracked elsewhere (pool and cache stats); collect()
+        # returns [(labels, value), ...] at scrape time
+        self._callbacks.append((name, help_text, kind, collect))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for name, help_text, kind, collect in self._callbacks:
+            lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"])
+            for labels, value in collect():
+                if value is not None:
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+        return '\n'.join(lines) + '\n'
+
+metrics = MetricsRegistry()
+HTTP_REQUEST_SECONDS = metrics.histogram('http_request_duration_seconds', 'API request latency by route and status')
+INGEST_STAGE_SECONDS = metrics.histogram('ingest_stage_seconds', 'Ingestion job stage time (per chunk for streaming stages)')
+INGEST_STAGE_ROWS = metrics.counter('ingest_stage_rows_total', 'Rows processed by ingestion job stage')
+OPERATION_SECONDS = metrics.histogram('pipeline_operation_seconds', 'Time spent in pipeline operations')
+PIPELINE_ROWS = metrics.counter('pipeline_rows_total', 'Rows processed by pipeline operation')
+QUALITY_RULE_SECONDS = metrics.histogram('quality_rule_seconds', 'Data quality rule evaluation time')
+ENCODE_SECONDS = metrics.histogram('embedding_encode_seconds', 'Model encode call time by pool')
+ENCODE_BATCH_SIZE = metrics.histogram('embedding_encode_batch_size', 'Texts per model encode call', SIZE_BUCKETS)
+EMBEDDING_CACHE_LOOKUPS = metrics.counter('embedding_cache_lookups_total', 'Persistent embedding cache lookups')
+DB_POOL_WAIT_SECONDS = metrics.histogram('db_pool_wait_seconds', 'Time spent waiting for a database connection')
+DB_POOL_TIMEOUTS = metrics.counter('db_pool_timeouts_total', 'Database connection waits that timed out')
+
+profile_requested = contextvars.ContextVar('profile_requested', default=None)
+
+def _profiled(call):
+    # Wraps an endpoint so it runs under cProfile when the request asked for it.
+    # Sync endpoints run in the threadpool, so the profiler has to start inside
+    # the call; for async endpoints it also sees other tasks sharing the loop.
+    @contextmanager
+    def profiling():
+        path = profile_requested.get()
+        if path is None:
+            yield
+            return
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(path)
+
+    if inspect.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def async_wrapper(*args, **kwargs):
+            with profiling():
+                return await call(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(call)
+    def wrapper(*args, **kwargs):
+        with profiling():
+            return call(*args, **kwargs)
+    return wrapper
+
+class InstrumentedRoute(APIRoute):
+    # Records latency per route template (not per concrete URL, which would
+    # explode label cardinality) and hosts the optional profiling hook.
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, endpoint, **kwargs)
+        if PROFILE_REQUESTS:
+            self.dependant.call = _profiled(self.dependant.call)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        route_path = self.path
+
+        async def instrumented_handler(request):
+            token = None
+            profile_path = None
+            if PROFILE_REQUESTS and (request.query_params.get('profile') == '1' or request.headers.get('x-profile') == '1'):
+                name = route_path.strip('/').replace('/', '_').replace('{', '').replace('}', '') or 'root'
+                profile_path = str(PROFILE_DIR / f"{name}-{int(time.time() * 1000)}.prof")
+                token = profile_requested.set(profile_path)
+            started = time.perf_counter()
+            status = 500
+            try:
+                response = await handler(request)
+                status = response.status_code
+                if profile_path:
+                    response.headers['X-Profile-File'] = profile_path
+                return response
+            except HTTPException as e:
+                status = e.status_code
+                raise
+            except RequestValidationError:
+                status = 422
+                raise
+            finally:
+                HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, method=request.method,
+                                             route=route_path, status=status)
+                if token is not None:
+                    profile_requested.reset(token)
+
+        return instrumented_handler
+
+app = FastAPI()
+api_router = APIRouter(prefix="/api", route_class=InstrumentedRoute)
+
+POSTGRES_URL = os.environ.get('POSTGRES_URL')
+INGEST_COPY_BATCH_SIZE = int(os.environ.get('INGEST_COPY_BATCH_SIZE', '50000'))
+CLEAN_BATCH_SIZE = int(os.environ.get('CLEAN_BATCH_SIZE', '1000'))
+EMBEDDING_BATCH_SIZE = int(os.environ.get('EMBEDDING_BATCH_SIZE', '64'))
+EMBEDDING_WORKERS = int(os.environ.get('EMBEDDING_WORKERS', '1'))
+QUERY_EMBEDDING_WORKERS = int(os.environ.get('QUERY_EMBEDDING_WORKERS', '2'))
+BACKFILL_WORKERS = int(os.environ.get('BACKFILL_WORKERS', str(max(1, (os.cpu_count() or 2) // 2))))
+BACKFILL_THREADS_PER_WORKER = int(os.environ.get('BACKFILL_THREADS_PER_WORKER', '2'))
+BACKFILL_CHUNK_ROWS = int(os.environ.get('BACKFILL_CHUNK_ROWS', '2000'))
+INGEST_JOB_WORKERS = int(os.environ.get('INGEST_JOB_WORKERS', '2'))
+# A running job refreshes heartbeat_at this often; another process only takes
+# it over once the heartbeat is older than INGEST_JOB_STALE_SECONDS
+INGEST_JOB_HEARTBEAT_SECONDS = float(os.environ.get('INGEST_JOB_HEARTBEAT_SECONDS', '10'))
+INGEST_JOB_STALE_SECONDS = float(os.environ.get('INGEST_JOB_STALE_SECONDS', '120'))
+INGEST_SPOOL_DIR = Path(os.environ.get('INGEST_SPOOL_DIR', str(ROOT_DIR / 'ingest_spool')))
+INGEST_CHUNK_ROWS = int(os.environ.get('INGEST_CHUNK_ROWS', '50000'))
+INGEST_UPLOAD_CHUNK_BYTES = int(os.environ.get('INGEST_UPLOAD_CHUNK_BYTES', str(1024 * 1024)))
+VECTOR_INDEX_TYPE = os.environ.get('VECTOR_INDEX_TYPE', 'hnsw')
+HNSW_M = int(os.environ.get('HNSW_M', '16'))
+HNSW_EF_CONSTRUCTION = int(os.environ.get('HNSW_EF_CONSTRUCTION', '64'))
+IVFFLAT_LISTS = int(os.environ.get('IVFFLAT_LISTS', '100'))
+SEARCH_EF_SEARCH = int(os.environ.get('SEARCH_EF_SEARCH', '40'))
+SEARCH_PROBES = int(os.environ.get('SEARCH_PROBES', '10'))
+# What the ANN index stores: full float32 vectors, halfvec (float16) or
+# binary-quantized bits. Compact indexes only produce candidates; they are
+# re-ranked exactly against the float32 column, fetching limit * factor rows.
+VECTOR_STORAGE = os.environ.get('VECTOR_STORAGE', 'full')
+VECTOR_RERANK_FACTOR = {
+    'full': 1,
+    'halfvec': int(os.environ.get('HALFVEC_RERANK_FACTOR', '4')),
+    'binary': int(os.environ.get('BINARY_RERANK_FACTOR', '10')),
+}
+# Where nearest-neighbour search runs: 'pgvector' (the index above) or 'numpy',
+# an exact in-process index memory-mapped under VECTOR_STORE_DIR that the clean
+# stage and the backfill keep in step. Filters and result metadata still come
+# from Postgres, and hybrid search always runs in pgvector.
+VECTOR_SEARCH_BACKEND = os.environ.get('VECTOR_SEARCH_BACKEND', 'pgvector')
+VECTOR_STORE_DIR = Path(os.environ.get('VECTOR_STORE_DIR', str(ROOT_DIR / 'vector_store')))
+VECTOR_STORE_DTYPE = os.environ.get('VECTOR_STORE_DTYPE', 'float32')
+VECTOR_STORE_SYNC_ROWS = int(os.environ.get('VECTOR_STORE_SYNC_ROWS', '10000'))
+QUERY_CACHE_SIZE = int(os.environ.get('QUERY_CACHE_SIZE', '1024'))
+QUERY_CACHE_TTL = float(os.environ.get('QUERY_CACHE_TTL', '3600'))
+SEARCH_RESULT_CACHE_SIZE = int(os.environ.get('SEARCH_RESULT_CACHE_SIZE', '512'))
+SEARCH_RESULT_CACHE_TTL = float(os.environ.get('SEARCH_RESULT_CACHE_TTL', '60'))
+BATCH_SEARCH_MAX_QUERIES = int(os.environ.get('BATCH_SEARCH_MAX_QUERIES', '1000'))
+SEARCH_EXACT_FILTER_MAX_ROWS = int(os.environ.get('SEARCH_EXACT_FILTER_MAX_ROWS', '20000'))
+HYBRID_CANDIDATE_FACTOR = int(os.environ.get('HYBRID_CANDIDATE_FACTOR', '4'))
+TENDERS_MAX_PAGE_SIZE = int(os.environ.get('TENDERS_MAX_PAGE_SIZE', '1000'))
+EXPORT_FETCH_SIZE = int(os.environ.get('EXPORT_FETCH_SIZE', '5000'))
+DRIFT_BASELINE_BATCHES = int(os.environ.get('DRIFT_BASELINE_BATCHES', '10'))
+DRIFT_EMBEDDING_THRESHOLD = float(os.environ.get('DRIFT_EMBEDDING_THRESHOLD', '0.15'))
+DRIFT_VALUE_THRESHOLD = float(os.environ.get('DRIFT_VALUE_THRESHOLD', '0.5'))
+DRIFT_CATEGORY_PSI_THRESHOLD = float(os.environ.get('DRIFT_CATEGORY_PSI_THRESHOLD', '0.25'))
+NEAR_DUPLICATE_THRESHOLD = float(os.environ.get('NEAR_DUPLICATE_THRESHOLD', '0.95'))
+NEAR_DUPLICATE_NEIGHBOURS = int(os.environ.get('NEAR_DUPLICATE_NEIGHBOURS', '5'))
+NEAR_DUPLICATE_MAX_ROWS = int(os.environ.get('NEAR_DUPLICATE_MAX_ROWS', '100000'))
+ANALYTICS_MAX_GROUPS = int(os.environ.get('ANALYTICS_MAX_GROUPS', '500'))
+# Precomputed "more like this" lists: SIMILAR_TENDERS_K neighbours per tender,
+# and SIMILAR_TENDERS_CANDIDATES probed per new row to find the lists it enters
+SIMILAR_TENDERS_K = int(os.environ.get('SIMILAR_TENDERS_K', '10'))
+SIMILAR_TENDERS_CANDIDATES = int(os.environ.get('SIMILAR_TENDERS_CANDIDATES', '30'))
+SIMILAR_TENDERS_MAX_ROWS = int(os.environ.get('SIMILAR_TENDERS_MAX_ROWS', '100000'))
+DB_POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', '2'))
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', '10'))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', '30'))
+DB_POOL_HEALTH_CHECK_IDLE = float(os.environ.get('DB_POOL_HEALTH_CHECK_IDLE', '30'))
+# Model and dimension of a fresh database. From then on the active row of
+# embedding_versions decides, and a new model is rolled out through
+# POST /api/embedding-versions (shadow backfill, then an atomic switch).
+EMBEDDING_MODEL_NAME = os.environ.get('EMBEDDING_MODEL_NAME', 'all-MiniLM-L6-v2')
+EMBEDDING_DIM = int(os.environ.get('EMBEDDING_DIM', '384'))
+REEMBED_BATCH_ROWS = int(os.environ.get('REEMBED_BATCH_ROWS', '256'))
+# Throttle for the shadow backfill so it never starves ingestion or search; 0 disables it
+REEMBED_MAX_ROWS_PER_SEC = float(os.environ.get('REEMBED_MAX_ROWS_PER_SEC', '200'))
+REEMBED_AUTO_SWITCH = os.environ.get('REEMBED_AUTO_SWITCH', 'true').lower() in ('1', 'true', 'yes')
+EMBEDDING_VERSION_CHECK_SECONDS = float(os.environ.get('EMBEDDING_VERSION_CHECK_SECONDS', '5'))
+# eager: load at import (share weights copy-on-write with a preloading server such as gunicorn --preload)
+# background: start loading at startup without blocking it (default)
+# lazy: load on first use
+EMBEDDING_MODEL_LOAD = os.environ.get('EMBEDDING_MODEL_LOAD', 'background')
+EMBEDDING_DEVICE = os.environ.get('EMBEDDING_DEVICE') or None
+# Inference backend: torch (default), torch-int8 (dynamic int8 Linear layers),
+# onnx or onnx-int8 (ONNX Runtime; needs `pip install "sentence-transformers[onnx]"`).
+# EMBEDDING_ONNX_FILE overrides which exported graph is loaded from the model repo.
+EMBEDDING_BACKEND = os.environ.get('EMBEDDING_BACKEND', 'torch')
+EMBEDDING_ONNX_FILE = os.environ.get('EMBEDDING_ONNX_FILE') or None
+# Minimum cosine similarity to the torch fp32 embedding of the same text that a
+# backend must reach (checked by scripts/bench_embedding_backends.py). Within
+# these bounds vectors from any backend share the embedding column and the
+# embedding cache, so switching backends does not require re-embedding.
+EMBEDDING_BACKEND_TOLERANCE = {
+    'torch': 0.9999,
+    'onnx': 0.9999,
+    'torch-int8': 0.98,
+    'onnx-int8': 0.98,
+}
+
+class EmbeddingModelProvider:
+    # Owns the SentenceTransformer instance. Importing sentence_transformers
+    # (and torch) is most of the cost, so it happens here rather than at module
+    # import; callers block in get() until the model is ready.
+    def __init__(self, model_name, device=None, backend='torch', onnx_file=None, dim=None):
+        if backend not in EMBEDDING_BACKEND_TOLERANCE:
+            raise ValueError(f"Unknown embedding backend {backend!r}")
+        self.model_name = model_name
+        # Known up front for the active version; read from the model otherwise
+        self.dim = dim
+        self.device = device
+        self.backend = backend
+        self.onnx_file = onnx_file
+        self.state = 'cold'
+        self.error = None
+        self.load_seconds = None
+        self._model = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+
+    def get(self):
+        if self._model is None:
+            self.load()
+        return self._model
+
+    def load(self):
+        with self._lock:
+            if self._model is not None:
+                return self._model
+            self.state = 'loading'
+            started = time.perf_counter()
+            try:
+                model = self._build()
+                dim = model.get_sentence_embedding_dimension()
+                if self.dim is not None and dim != self.dim:
+                    raise ValueError(f"{self.model_name} produces {dim}-dimensional vectors, expected {self.dim}")
+                self.dim = dim
+                self._model = model
+            except Exception as e:
+                self.state = 'failed'
+                self.error = str(e)
+                raise
+            self.load_seconds = round(time.perf_counter() - started, 3)
+            self.state = 'ready'
+            self.error = None
+            self._ready.set()
+            logging.info(f"Loaded embedding model {self.model_name} ({self.backend}) in {self.load_seconds}s")
+            return self._model
+
+    def _build(self):
+        from sentence_transformers import SentenceTransformer
+        if self.backend.startswith('onnx'):
+            # The model repo ships exported graphs; quint8 AVX2 is the int8 variant
+            # that runs on any x86-64 CPU we deploy to
+            file_name = self.onnx_file or ('onnx/model_quint8_avx2.onnx' if self.backend == 'onnx-int8'
+                                           else 'onnx/model.onnx')
+            return SentenceTransformer(self.model_name, device=self.device, backend='onnx',
+                                       model_kwargs={'file_name': file_name})
+        model = SentenceTransformer(self.model_name, device=self.device)
+        if self.backend == 'torch-int8':
+            import torch
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return model
+
+    def start_warmup(self):
+        if self._model is not None or self.state == 'loading':
+            return
+        threading.Thread(target=self._warmup, name='embed-warmup', daemon=True).start()
+
+    def _warmup(self):
+        try:
+            self.load()
+        except Exception as e:
+            logging.error(f"Embedding model warmup failed: {str(e)}")
+
+    def wait_ready(self, timeout=None):
+        return self._ready.wait(timeout)
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def status(self):
+        return {"model_name": self.model_name, "dim": self.dim, "backend": self.backend, "state": self.state,
+                "load_seconds": self.load_seconds, "error": self.error}
+
+# Serves the active embedding version; replaced by adopt_embedding_version
+model_provider = EmbeddingModelProvider(EMBEDDING_MODEL_NAME, EMBEDDING_DEVICE,
+                                        EMBEDDING_BACKEND, EMBEDDING_ONNX_FILE, dim=EMBEDDING_DIM)
+if EMBEDDING_MODEL_LOAD == 'eager':
+    model_provider.load()
+
+# Inference runs on dedicated bounded pools, never on the event loop. Search
+# queries get their own pool so they do not queue behind bulk ingest batches.
+bulk_embedding_executor = ThreadPoolExecutor(max_workers=EMBEDDING_WORKERS, thread_name_prefix='embed-bulk')
+query_embedding_executor = ThreadPoolExecutor(max_workers=QUERY_EMBEDDING_WORKERS, thread_name_prefix='embed-query')
+
+def _encode(pool, texts, provider=None, **kwargs):
+    # Timed inside the executor, so queueing behind other batches is not counted
+    ENCODE_BATCH_SIZE.observe(1 if isinstance(texts, str) else len(texts), pool=pool)
+    with ENCODE_SECONDS.time(pool=pool):
+        return (provider or model_provider).get().encode(texts, **kwargs)
+
+def encode_texts(texts, batch_size=EMBEDDING_BATCH_SIZE, provider=None):
+    return bulk_embedding_executor.submit(_encode, 'bulk', texts, provider=provider, batch_size=batch_size).result()
+
+def encode_query(text):
+    return query_embedding_executor.submit(_encode, 'query', text).result()
+
+def encode_queries(texts):
+    return query_embedding_executor.submit(_encode, 'query', texts, batch_size=EMBEDDING_BATCH_SIZE).result()
+
+class TTLCache:
+    # Thread-safe LRU with a per-entry time-to-live. clear() bumps `generation`;
+    # a value computed before a clear is refused by set(..., generation=...), so
+    # a slow reader cannot put back what the invalidation just removed.
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value, generation=None):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None
+            }
+
+# Result entries are dropped whenever the clean stage writes rows. Other worker
+# processes cannot see that invalidation, so SEARCH_RESULT_CACHE_TTL bounds how
+# stale their cached results can get.
+query_embedding_cache = TTLCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL)
+search_result_cache = TTLCache(SEARCH_RESULT_CACHE_SIZE, SEARCH_RESULT_CACHE_TTL)
+
+def get_query_embedding(query):
+    key = (model_provider.model_name, normalize_text(query))
+    embedding = query_embedding_cache.get(key)
+    if embedding is None:
+        embedding = encode_query(key[1]).tolist()
+        query_embedding_cache.set(key, embedding)
+    return embedding
+
+def get_query_embeddings(queries):
+    # Cached queries are served from the cache, the rest are encoded in one batched call
+    keys = [(model_provider.model_name, normalize_text(query)) for query in queries]
+    embeddings = [query_embedding_cache.get(key) for key in keys]
+    missing = list(dict.fromkeys(key for key, embedding in zip(keys, embeddings) if embedding is None))
+    if missing:
+        encoded = dict(zip(missing, (vector.tolist() for vector in encode_queries([key[1] for key in missing]))))
+        for key, embedding in encoded.items():
+            query_embedding_cache.set(key, embedding)
+        embeddings = [embedding if embedding is not None else encoded[key] for key, embedding in zip(keys, embeddings)]
+    return embeddings
+
+def vector_literal(values):
+    return '[' + ','.join(str(float(v)) for v in values) + ']'
+
+RAW_COLUMNS = ['id', 'tender_id', 'title', 'description', 'organization', 'category', 'value',
+               'currency', 'published_date', 'deadline', 'location', 'status', 'batch_id']
+RAW_TEXT_DEFAULTS = {
+    'title': '', 'description': '', 'organization': '', 'category': '', 'currency': 'USD',
+    'published_date': '', 'deadline': '', 'location': '', 'status': 'Open'
+}
+
+class DatabasePool:
+    # ThreadedConnectionPool fails fast when exhausted; the semaphore turns that
+    # into a bounded wait so callers queue for a connection instead of erroring.
+    def __init__(self, dsn, min_size, max_size, timeout, health_check_idle):
+        self._pool = ThreadedConnectionPool(min_size, max_size, dsn)
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._returned_at = {}
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_idle = health_check_idle
+        self.in_use = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.replaced = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def getconn(self):
+        started = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self.timeouts += 1
+            DB_POOL_TIMEOUTS.inc()
+            raise PoolError(f"Timed out after {self.timeout}s waiting for a database connection")
+        waited = time.perf_counter() - started
+        DB_POOL_WAIT_SECONDS.observe(waited)
+        try:
+            conn = self._pool.getconn()
+            if not self._is_healthy(conn):
+                with self._lock:
+                    self._returned_at.pop(id(conn), None)
+                self._pool.putconn(conn, close=True)
+                conn = self._pool.getconn()
+                with self._lock:
+                    self.replaced += 1
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self.in_use += 1
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        return conn
+
+    def putconn(self, conn):
+        try:
+            broken = bool(conn.closed)
+            if not broken:
+                # Never hand the next caller a connection with an open transaction
+                try:
+                    conn.rollback()
+                except psycopg2.Error as e:
+                    # A dropped connection: close it so its pool slot is still
+                    # returned, and keep the caller's own exception in front
+                    logging.warning(f"Discarding a broken database connection: {str(e)}")
+                    broken = True
+            with self._lock:
+                if broken:
+                    self._returned_at.pop(id(conn), None)
+                else:
+                    self._returned_at[id(conn)] = time.monotonic()
+            self._pool.putconn(conn, close=broken)
+        finally:
+            with self._lock:
+                self.in_use -= 1
+            self._slots.release()
+
+    def _is_healthy(self, conn):
+        if conn.closed:
+            return False
+        with self._lock:
+            returned_at = self._returned_at.get(id(conn), 0.0)
+        idle = time.monotonic() - returned_at
+        if idle < self.health_check_idle:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def close(self):
+        self._pool.closeall()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "in_use": self.in_use,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "replaced_connections": self.replaced,
+                "wait_seconds_total": round(self.wait_seconds_total, 3),
+                "wait_seconds_avg": round(self.wait_seconds_total / self.checkouts, 6) if self.checkouts else 0.0,
+                "wait_seconds_max": round(self.wait_seconds_max, 3)
+            }
+
+db_pool = None
+
+def init_db_pool(max_size=None):
+    global db_pool
+    if db_pool is None:
+        db_pool = DatabasePool(POSTGRES_URL, DB_POOL_MIN_SIZE, max_size or DB_POOL_MAX_SIZE,
+                               DB_POOL_TIMEOUT, DB_POOL_HEALTH_CHECK_IDLE)
+    return db_pool
+
+def close_db_pool():
+    global db_pool
+    if db_pool is not None:
+        db_pool.close()
+        db_pool = None
+
+@contextmanager
+def get_db_connection():
+    conn = db_pool.getconn()
+    try:
+        yield conn
+    finally:
+        db_pool.putconn(conn)
+
+def init_database():
+    with get_db_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute("CREATE EXTENSION IF NOT EXISTS vector")
+        
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS raw_tenders (
+                id TEXT PRIMARY KEY,
+                tender_id TEXT,
+                title TEXT,
+                description TEXT,
+                organization TEXT,
+                category TEXT,
+                value NUMERIC,
+                currency TEXT,
+                published_date TEXT,
+                deadline TEXT,
+                location TEXT,
+                status TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS cleaned_tenders (
+                id TEXT PRIMARY KEY,
+                tender_id TEXT UNIQUE,
+                title TEXT,
+                description TEXT,
+                organization TEXT,
+                category TEXT,
+                value NUMERIC,
+                currency TEXT,
+                published_date DATE,
+                deadline DATE,
+                location TEXT,
+                status TEXT,
+                embedding vector({EMBEDDING_DIM}),
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        # Watermark for the incremental clean stage: rows are cleaned once, in ingestion order
+        cur.execute("ALTER TABLE raw_tenders ADD COLUMN IF NOT EXISTS batch_id TEXT")
+        cur.execute("ALTER TABLE raw_tenders ADD COLUMN IF NOT EXISTS processed_at TIMESTAMP")
+        # Ingest order. Rows of one COPY share created_at and ids are random, so
+        # only the sequence (filled in file order) says which duplicate came last.
+        cur.execute("ALTER TABLE raw_tenders ADD COLUMN IF NOT EXISTS seq BIGSERIAL")
+        cur.execute("DROP INDEX IF EXISTS raw_tenders_unprocessed_idx")
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS raw_tenders_unprocessed_seq_idx
+            ON raw_tenders (seq) WHERE processed_at IS NULL
+        """)
+        cur.execute("ALTER TABLE cleaned_tenders ADD COLUMN IF NOT EXISTS batch_id TEXT")
+        # Near-duplicate watermark: rows are compared against their neighbours once
+        cur.execute("ALTER TABLE cleaned_tenders ADD COLUMN IF NOT EXISTS near_dup_checked_at TIMESTAMP")
+        # Neighbour-list watermark: NULL until the row's current vector has been placed
+        cur.execute("ALTER TABLE cleaned_tenders ADD COLUMN IF NOT EXISTS neighbours_at TIMESTAMP")
+        
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS embedding_cache (
+                content_hash TEXT PRIMARY KEY,
+                model_name TEXT,
+                embedding vector,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        # Holds vectors of every model version, so it cannot be tied to one dimension
+        if column_type(cur, 'embedding_cache', 'embedding') != 'vector':
+            cur.execute("ALTER TABLE embedding_cache ALTER COLUMN embedding TYPE vector")
+        
+        # Which model owns cleaned_tenders.embedding (status 'active') and the
+        # rollout of its successor into the embedding_next shadow column
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS embedding_versions (
+                id SERIAL PRIMARY KEY,
+                model_name TEXT NOT NULL,
+                dim INTEGER,
+                status TEXT NOT NULL,
+                rows_total BIGINT DEFAULT 0,
+                rows_done BIGINT DEFAULT 0,
+                rows_per_sec REAL,
+                error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                activated_at TIMESTAMP
+            )
+        """)
+        cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS embedding_versions_active_idx ON embedding_versions ((true)) "
+                    "WHERE status = 'active'")
+        cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS embedding_versions_pending_idx ON embedding_versions ((true)) "
+                    f"WHERE status IN {PENDING_VERSION_STATES}")
+        
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS data_quality_logs (
+                id TEXT PRIMARY KEY,
+                check_type TEXT,
+                severity TEXT,
+                message TEXT,
+                details JSONB,
+                record_count INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS pipeline_health (
+                id TEXT PRIMARY KEY,
+                status TEXT,
+                total_records INTEGER,
+                clean_records INTEGER,
+                quality_score NUMERIC,
+                last_ingestion TIMESTAMP,
+                errors JSONB,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS ingestion_jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT,
+                filename TEXT,
+                mode TEXT,
+                batch_id TEXT,
+                spool_path TEXT,
+                current_stage TEXT,
+                stages JSONB DEFAULT '{}'::jsonb,
+                result JSONB,
+                error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS ingestion_jobs_status_idx ON ingestion_jobs (status)")
+        cur.execute("ALTER TABLE ingestion_jobs ADD COLUMN IF NOT EXISTS chunks_committed INTEGER DEFAULT 0")
+        # The process running a job claims it (owner) and keeps heartbeat_at fresh
+        cur.execute("ALTER TABLE ingestion_jobs ADD COLUMN IF NOT EXISTS owner TEXT")
+        cur.execute("ALTER TABLE ingestion_jobs ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP")
+        
+        # Quality results are kept per run instead of being wiped on every check
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS data_quality_runs (
+                id TEXT PRIMARY KEY,
+                batch_id TEXT,
+                trigger TEXT,
+                total_records INTEGER,
+                issue_count INTEGER,
+                duration_ms INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS data_quality_runs_created_at_idx ON data_quality_runs (created_at)")
+        cur.execute("ALTER TABLE data_quality_logs ADD COLUMN IF NOT EXISTS run_id TEXT")
+        cur.execute("CREATE INDEX IF NOT EXISTS data_quality_logs_run_id_idx ON data_quality_logs (run_id)")
+        
+        # Compact, mergeable per-batch summaries for drift detection
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS batch_profiles (
+                batch_id TEXT PRIMARY KEY,
+                model_name TEXT,
+                row_count BIGINT,
+                embedding_count BIGINT,
+                embedding_sum DOUBLE PRECISION[],
+                embedding_sq_sum DOUBLE PRECISION[],
+                value_sketch JSONB,
+                category_counts JSONB,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS batch_profiles_created_at_idx ON batch_profiles (created_at)")
+        
+        # Rollups kept current by every raw insert and clean page, so health and
+        # analytics never scan the tender tables
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS table_counts (
+                table_name TEXT PRIMARY KEY,
+                row_count BIGINT NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS spend_rollup (
+                dimension TEXT,
+                dim_value TEXT,
+                month DATE,
+                currency TEXT,
+                tender_count BIGINT NOT NULL,
+                total_value NUMERIC NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (dimension, dim_value, month, currency)
+            )
+        """)
+        # Per-category value moments (tenders with a value), for the outlier rule
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS category_value_stats (
+                category TEXT PRIMARY KEY,
+                value_count BIGINT NOT NULL,
+                value_sum NUMERIC NOT NULL,
+                value_sq_sum NUMERIC NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        # Batch-scoped quality checks read one batch's rows
+        cur.execute("CREATE INDEX IF NOT EXISTS raw_tenders_batch_tender_idx ON raw_tenders (batch_id, tender_id)")
+        cur.execute("CREATE INDEX IF NOT EXISTS cleaned_tenders_batch_id_idx ON cleaned_tenders (batch_id)")
+        
+        # Structured search filters and the full-text half of hybrid search
+        for column in ['category', 'organization', 'status', 'location', 'value', 'deadline']:
+            cur.execute(f"CREATE INDEX IF NOT EXISTS cleaned_tenders_{column}_idx ON cleaned_tenders ({column})")
+        cur.execute("""
+            ALTER TABLE cleaned_tenders ADD COLUMN IF NOT EXISTS search_tsv tsvector
+            GENERATED ALWAYS AS (to_tsvector('english', coalesce(title, '') || ' ' || coalesce(description, ''))) STORED
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS cleaned_tenders_search_tsv_idx ON cleaned_tenders USING gin (search_tsv)")
+        
+        # Keyset pagination and export walk this index newest first
+        cur.execute("CREATE INDEX IF NOT EXISTS cleaned_tenders_created_at_id_idx ON cleaned_tenders (created_at, id)")
+        # Work queue for the embedding backfill: only rows still waiting for a vector
+        cur.execute("CREATE INDEX IF NOT EXISTS cleaned_tenders_unembedded_idx ON cleaned_tenders (id) WHERE embedding IS NULL")
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS cleaned_tenders_near_dup_pending_idx ON cleaned_tenders (id)
+            WHERE near_dup_checked_at IS NULL AND embedding IS NOT NULL
+        """)
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS cleaned_tenders_neighbours_pending_idx ON cleaned_tenders (id)
+            WHERE neighbours_at IS NULL AND embedding IS NOT NULL
+        """)
+        
+        # Top-k similar tenders per tender (both columns are cleaned_tenders.id)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS tender_neighbours (
+                id TEXT,
+                neighbour_id TEXT,
+                similarity REAL,
+                PRIMARY KEY (id, neighbour_id)
+            )
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS tender_neighbours_lookup_idx ON tender_neighbours (id, similarity DESC)")
+        cur.execute("CREATE INDEX IF NOT EXISTS tender_neighbours_neighbour_idx ON tender_neighbours (neighbour_id)")
+        
+        conn.commit()
+        
+        # First start on an existing database (or one from before a rollup
+        # table existed): seed the rollups with one full scan
+        cur.execute("""
+            SELECT NOT EXISTS (SELECT 1 FROM table_counts)
+                OR (NOT EXISTS (SELECT 1 FROM category_value_stats)
+                    AND EXISTS (SELECT 1 FROM cleaned_tenders WHERE value IS NOT NULL))
+        """)
+        if cur.fetchone()[0]:
+            rebuild_rollups(cur)
+            conn.commit()
+        
+        # Serve the active embedding version, whatever the env names
+        version_cur = conn.cursor(cursor_factory=RealDictCursor)
+        adopt_embedding_version(seed_embedding_version(version_cur))
+        conn.commit()
+        version_cur.close()
+        
+        # Only create the ANN index if none exists; changing its type or build
+        # parameters is an explicit rebuild through POST /api/search-index.
+        index = describe_vector_index(cur)
+        if VECTOR_INDEX_TYPE != 'none' and not index:
+            build_vector_index(conn, VECTOR_INDEX_TYPE, m=HNSW_M, ef_construction=HNSW_EF_CONSTRUCTION,
+                               lists=IVFFLAT_LISTS, storage=VECTOR_STORAGE)
+        elif index:
+            set_vector_storage(index['storage'])
+        cur.close()
+
+VECTOR_INDEX_NAME = 'cleaned_tenders_embedding_idx'
+
+def storage_expression(storage, column='embedding', dim=None):
+    # (indexed expression, operator class, distance operator) for each storage mode
+    dim = dim or model_provider.dim
+    if storage == 'full':
+        return column, 'vector_cosine_ops', '<=>'
+    if storage == 'halfvec':
+        return f"({column}::halfvec({dim}))", 'halfvec_cosine_ops', '<=>'
+    if storage == 'binary':
+        return f"(binary_quantize({column})::bit({dim}))", 'bit_hamming_ops', '<~>'
+    raise ValueError(f"Unsupported vector storage: {storage}")
+
+def storage_query(storage, qvec):
+    # The query vector cast to match storage_expression
+    if storage == 'halfvec':
+        return f"{qvec}::halfvec({model_provider.dim})"
+    if storage == 'binary':
+        return f"binary_quantize({qvec}::vector)::bit({model_provider.dim})"
+    return f"{qvec}::vector"
+
+def vector_index_sql(index_type, m=HNSW_M, ef_construction=HNSW_EF_CONSTRUCTION, lists=IVFFLAT_LISTS,
+                     table='cleaned_tenders', column='embedding', name=VECTOR_INDEX_NAME, storage='full',
+                     dim=None, concurrently=False):
+    if index_type == 'hnsw':
+        options = f"m = {int(m)}, ef_construction = {int(ef_construction)}"
+    elif index_type == 'ivfflat':
+        options = f"lists = {int(lists)}"
+    else:
+        raise ValueError(f"Unsupported vector index type: {index_type}")
+    expression, opclass, _ = storage_expression(storage, column, dim)
+    create = 'CREATE INDEX CONCURRENTLY' if concurrently else 'CREATE INDEX'
+    return f"{create} {name} ON {table} USING {index_type} ({expression} {opclass}) WITH ({options})"
+
+VECTOR_INDEX_BUILD_NAME = 'cleaned_tenders_embedding_build_idx'
+
+def build_vector_index(conn, index_type, storage='full', **params):
+    # Builds the replacement next to the live index with CREATE INDEX
+    # CONCURRENTLY, so search, ingest and clean keep running for the minutes
+    # it takes; only the drop-and-rename at the end locks the table, briefly.
+    # Commits on `conn`.
+    started = time.perf_counter()
+    cur = conn.cursor()
+    if index_type != 'none':
+        with autocommit(conn):
+            # An interrupted build leaves an invalid index under this name
+            cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {VECTOR_INDEX_BUILD_NAME}")
+            cur.execute(vector_index_sql(index_type, name=VECTOR_INDEX_BUILD_NAME, storage=storage,
+                                         concurrently=True, **params))
+    attempts = 5
+    for attempt in range(attempts):
+        try:
+            # Readers queue behind the swap, so it backs off rather than wait on a long query
+            cur.execute("SELECT set_config('lock_timeout', %s, true)", (SWITCH_LOCK_TIMEOUT,))
+            cur.execute(f"DROP INDEX IF EXISTS {VECTOR_INDEX_NAME}")
+            if index_type != 'none':
+                cur.execute(f"ALTER INDEX {VECTOR_INDEX_BUILD_NAME} RENAME TO {VECTOR_INDEX_NAME}")
+            conn.commit()
+            break
+        except psycopg2.OperationalError as e:
+            conn.rollback()
+            if e.pgcode != '55P03' or attempt == attempts - 1:
+                raise
+    cur.close()
+    set_vector_storage(storage if index_type != 'none' else 'full')
+    logging.info(f"Built {index_type} ({storage}) index {VECTOR_INDEX_NAME} in {time.perf_counter() - started:.1f}s")
+
+# The latest rebuild started by POST /api/search-index in this process
+vector_index_build = {"status": "idle"}
+_vector_index_build_lock = threading.Lock()
+
+def run_vector_index_build(request):
+    started = time.perf_counter()
+    try:
+        with get_db_connection() as conn:
+            cur = conn.cursor()
+            # One build per database: they would share VECTOR_INDEX_BUILD_NAME
+            cur.execute("SELECT pg_try_advisory_lock(hashtext('vector_index_build'))")
+            if not cur.fetchone()[0]:
+                raise RuntimeError("Another process is already rebuilding the search index")
+            try:
+                build_vector_index(conn, request.index_type, storage=request.storage, m=request.m,
+                                   ef_construction=request.ef_construction, lists=request.lists)
+            finally:
+                conn.rollback()
+                cur.execute("SELECT pg_advisory_unlock(hashtext('vector_index_build'))")
+                conn.commit()
+                cur.close()
+        search_result_cache.clear()
+        vector_index_build.update(status='completed', build_seconds=round(time.perf_counter() - started, 1))
+    except Exception as e:
+        logging.error(f"Search index build error: {str(e)}")
+        vector_index_build.update(status='failed', error=str(e),
+                                  build_seconds=round(time.perf_counter() - started, 1))
+
+# Storage of the live index, so queries use the expression it can serve. Like
+# the result cache, another worker only picks up a rebuild on restart.
+vector_storage = VECTOR_STORAGE
+
+def set_vector_storage(storage):
+    global vector_storage
+    vector_storage = storage
+
+def vector_candidates_sql(source, source_filter, qvec, limit, columns=None, storage=None, factor=None):
+    # Nearest rows of `source` to the SQL expression `qvec` with an exact
+    # `similarity` column. On a compact index the first stage orders by the
+    # quantized distance and the candidates are re-ranked on the float32 column.
+    # The exact-filter path scans a CTE with no index, so it is always exact.
+    columns = columns or SEARCH_COLUMNS
+    if storage is None:
+        storage = vector_storage if source == 'cleaned_tenders' else 'full'
+    exact = f"embedding <=> {qvec}::vector"
+    if storage == 'full':
+        return f"""SELECT {columns}, 1 - ({exact}) AS similarity
+            FROM {source}
+            WHERE embedding IS NOT NULL{source_filter}
+            ORDER BY {exact}
+            LIMIT {limit}"""
+    expression, _, operator = storage_expression(storage)
+    return f"""SELECT {columns}, 1 - ({exact}) AS similarity
+            FROM (
+                SELECT {columns}, embedding FROM {source}
+                WHERE embedding IS NOT NULL{source_filter}
+                ORDER BY {expression} {operator} {storage_query(storage, qvec)}
+                LIMIT {limit} * {int(factor or VECTOR_RERANK_FACTOR[storage])}
+            ) first_stage
+            ORDER BY {exact}
+            LIMIT {limit}"""
+
+def first_stage_limit(limit, source):
+    return limit * (VECTOR_RERANK_FACTOR[vector_storage] if source == 'cleaned_tenders' else 1)
+
+def describe_vector_index(cur):
+    cur.execute("""
+        SELECT indexdef, pg_relation_size(indexname::regclass) AS size_bytes
+        FROM pg_indexes WHERE indexname = %s
+    """, (VECTOR_INDEX_NAME,))
+    row = cur.fetchone()
+    if not row:
+        return None
+    indexdef, size_bytes = (row['indexdef'], row['size_bytes']) if isinstance(row, dict) else row
+    index_type = 'hnsw' if 'USING hnsw' in indexdef else 'ivfflat' if 'USING ivfflat' in indexdef else 'other'
+    storage = 'binary' if 'binary_quantize' in indexdef else 'halfvec' if 'halfvec' in indexdef else 'full'
+    return {"name": VECTOR_INDEX_NAME, "type": index_type, "storage": storage, "definition": indexdef,
+            "size_bytes": size_bytes}
+
+pgvector_version = None
+
+def supports_iterative_scan(cur):
+    global pgvector_version
+    if pgvector_version is None:
+        cur.execute("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+        row = cur.fetchone()
+        version = (row['extversion'] if isinstance(row, dict) else row[0]) if row else '0'
+        pgvector_version = tuple(int(part) for part in version.split('.') if part.isdigit())
+    return pgvector_version >= (0, 8)
+
+def apply_search_tuning(cur, limit, ef_search=None, probes=None, filtered=False):
+    # SET LOCAL semantics: the settings end with the transaction, which the pool
+    # rolls back on return. HNSW never returns more than ef_search rows, so it
+    # is kept at least as large as LIMIT.
+    cur.execute("SELECT set_config('hnsw.ef_search', %s, true), set_config('ivfflat.probes', %s, true)",
+                (str(max(ef_search or SEARCH_EF_SEARCH, limit)), str(probes or SEARCH_PROBES)))
+    # With a WHERE filter the index can run out of matching rows before LIMIT;
+    # pgvector 0.8+ can keep scanning instead of returning a short result.
+    if filtered and supports_iterative_scan(cur):
+        cur.execute("SELECT set_config('hnsw.iterative_scan', 'relaxed_order', true), "
+                    "set_config('ivfflat.iterative_scan', 'relaxed_order', true)")
+
+class TenderResponse(BaseModel):
+    id: str
+    tender_id: str
+    title: str
+    description: str
+    organization: str
+    category: str
+    value: float
+    currency: str
+    published_date: str
+    deadline: str
+    location: str
+    status: str
+
+class DataQualityLog(BaseModel):
+    check_type: str
+    severity: str
+    message: str
+    details: Dict[str, Any]
+    record_count: int
+
+class PipelineHealth(BaseModel):
+    status: str
+    total_records: int
+    clean_records: int
+    quality_score: float
+    last_ingestion: Optional[str]
+    errors: Dict[str, Any]
+
+class SearchFilters(BaseModel):
+    category: Optional[str] = None
+    organization: Optional[str] = None
+    status: Optional[str] = None
+    location: Optional[str] = None
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+    deadline_from: Optional[date] = None
+    deadline_to: Optional[date] = None
+
+class SearchRequest(BaseModel):
+    query: str
+    limit: int = Field(default=5, ge=1, le=100)
+    ef_search: Optional[int] = Field(default=None, ge=1, le=1000)
+    probes: Optional[int] = Field(default=None, ge=1)
+    filters: Optional[SearchFilters] = None
+    hybrid: bool = False
+    hybrid_weight: float = Field(default=0.7, ge=0, le=1)
+
+class BatchSearchRequest(BaseModel):
+    queries: List[str] = Field(max_length=BATCH_SEARCH_MAX_QUERIES)
+    limit: int = Field(default=5, ge=1, le=100)
+    ef_search: Optional[int] = Field(default=None, ge=1, le=1000)
+    probes: Optional[int] = Field(default=None, ge=1)
+    filters: Optional[SearchFilters] = None
+
+class VectorIndexRequest(BaseModel):
+    index_type: str = VECTOR_INDEX_TYPE
+    storage: str = VECTOR_STORAGE
+    m: int = Field(default=HNSW_M, ge=2, le=100)
+    ef_construction: int = Field(default=HNSW_EF_CONSTRUCTION, ge=4, le=1000)
+    lists: int = Field(default=IVFFLAT_LISTS, ge=1)
+
+class EmbeddingVersionRequest(BaseModel):
+    model_name: str = Field(min_length=1)
+
+@api_router.get("/")
+async def root():
+    return {"message": "Procurement Intelligence Pipeline API", "version": "1.0.0"}
+
+startup_timings = {}
+
+@api_router.get("/health/live")
+async def liveness():
+    # The process is up and serving; says nothing about dependencies
+    return {"status": "alive"}
+
+@api_router.get("/health/ready")
+def readiness():
+    checks = {"model": model_provider.status(), "database": {"ok": False}}
+    if db_pool is not None:
+        try:
+            with get_db_connection() as conn:
+                cur = conn.cursor()
+                cur.execute("SELECT 1")
+                cur.close()
+            checks['database']['ok'] = True
+        except Exception as e:
+            checks['database']['error'] = str(e)
+    # In lazy mode the model loads on first use, so only a failed load blocks readiness
+    model_ok = model_provider.ready or (EMBEDDING_MODEL_LOAD == 'lazy' and model_provider.state != 'failed')
+    ready = model_ok and checks['database']['ok']
+    body = {"status": "ready" if ready else "not_ready", "checks": checks, "startup": startup_timings}
+    return JSONResponse(status_code=200 if ready else 503, content=body)
+
+def prepare_raw_frame(df, batch_id):
+    # Column-wise equivalent of the per-row defaults used by insert_raw_rows
+    frame = pd.DataFrame(index=df.index)
+    frame['id'] = [str(uuid.uuid4()) for _ in range(len(df))]
+    if 'tender_id' in df.columns:
+        frame['tender_id'] = df['tender_id'].astype(object).where(df['tender_id'].notna(), frame['id']).astype(str)
+    else:
+        frame['tender_id'] = frame['id']
+    for column in ['title', 'description', 'organization', 'category']:
+        frame[column] = _text_column(df, column)
+    if 'value' in df.columns:
+        frame['value'] = pd.to_numeric(df['value'], errors='coerce').fillna(0.0).astype(float)
+    else:
+        frame['value'] = 0.0
+    for column in ['currency', 'published_date', 'deadline', 'location', 'status']:
+        frame[column] = _text_column(df, column)
+    frame['batch_id'] = batch_id
+    return frame[RAW_COLUMNS]
+
+def _text_column(df, column):
+    default = RAW_TEXT_DEFAULTS[column]
+    if column not in df.columns:
+        return pd.Series(default, index=df.index, dtype=object)
+    return df[column].astype(object).where(df[column].notna(), default).astype(str)
+
+def copy_raw_frame(cur, frame):
+    # FORCE_NOT_NULL keeps empty strings as '' instead of NULL, matching the row path
+    text_columns = ', '.join(c for c in RAW_COLUMNS if c != 'value')
+    copy_sql = (f"COPY raw_tenders ({', '.join(RAW_COLUMNS)}) FROM STDIN "
+                f"WITH (FORMAT csv, FORCE_NOT_NULL ({text_columns}))")
+    for start in range(0, len(frame), INGEST_COPY_BATCH_SIZE):
+        buffer = io.StringIO()
+        frame.iloc[start:start + INGEST_COPY_BATCH_SIZE].to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+        cur.copy_expert(copy_sql, buffer)
+    return len(frame)
+
+def insert_raw_rows(cur, df, batch_id):
+    records_inserted = 0
+    for _, row in df.iterrows():
+        tender_id = str(uuid.uuid4())
+        cur.execute("""
+            INSERT INTO raw_tenders (id, tender_id, title, description, organization, 
+                                   category, value, currency, published_date, deadline, 
+                                   location, status, batch_id)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, (
+            tender_id, row.get('tender_id', tender_id), row.get('title', ''),
+            row.get('description', ''), row.get('organization', ''),
+            row.get('category', ''), float(row.get('value', 0)),
+            row.get('currency', 'USD'), row.get('published_date', ''),
+            row.get('deadline', ''), row.get('location', ''),
+            row.get('status', 'Open'), batch_id
+        ))
+        records_inserted += 1
+    return records_inserted
+
+class IngestionJob:
+    # Persists stage-by-stage progress to ingestion_jobs so GET /api/jobs/{id}
+    # can report it and an interrupted job can resume after a restart.
+    def __init__(self, row):
+        self.id = row['id']
+        self.mode = row['mode']
+        self.batch_id = row['batch_id']
+        self.spool_path = Path(row['spool_path'])
+        self.stages = row['stages'] or {}
+        self.chunks_committed = row['chunks_committed'] or 0
+
+    def progress(self, name, rows, seconds, **extra):
+        # Streaming stages run once per chunk, so their counters accumulate
+        info = self.stages.setdefault(name, {"status": "running", "rows": 0, "seconds": 0.0, "chunks": 0})
+        info['rows'] += rows
+        info['seconds'] = round(info['seconds'] + seconds, 3)
+        info['chunks'] += 1
+        info.update(extra)
+        INGEST_STAGE_SECONDS.observe(seconds, stage=name)
+        INGEST_STAGE_ROWS.inc(rows, stage=name)
+        self._save(status='running', current_stage=name)
+
+    def complete(self, name):
+        info = self.stages.setdefault(name, {"rows": 0, "seconds": 0.0, "chunks": 0})
+        info['status'] = 'completed'
+        self._save()
+
+    @contextmanager
+    def stage(self, name):
+        info = {"status": "running", "started_at": datetime.now(timezone.utc).isoformat()}
+        self.stages[name] = info
+        self._save(status='running', current_stage=name)
+        started = time.perf_counter()
+        try:
+            yield info
+        except Exception as e:
+            info.update(status='failed', error=str(e))
+            raise
+        else:
+            info['status'] = 'completed'
+        finally:
+            info['seconds'] = round(time.perf_counter() - started, 3)
+            INGEST_STAGE_SECONDS.observe(time.perf_counter() - started, stage=name)
+            self._save()
+
+    def finish(self, status, result=None, error=None):
+        self._save(status=status, current_stage=None, result=result, error=error)
+
+    def _save(self, **fields):
+        fields['stages'] = json.dumps(self.stages)
+        if 'result' in fields:
+            fields['result'] = json.dumps(fields['result']) if fields['result'] is not None else None
+        assignments = ', '.join(f"{column} = %s" for column in fields)
+        with get_db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(f"UPDATE ingestion_jobs SET {assignments}, updated_at = CURRENT_TIMESTAMP WHERE id = %s",
+                        list(fields.values()) + [self.id])
+            conn.commit()
+            cur.close()
+
+ingest_job_executor = ThreadPoolExecutor(max_workers=INGEST_JOB_WORKERS, thread_name_prefix='ingest-job')
+
+def create_ingestion_job(upload, filename, mode):
+    job_id = str(uuid.uuid4())
+    INGEST_SPOOL_DIR.mkdir(parents=True, exist_ok=True)
+    spool_path = INGEST_SPOOL_DIR / f"{job_id}.csv"
+    # Copy in fixed-size chunks so the upload is never held in memory at once
+    with open(spool_path, 'wb') as spool:
+        shutil.copyfileobj(upload, spool, INGEST_UPLOAD_CHUNK_BYTES)
+    
+    try:
+        with get_db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                INSERT INTO ingestion_jobs (id, status, filename, mode, batch_id, spool_path)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """, (job_id, 'queued', filename, mode, str(uuid.uuid4()), str(spool_path)))
+            conn.commit()
+            cur.close()
+    except Exception:
+        # Without a job row nothing would ever resume or remove the spool file
+        spool_path.unlink(missing_ok=True)
+        raise
+    
+    ingest_job_executor.submit(run_ingestion_job, job_id)
+    return job_id
+
+def job_owner():
+    # Per process, not per import: a forked worker must not share its parent's id
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+# Queued, or running in a process that stopped sending heartbeats
+CLAIMABLE_JOB_SQL = """(status = 'queued' OR (status = 'running' AND (heartbeat_at IS NULL
+    OR heartbeat_at < CURRENT_TIMESTAMP - make_interval(secs => %(stale)s))))"""
+
+@contextmanager
+def job_heartbeat(job_id, owner):
+    stop = threading.Event()
+    
+    def beat():
+        while not stop.wait(INGEST_JOB_HEARTBEAT_SECONDS):
+            try:
+                with get_db_connection() as conn:
+                    cur = conn.cursor()
+                    cur.execute("UPDATE ingestion_jobs SET heartbeat_at = CURRENT_TIMESTAMP WHERE id = %s AND owner = %s",
+                                (job_id, owner))
+                    conn.commit()
+                    cur.close()
+            except Exception as e:
+                logging.warning(f"Heartbeat for ingestion job {job_id} failed: {str(e)}")
+    
+    thread = threading.Thread(target=beat, name=f'job-heartbeat-{job_id}', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+def run_ingestion_job(job_id):
+    # Every process may try to run a queued or orphaned job (the uploading
+    # worker, or any worker resuming after a restart); the conditional UPDATE
+    # lets exactly one of them claim it
+    owner = job_owner()
+    with get_db_connection() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute(f"""
+            UPDATE ingestion_jobs SET status = 'running', owner = %(owner)s, heartbeat_at = CURRENT_TIMESTAMP,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = %(id)s AND {CLAIMABLE_JOB_SQL}
+            RETURNING *
+        """, {'id': job_id, 'owner': owner, 'stale': INGEST_JOB_STALE_SECONDS})
+        row = cur.fetchone()
+        conn.commit()
+        cur.close()
+    if not row:
+        return
+    
+    job = IngestionJob(row)
+    with job_heartbeat(job_id, owner):
+        try:
+            result = run_ingest_pipeline(job)
+            job.finish('completed', result=result)
+        except Exception as e:
+            logging.error(f"Ingestion job {job_id} failed: {str(e)}")
+            job.finish('failed', error=str(e))
+    job.spool_path.unlink(missing_ok=True)
+
+def run_ingest_pipeline(job):
+    embedding_stats = EmbeddingStats()
+    
+    # The upload is parsed INGEST_CHUNK_ROWS at a time and each chunk goes through
+    # raw insert, clean and embed before the next is read, so peak memory depends
+    # on the chunk size rather than the file size. dtype=str leaves type coercion
+    # to prepare_raw_frame and keeps identifiers like '00123' intact.
+    with pd.read_csv(job.spool_path, chunksize=INGEST_CHUNK_ROWS, dtype=str) as reader:
+        chunk_index = 0
+        while True:
+            started = time.perf_counter()
+            df = next(reader, None)
+            if df is None:
+                break
+            chunk_index += 1
+            if chunk_index <= job.chunks_committed:
+                # Already committed before a restart
+                continue
+            job.progress('parse', len(df), time.perf_counter() - started)
+            
+            with get_db_connection() as conn:
+                cur = conn.cursor()
+                started = time.perf_counter()
+                if job.mode == 'bulk':
+                    records_inserted = copy_raw_frame(cur, prepare_raw_frame(df, job.batch_id))
+                else:
+                    records_inserted = insert_raw_rows(cur, df, job.batch_id)
+                add_table_count(cur, 'raw_tenders', records_inserted)
+                # The chunk, its row count and its resume marker commit together
+                cur.execute("UPDATE ingestion_jobs SET chunks_committed = %s WHERE id = %s", (chunk_index, job.id))
+                conn.commit()
+                cur.close()
+            job.chunks_committed = chunk_index
+            job.progress('raw_insert', records_inserted, time.perf_counter() - started)
+            del df
+            
+            started = time.perf_counter()
+            cleaned_count = clean_and_normalize(stats=embedding_stats)
+            job.progress('clean', cleaned_count, time.perf_counter() - started, embedding=embedding_stats.as_dict())
+    
+    # Picks up rows a resumed job committed but never cleaned; a no-op otherwise
+    started = time.perf_counter()
+    cleaned_count = clean_and_normalize(stats=embedding_stats)
+    if cleaned_count:
+        job.progress('clean', cleaned_count, time.perf_counter() - started, embedding=embedding_stats.as_dict())
+    for name in ['parse', 'raw_insert', 'clean']:
+        job.complete(name)
+    
+    with job.stage('neighbours') as info:
+        info['rows'] = refresh_tender_neighbours()
+    
+    with job.stage('quality'):
+        run_data_quality_checks(batch_id=job.batch_id, trigger='ingest')
+    
+    with job.stage('health'):
+        update_pipeline_health()
+    
+    raw_info = job.stages['raw_insert']
+    return {
+        "mode": job.mode,
+        "batch_id": job.batch_id,
+        "chunks": job.chunks_committed,
+        "records_ingested": raw_info['rows'],
+        "rows_per_sec": round(raw_info['rows'] / raw_info['seconds'], 1) if raw_info['seconds'] > 0 else None,
+        "records_cleaned": job.stages['clean']['rows'],
+        "embedding": embedding_stats.as_dict()
+    }
+
+def resume_ingestion_jobs():
+    # Jobs still running elsewhere (fresh heartbeat) are left alone; the rest
+    # are claimed by run_ingestion_job, so a job submitted by several workers
+    # still runs once
+    with get_db_connection() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute(f"SELECT id, spool_path FROM ingestion_jobs WHERE {CLAIMABLE_JOB_SQL} ORDER BY created_at",
+                    {'stale': INGEST_JOB_STALE_SECONDS})
+        pending = cur.fetchall()
+        for job in pending:
+            if Path(job['spool_path']).exists():
+                ingest_job_executor.submit(run_ingestion_job, job['id'])
+            else:
+                cur.execute(f"""
+                    UPDATE ingestion_jobs SET status = 'failed', error = %(error)s, updated_at = CURRENT_TIMESTAMP
+                    WHERE id = %(id)s AND {CLAIMABLE_JOB_SQL}
+                """, {'error': 'Upload spool file missing after restart', 'id': job['id'],
+                      'stale': INGEST_JOB_STALE_SECONDS})
+        conn.commit()
+        cur.close()
+    return len(pending)
+
+def job_response(row):
+    return {
+        "job_id": row['id'],
+        "status": row['status'],
+        "filename": row['filename'],
+        "mode": row['mode'],
+        "batch_id": row['batch_id'],
+        "current_stage": row['current_stage'],
+        "chunks_committed": row['chunks_committed'],
+        "stages": row['stages'] or {},
+        "result": row['result'],
+        "error": row['error'],
+        "created_at": row['created_at'].isoformat(),
+        "updated_at": row['updated_at'].isoformat()
+    }
+
+@api_router.post("/ingest", status_code=202)
+async def ingest_data(file: UploadFile = File(...), mode: str = 'bulk'):
+    if mode not in ('bulk', 'row'):
+        raise HTTPException(status_code=400, detail="mode must be 'bulk' or 'row'")
+    try:
+        job_id = await run_in_threadpool(create_ingestion_job, file.file, file.filename, mode)
+        return {"status": "queued", "job_id": job_id, "status_url": f"/api/jobs/{job_id}"}
+    except Exception as e:
+        logging.error(f"Ingestion error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.get("/jobs")
+def list_jobs(limit: int = 20):
+    with get_db_connection() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute("SELECT * FROM ingestion_jobs ORDER BY created_at DESC LIMIT %s", (limit,))
+        jobs = cur.fetchall()
+        cur.close()
+    return [job_response(job) for job in jobs]
+
+@api_router.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    with get_db_connection() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute("SELECT * FROM ingestion_jobs WHERE id = %s", (job_id,))
+        job = cur.fetchone()
+        cur.close()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_response(job)
+
+def normalize_text(text):
+    return ' '.join((text or '').split())
+
+def embedding_cache_key(normalized, model_name):
+    return hashlib.sha256(f"{model_name}\n{normalized}".encode('utf-8')).hexdigest()
+
+class EmbeddingStats:
+    def __init__(self):
+        self.texts = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.encode_seconds = 0.0
+
+    def merge(self, other):
+        self.texts += other.texts
+        self.cache_hits += other.cache_hits
+        self.cache_misses += other.cache_misses
+        self.encode_seconds += other.encode_seconds
+
+    def as_dict(self):
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "texts": self.texts,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_hit_rate": round(self.cache_hits / lookups, 3) if lookups else None,
+            "encode_seconds": round(self.encode_seconds, 3),
+            "encode_texts_per_sec": round(self.cache_misses / self.encode_seconds, 1) if self.encode_seconds > 0 else None
+        }
+
+def embed_texts(cur, texts, stats, encoder=None, provider=None):
+    # Short texts get a zero vector, the rest are deduplicated by content hash,
+    # looked up in embedding_cache and only the misses are encoded, in batches.
+    # `provider` names the model the vectors are for (the active one by default);
+    # `encoder` must encode with that same model.
+    provider = provider or model_provider
+    stats.texts += len(texts)
+    keys = []
+    for text in texts:
+        normalized = normalize_text(text)
+        keys.append((embedding_cache_key(normalized, provider.model_name), normalized) if len(normalized) > 10 else None)
+    
+    unique = {key: normalized for key, normalized in filter(None, keys)}
+    found = {}
+    if unique:
+        cur.execute("SELECT content_hash, embedding::real[] AS embedding FROM embedding_cache WHERE content_hash = ANY(%s)",
+                    (list(unique),))
+        found = {row['content_hash']: row['embedding'] for row in cur.fetchall()}
+    stats.cache_hits += len(found)
+    EMBEDDING_CACHE_LOOKUPS.inc(len(found), result='hit')
+    
+    missing = [key for key in unique if key not in found]
+    EMBEDDING_CACHE_LOOKUPS.inc(len(missing), result='miss')
+    if missing:
+        started = time.perf_counter()
+        encoded = (encoder or encode_texts)([unique[key] for key in missing])
+        stats.encode_seconds += time.perf_counter() - started
+        stats.cache_misses += len(missing)
+        found.update((key, vector.tolist()) for key, vector in zip(missing, encoded))
+        execute_values(cur, """
+            INSERT INTO embedding_cache (content_hash, model_name, embedding)
+            VALUES %s
+            ON CONFLICT (content_hash) DO NOTHING
+        """, [(key, provider.model_name, found[key]) for key in missing])
+    
+    zero = [0.0] * provider.dim
+    return [found[key[0]] if key else zero for key in keys]
+
+class ValueSketch:
+    # Log-bucketed histogram with relative accuracy alpha (DDSketch style).
+    # Quantiles are within alpha of the true value and sketches merge by
+    # adding bucket counts, so batches can be combined without rescanning.
+    def __init__(self, alpha=0.01, bins=None, zero=0, negative=0):
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self.bins = bins or {}
+        self.zero = zero
+        self.negative = negative
+
+    @property
+    def count(self):
+        return self.zero + self.negative + sum(self.bins.values())
+
+    def add(self, value):
+        if value is None or math.isnan(value):
+            return
+        if value < 0:
+            self.negative += 1
+        elif value == 0:
+            self.zero += 1
+        else:
+            key = str(math.ceil(math.log(value, self.gamma)))
+            self.bins[key] = self.bins.get(key, 0) + 1
+
+    def merge(self, other):
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.zero += other.zero
+        self.negative += other.negative
+
+    def quantile(self, q):
+        total = self.count
+        if total == 0:
+            return None
+        rank = q * (total - 1)
+        seen = self.negative + self.zero
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.bins, key=int):
+            seen += self.bins[key]
+            if seen > rank:
+                return 2 * self.gamma ** int(key) / (self.gamma + 1)
+        return None
+
+    def to_json(self):
+        return {"alpha": self.alpha, "bins": self.bins, "zero": self.zero, "negative": self.negative}
+
+    @classmethod
+    def from_json(cls, data):
+        data = data or {}
+        return cls(data.get('alpha', 0.01), dict(data.get('bins', {})), data.get('zero', 0), data.get('negative', 0))
+
+class BatchProfile:
+    def __init__(self, row_count=0, embedding_count=0, embedding_sum=None, embedding_sq_sum=None,
+                 value_sketch=None, category_counts=None):
+        self.row_count = row_count
+        self.embedding_count = embedding_count
+        dim = model_provider.dim
+        self.embedding_sum = np.zeros(dim) if embedding_sum is None else np.asarray(embedding_sum, dtype=float)
+        self.embedding_sq_sum = np.zeros(dim) if embedding_sq_sum is None else np.asarray(embedding_sq_sum, dtype=float)
+        self.value_sketch = value_sketch or ValueSketch()
+        self.category_counts = category_counts or {}
+
+    def add_rows(self, records, embeddings):
+        self.row_count += len(records)
+        self.add_embeddings(embeddings)
+        for record in records:
+            self.value_sketch.add(float(record['value']) if record['value'] is not None else None)
+            category = record['category'] or 'unknown'
+            self.category_counts[category] = self.category_counts.get(category, 0) + 1
+
+    def add_embeddings(self, embeddings):
+        # Zero vectors (short texts) and deferred (None) embeddings carry no signal
+        vectors = np.asarray([e for e in embeddings if e is not None and any(e)], dtype=float)
+        if len(vectors):
+            self.embedding_count += len(vectors)
+            self.embedding_sum += vectors.sum(axis=0)
+            self.embedding_sq_sum += (vectors ** 2).sum(axis=0)
+
+    def merge(self, other):
+        self.row_count += other.row_count
+        self.embedding_count += other.embedding_count
+        self.embedding_sum += other.embedding_sum
+        self.embedding_sq_sum += other.embedding_sq_sum
+        self.value_sketch.merge(other.value_sketch)
+        for category, count in other.category_counts.items():
+            self.category_counts[category] = self.category_counts.get(category, 0) + count
+
+    def centroid(self):
+        return self.embedding_sum / self.embedding_count if self.embedding_count else None
+
+    def mean_variance(self):
+        if not self.embedding_count:
+            return None
+        mean = self.centroid()
+        return float(np.mean(self.embedding_sq_sum / self.embedding_count - mean ** 2))
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(row['row_count'], row['embedding_count'], row['embedding_sum'], row['embedding_sq_sum'],
+                   ValueSketch.from_json(row['value_sketch']), dict(row['category_counts'] or {}))
+
+def save_batch_profiles(cur, profiles):
+    # Called inside the clean page transaction, so a page and its contribution
+    # to the batch profile commit or roll back together. The row is created
+    # first so concurrent writers (backfill threads) serialize on its lock
+    # instead of overwriting each other's merge; sorted to avoid deadlocks.
+    for batch_id in sorted(profiles, key=str):
+        cur.execute("""
+            INSERT INTO batch_profiles (batch_id, model_name, row_count, embedding_count)
+            VALUES (%s, %s, 0, 0)
+            ON CONFLICT (batch_id) DO NOTHING
+        """, (batch_id, model_provider.model_name))
+        cur.execute("SELECT * FROM batch_profiles WHERE batch_id = %s FOR UPDATE", (batch_id,))
+        profile = BatchProfile.from_row(cur.fetchone())
+        profile.merge(profiles[batch_id])
+        cur.execute("""
+            UPDATE batch_profiles SET
+                row_count = %s,
+                embedding_count = %s,
+                embedding_sum = %s,
+                embedding_sq_sum = %s,
+                value_sketch = %s,
+                category_counts = %s,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE batch_id = %s
+        """, (profile.row_count, profile.embedding_count,
+              profile.embedding_sum.tolist(), profile.embedding_sq_sum.tolist(),
+              json.dumps(profile.value_sketch.to_json()), json.dumps(profile.category_counts), batch_id))
+
+ROLLUP_DIMENSIONS = ['category', 'organization', 'location', 'status']
+# Month bucket for tenders without a published date; kept out of time series
+UNDATED_MONTH = date(1, 1, 1)
+
+def add_table_count(cur, table_name, delta):
+    cur.execute("""
+        INSERT INTO table_counts (table_name, row_count) VALUES (%s, %s)
+        ON CONFLICT (table_name) DO UPDATE SET
+            row_count = table_counts.row_count + EXCLUDED.row_count,
+            updated_at = CURRENT_TIMESTAMP
+    """, (table_name, delta))
+
+def read_table_counts(cur):
+    cur.execute("SELECT table_name, row_count FROM table_counts")
+    return {row['table_name']: row['row_count'] for row in cur.fetchall()}
+
+class SpendRollup:
+    # Additive per-page delta for spend_rollup: tender count and total value
+    # per (dimension, value, month, currency), plus the per-category value
+    # moments in category_value_stats. Only rows the upsert inserted count; a
+    # conflicting upsert leaves every rolled-up column unchanged.
+    def __init__(self):
+        self.rows = 0
+        self.cells = {}
+        self.category_values = {}
+
+    def add_rows(self, rows):
+        for row in rows:
+            if not row['inserted']:
+                continue
+            self.rows += 1
+            month = row['published_date'].replace(day=1) if row['published_date'] else UNDATED_MONTH
+            value = row['value'] or 0
+            for dimension in ROLLUP_DIMENSIONS:
+                key = (dimension, row[dimension] or '', month, row['currency'] or '')
+                count, total = self.cells.get(key, (0, 0))
+                self.cells[key] = (count + 1, total + value)
+            if row['value'] is not None:
+                count, total, squares = self.category_values.get(row['category'] or '', (0, 0, 0))
+                self.category_values[row['category'] or ''] = (count + 1, total + row['value'],
+                                                               squares + row['value'] * row['value'])
+
+def save_spend_rollup(cur, rollup):
+    # Same transaction as the clean page; sorted so concurrent jobs lock the
+    # shared cells in the same order
+    if not rollup.rows:
+        return
+    execute_values(cur, """
+        INSERT INTO spend_rollup (dimension, dim_value, month, currency, tender_count, total_value)
+        VALUES %s
+        ON CONFLICT (dimension, dim_value, month, currency) DO UPDATE SET
+            tender_count = spend_rollup.tender_count + EXCLUDED.tender_count,
+            total_value = spend_rollup.total_value + EXCLUDED.total_value,
+            updated_at = CURRENT_TIMESTAMP
+    """, [key + cell for key, cell in sorted(rollup.cells.items())], page_size=len(rollup.cells))
+    if rollup.category_values:
+        execute_values(cur, """
+            INSERT INTO category_value_stats (category, value_count, value_sum, value_sq_sum)
+            VALUES %s
+            ON CONFLICT (category) DO UPDATE SET
+                value_count = category_value_stats.value_count + EXCLUDED.value_count,
+                value_sum = category_value_stats.value_sum + EXCLUDED.value_sum,
+                value_sq_sum = category_value_stats.value_sq_sum + EXCLUDED.value_sq_sum,
+                updated_at = CURRENT_TIMESTAMP
+        """, [(category,) + moments for category, moments in sorted(rollup.category_values.items())],
+            page_size=len(rollup.category_values))
+    add_table_count(cur, 'cleaned_tenders', rollup.rows)
+
+def rebuild_rollups(cur):
+    # Recomputes the rollups from scratch. The exclusive lock makes a
+    # concurrent page wait and apply its delta on top of the fresh totals;
+    # rows committed before the recount are simply part of it.
+    cur.execute("LOCK TABLE table_counts, spend_rollup, category_value_stats IN EXCLUSIVE MODE")
+    cur.execute("DELETE FROM table_counts")
+    cur.execute("DELETE FROM spend_rollup")
+    cur.execute("DELETE FROM category_value_stats")
+    cur.execute("""
+        INSERT INTO category_value_stats (category, value_count, value_sum, value_sq_sum)
+        SELECT COALESCE(category, ''), COUNT(*), SUM(value), SUM(value * value)
+        FROM cleaned_tenders
+        WHERE value IS NOT NULL
+        GROUP BY 1
+    """)
+    cur.execute("""
+        INSERT INTO table_counts (table_name, row_count)
+        SELECT 'raw_tenders', COUNT(*) FROM raw_tenders
+        UNION ALL
+        SELECT 'cleaned_tenders', COUNT(*) FROM cleaned_tenders
+    """)
+    dimensions = ', '.join(f"('{dimension}', t.{dimension})" for dimension in ROLLUP_DIMENSIONS)
+    cur.execute(f"""
+        INSERT INTO spend_rollup (dimension, dim_value, month, currency, tender_count, total_value)
+        SELECT d.dimension, COALESCE(d.dim_value, ''),
+               COALESCE(date_trunc('month', t.published_date)::date, %s),
+               COALESCE(t.currency, ''), COUNT(*), COALESCE(SUM(t.value), 0)
+        FROM cleaned_tenders t
+        CROSS JOIN LATERAL (VALUES {dimensions}) AS d(dimension, dim_value)
+        GROUP BY 1, 2, 3, 4
+    """, (UNDATED_MONTH,))
+
+CLEAN_UPSERT_SQL = """
+    INSERT INTO cleaned_tenders 
+    (id, tender_id, title, description, organization, category, value, 
+     currency, published_date, deadline, location, status, embedding, batch_id)
+    VALUES %s
+    ON CONFLICT (tender_id) DO UPDATE SET
+        title = EXCLUDED.title,
+        description = EXCLUDED.description,
+        embedding = EXCLUDED.embedding,
+        batch_id = EXCLUDED.batch_id,
+        near_dup_checked_at = NULL,
+        neighbours_at = CASE WHEN cleaned_tenders.embedding IS NOT DISTINCT FROM EXCLUDED.embedding
+                             THEN cleaned_tenders.neighbours_at END
+    RETURNING tender_id, organization, category, value, currency, published_date, location, status,
+              (xmax = 0) AS inserted
+"""
+
+def _clean_row(record, embedding):
+    return (
+        record['id'], record['tender_id'], record['title'],
+        record['description'], record['organization'],
+        record['category'], record['value'], record['currency'],
+        record['published_date'] or None, record['deadline'] or None,
+        record['location'], record['status'], embedding, record['batch_id']
+    )
+
+def clean_and_normalize(full_rebuild=False, stats=None, embed=True):
+    # With embed=False rows are cleaned with a NULL embedding and left for
+    # run_embedding_backfill, which spreads the encoding across processes
+    stats = stats if stats is not None else EmbeddingStats()
+    with get_db_connection() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        
+        if full_rebuild:
+            cur.execute("UPDATE raw_tenders SET processed_at = NULL WHERE processed_at IS NOT NULL")
+            # Profiles are rebuilt from scratch as the batches are reprocessed
+            cur.execute("DELETE FROM batch_profiles")
+            conn.commit()
+        
+        cleaned_count = 0
+        while True:
+            if embed:
+                lock_embedding_version(cur)
+            with OPERATION_SECONDS.time(operation='clean_fetch'):
+                # Concurrent jobs and rebuilds clean one page at a time, in seq
+                # order: the lock is held until the page's upsert, rollup deltas
+                # and processed_at are committed, so no page is applied twice and
+                # an older copy of a tender_id never lands after a newer one
+                cur.execute("SELECT pg_advisory_xact_lock(hashtext('clean_page'))")
+                cur.execute("""
+                    SELECT * FROM raw_tenders
+                    WHERE processed_at IS NULL
+                    ORDER BY seq
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                """, (CLEAN_BATCH_SIZE,))
+                raw_records = cur.fetchall()
+            if not raw_records:
+                break
+            
+            # Duplicate tender_ids within one page would make a single multi-row
+            # upsert fail, so keep the last occurrence like the row-by-row upsert
+            # did; pages are in seq order, so later pages overwrite earlier ones too
+            latest = {record['tender_id']: record for record in raw_records}
+            records = list(latest.values())
+            if embed:
+                with OPERATION_SECONDS.time(operation='clean_embed'):
+                    embeddings = embed_texts(cur, [r['description'] for r in records], stats)
+            else:
+                embeddings = [None] * len(records)
+            rows = [_clean_row(record, embedding) for record, embedding in zip(records, embeddings)]
+            
+            profiles = {}
+            for record, embedding in zip(records, embeddings):
+                profiles.setdefault(record['batch_id'], ([], []))
+                profiles[record['batch_id']][0].append(record)
+                profiles[record['batch_id']][1].append(embedding)
+            
+            upsert_started = time.perf_counter()
+            stored = []
+            cur.execute("SAVEPOINT clean_page")
+            rollup = SpendRollup()
+            try:
+                rollup.add_rows(execute_values(cur, CLEAN_UPSERT_SQL, rows, page_size=len(rows), fetch=True))
+                cur.execute("RELEASE SAVEPOINT clean_page")
+                cleaned_count += len(rows)
+                stored = list(zip(records, embeddings))
+            except Exception:
+                # Fall back to row-by-row so one bad record does not sink the page
+                cur.execute("ROLLBACK TO SAVEPOINT clean_page")
+                for record, row, embedding in zip(records, rows, embeddings):
+                    cur.execute("SAVEPOINT clean_record")
+                    try:
+                        rollup.add_rows(execute_values(cur, CLEAN_UPSERT_SQL, [row], fetch=True))
+                        cur.execute("RELEASE SAVEPOINT clean_record")
+                        cleaned_count += 1
+                        stored.append((record, embedding))
+                    except Exception as e:
+                        cur.execute("ROLLBACK TO SAVEPOINT clean_record")
+                        logging.error(f"Cleaning error for record {record['id']}: {str(e)}")
+            OPERATION_SECONDS.observe(time.perf_counter() - upsert_started, operation='clean_upsert')
+            PIPELINE_ROWS.inc(len(raw_records), operation='clean')
+            
+            deltas = {}
+            for batch_id, (batch_records, batch_embeddings) in profiles.items():
+                deltas[batch_id] = BatchProfile()
+                deltas[batch_id].add_rows(batch_records, batch_embeddings)
+            save_batch_profiles(cur, deltas)
+            save_spend_rollup(cur, rollup)
+            
+            # Failed rows are marked too, otherwise they would be retried forever
+            cur.execute("UPDATE raw_tenders SET processed_at = CURRENT_TIMESTAMP WHERE id = ANY(%s)",
+                        ([r['id'] for r in raw_records],))
+            conn.commit()
+            vector_backend.update([r['tender_id'] for r, _ in stored], [e for _, e in stored])
+            search_result_cache.clear()
+        
+        cur.close()
+    return cleaned_count
+
+def _init_backfill_worker(threads, model_name, dim):
+    # Runs once in each backfill process: cap intra-op threads so workers do
+    # not oversubscribe the cores, then load the model before the first chunk.
+    # The model is passed in because a spawned process starts from the env
+    # defaults, not the active embedding version.
+    global model_provider
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    if model_provider.model_name != model_name:
+        model_provider = EmbeddingModelProvider(model_name, EMBEDDING_DEVICE, EMBEDDING_BACKEND, dim=dim)
+    model_provider.get()
+
+def _backfill_encode(texts, batch_size):
+    started = time.perf_counter()
+    vectors = model_provider.get().encode(texts, batch_size=batch_size)
+    return os.getpid(), np.asarray(vectors, dtype=np.float32), time.perf_counter() - started
+
+class BackfillStats:
+    def __init__(self, pending):
+        self.pending = pending
+        self.rows = 0
+        self.chunks = 0
+        self.embedding = EmbeddingStats()
+        self.workers = {}
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def record_worker(self, pid, texts, seconds):
+        with self._lock:
+            worker = self.workers.setdefault(pid, {"texts": 0, "chunks": 0, "encode_seconds": 0.0})
+            worker['texts'] += texts
+            worker['chunks'] += 1
+            worker['encode_seconds'] += seconds
+
+    def record_chunk(self, rows, embedding_stats):
+        with self._lock:
+            self.rows += rows
+            self.chunks += 1
+            self.embedding.merge(embedding_stats)
+
+    def as_dict(self):
+        elapsed = time.perf_counter() - self.started
+        with self._lock:
+            workers = {str(pid): {**w, "encode_seconds": round(w['encode_seconds'], 3),
+                                  "texts_per_sec": round(w['texts'] / w['encode_seconds'], 1)
+                                  if w['encode_seconds'] > 0 else None}
+                       for pid, w in self.workers.items()}
+            return {
+                "pending_at_start": self.pending,
+                "rows_embedded": self.rows,
+                "chunks": self.chunks,
+                "seconds": round(elapsed, 1),
+                "rows_per_sec": round(self.rows / elapsed, 1) if elapsed > 0 else None,
+                "embedding": self.embedding.as_dict(),
+                "workers": workers,
+            }
+
+def iter_unembedded_chunks(chunk_rows):
+    # Keyset over the partial index; a short-lived connection per page so the
+    # pool stays free for the writer threads
+    last_id = ''
+    while True:
+        with get_db_connection() as conn:
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+            cur.execute("""
+                SELECT id, tender_id, description, batch_id FROM cleaned_tenders
+                WHERE embedding IS NULL AND id > %s
+                ORDER BY id
+                LIMIT %s
+            """, (last_id, chunk_rows))
+            rows = cur.fetchall()
+            cur.close()
+        if not rows:
+            return
+        last_id = rows[-1]['id']
+        yield rows
+
+def backfill_chunk(rows, encoder, stats, version_id):
+    chunk_stats = EmbeddingStats()
+    with OPERATION_SECONDS.time(operation='backfill_chunk'), get_db_connection() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        # The worker processes were started with the model of version_id
+        if lock_embedding_version(cur)['id'] != version_id:
+            raise RuntimeError("The embedding model changed during the backfill; run it again")
+        embeddings = embed_texts(cur, [r['description'] for r in rows], chunk_stats, encoder=encoder)
+        execute_values(cur, """
+            UPDATE cleaned_tenders t SET embedding = v.embedding::vector
+            FROM (VALUES %s) AS v(id, embedding)
+            WHERE t.id = v.id AND t.embedding IS NULL
+        """, [(r['id'], vector_literal(e)) for r, e in zip(rows, embeddings)], page_size=len(rows))
+        deltas = {}
+        for r, e in zip(rows, embeddings):
+            deltas.setdefault(r['batch_id'], BatchProfile()).add_embeddings([e])
+        save_batch_profiles(cur, deltas)
+        # Vectors and profile land together; a crash loses at most the chunks in flight
+        conn.commit()
+        cur.close()
+    vector_backend.update([r['tender_id'] for r in rows], embeddings)
+    PIPELINE_ROWS.inc(len(rows), operation='backfill')
+    stats.record_chunk(len(rows), chunk_stats)
+
+def run_embedding_backfill(workers=BACKFILL_WORKERS, threads=BACKFILL_THREADS_PER_WORKER,
+                           chunk_rows=BACKFILL_CHUNK_ROWS, progress=None):
+    # Encodes every cleaned_tenders row with a NULL embedding on a pool of
+    # processes. Each chunk is committed on its own, so rerunning after a crash
+    # simply picks up the rows that are still NULL.
+    with get_db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*) FROM cleaned_tenders WHERE embedding IS NULL")
+        stats = BackfillStats(cur.fetchone()[0])
+        cur.close()
+    if not stats.pending:
+        return stats.as_dict()
+    version_id = active_embedding_version['id']
+    
+    # spawn, not fork: forking a process that already initialised torch threads can deadlock
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_backfill_worker,
+                             initargs=(threads, model_provider.model_name, model_provider.dim)) as pool:
+        def encoder(texts):
+            pid, vectors, seconds = pool.submit(_backfill_encode, texts, EMBEDDING_BATCH_SIZE).result()
+            stats.record_worker(pid, len(texts), seconds)
+            return vectors
+        
+        # One writer thread per process keeps every worker busy; the window of
+        # in-flight chunks bounds memory
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='backfill') as writers:
+            in_flight = set()
+            for rows in iter_unembedded_chunks(chunk_rows):
+                if len(in_flight) >= workers * 2:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                        if progress:
+                            progress(stats.as_dict())
+                in_flight.add(writers.submit(backfill_chunk, rows, encoder, stats, version_id))
+            for future in in_flight:
+                future.result()
+    
+    search_result_cache.clear()
+    return stats.as_dict()
+
+# -- Embedding versions ----------------------------------------------------
+# Each model is one embedding_versions row. The 'active' one owns
+# cleaned_tenders.embedding; a successor moves through PENDING_VERSION_STATES
+# while it fills the embedding_next shadow column, and becomes active in one
+# transaction that swaps the columns. At most one version is pending.
+PENDING_VERSION_STATES = ('loading', 'backfilling', 'indexing', 'ready')
+SHADOW_COLUMN = 'embedding_next'
+SHADOW_INDEX_NAME = 'cleaned_tenders_embedding_next_idx'
+SHADOW_PENDING_INDEX_NAME = 'cleaned_tenders_embedding_next_pending_idx'
+SHADOW_TRIGGER = 'cleaned_tenders_embedding_next_reset'
+# How long the switch may wait for readers of cleaned_tenders before it backs
+# off and retries; searches queue behind it meanwhile
+SWITCH_LOCK_TIMEOUT = '5s'
+
+def column_type(cur, table, column):
+    cur.execute("""
+        SELECT format_type(atttypid, atttypmod) AS column_type FROM pg_attribute
+        WHERE attrelid = %s::regclass AND attname = %s AND NOT attisdropped
+    """, (table, column))
+    row = cur.fetchone()
+    if not row:
+        return None
+    return row['column_type'] if isinstance(row, dict) else row[0]
+
+@contextmanager
+def autocommit(conn):
+    # For statements that cannot run in a transaction (CREATE INDEX CONCURRENTLY)
+    conn.commit()
+    conn.autocommit = True
+    try:
+        yield
+    finally:
+        conn.autocommit = False
+
+def seed_embedding_version(cur):
+    # A database from before versioning gets an active row for what its
+    # embedding column already holds: the configured model at the column's size
+    cur.execute("SELECT * FROM embedding_versions WHERE status = 'active'")
+    version = cur.fetchone()
+    if version is None:
+        declared = column_type(cur, 'cleaned_tenders', 'embedding') or ''
+        dim = int(declared[len('vector('):-1]) if declared.startswith('vector(') else EMBEDDING_DIM
+        cur.execute("""
+            INSERT INTO embedding_versions (model_name, dim, status, activated_at)
+            VALUES (%s, %s, 'active', CURRENT_TIMESTAMP)
+            RETURNING *
+        """, (EMBEDDING_MODEL_NAME, dim))
+        version = cur.fetchone()
+    elif version['model_name'] != EMBEDDING_MODEL_NAME:
+        logging.warning(f"EMBEDDING_MODEL_NAME is {EMBEDDING_MODEL_NAME} but the active embedding version is "
+                        f"{version['model_name']}; serving the active version. Change models through "
+                        "POST /api/embedding-versions")
+    return version
+
+# The active version this process serves. Writers of the embedding column
+# re-check it under a share lock (lock_embedding_version) and search re-reads
+# it at most every EMBEDDING_VERSION_CHECK_SECONDS, so a switch made by another
+# process is picked up without a restart.
+active_embedding_version = None
+_embedding_version_lock = threading.Lock()
+_embedding_version_checked_at = 0.0
+
+def adopt_embedding_version(version, provider=None):
+    global model_provider, active_embedding_version
+    with _embedding_version_lock:
+        previous = active_embedding_version
+        if previous is not None and previous['id'] == version['id']:
+            return
+        if (model_provider.model_name, model_provider.dim) != (version['model_name'], version['dim']):
+            if provider is None and reembedder is not None and reembedder.version_id == version['id']:
+                provider = reembedder.provider
+            onnx_file = EMBEDDING_ONNX_FILE if version['model_name'] == EMBEDDING_MODEL_NAME else None
+            model_provider = provider or EmbeddingModelProvider(version['model_name'], EMBEDDING_DEVICE,
+                                                                EMBEDDING_BACKEND, onnx_file, dim=version['dim'])
+            if EMBEDDING_MODEL_LOAD != 'lazy':
+                model_provider.start_warmup()
+        active_embedding_version = dict(version)
+    if previous is None:
+        return
+    logging.info(f"Switched embedding version {previous['id']} ({previous['model_name']}) -> "
+                 f"{version['id']} ({version['model_name']})")
+    query_embedding_cache.clear()
+    search_result_cache.clear()
+    # The NumPy store is keyed to its model and resets itself when reopened
+    if VECTOR_SEARCH_BACKEND == 'numpy':
+        init_vector_backend()
+
+def load_active_embedding_version():
+    # For scripts that import this module without running the startup event
+    with get_db_connection() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute("SELECT * FROM embedding_versions WHERE status = 'active'")
+        version = cur.fetchone()
+        cur.close()
+    if version:
+        adopt_embedding_version(version)
+    return version
+
+def lock_embedding_version(cur):
+    # Share-locks the active version for the rest of the caller's transaction:
+    # a switch waits until vectors encoded with the current model are
+    # committed, and one that already happened is adopted before anything is
+    # encoded. Returns the active version.
+    while True:
+        cur.execute("SELECT * FROM embedding_versions WHERE status = 'active' FOR SHARE")
+        version = cur.fetchone()
+        # Empty only after waiting on a switch; the next statement sees the new row
+        if version:
+            break
+    if version['id'] != active_embedding_version['id']:
+        adopt_embedding_version(version)
+    return version
+
+def check_embedding_version():
+    global _embedding_version_checked_at
+    now = time.monotonic()
+    if now - _embedding_version_checked_at < EMBEDDING_VERSION_CHECK_SECONDS:
+        return
+    _embedding_version_checked_at = now
+    with get_db_connection() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute("SELECT * FROM embedding_versions WHERE status = 'active'")
+        version = cur.fetchone()
+        cur.close()
+    if version and version['id'] != active_embedding_version['id']:
+        adopt_embedding_version(version)
+
+def set_embedding_version_status(version_id, status, error=None):
+    # Only a pending version moves; a cancelled or activated one stays put
+    with get_db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"""
+            UPDATE embedding_versions SET status = %s, error = %s, updated_at = CURRENT_TIMESTAMP
+            WHERE id = %s AND status IN {PENDING_VERSION_STATES}
+        """, (status, error, version_id))
+        conn.commit()
+        cur.close()
+
+def drop_shadow_column(cur):
+    # Checked first: the ALTER would take an exclusive lock on the table even as a no-op
+    if column_type(cur, 'cleaned_tenders', SHADOW_COLUMN) is None:
+        return
+    cur.execute(f"DROP TRIGGER IF EXISTS {SHADOW_TRIGGER} ON cleaned_tenders")
+    cur.execute(f"ALTER TABLE cleaned_tenders DROP COLUMN {SHADOW_COLUMN}")
+
+def fill_shadow_embeddings(cur, rows, provider, stats):
+    # rows: (id, description, description_md5). A description that changed
+    # since it was read does not match its md5 and is left for the next pass.
+    encoder = functools.partial(encode_texts, provider=provider)
+    embeddings = embed_texts(cur, [r['description'] for r in rows], stats, encoder=encoder, provider=provider)
+    execute_values(cur, f"""
+        UPDATE cleaned_tenders t SET {SHADOW_COLUMN} = v.embedding::vector
+        FROM (VALUES %s) AS v(id, description_md5, embedding)
+        WHERE t.id = v.id AND t.{SHADOW_COLUMN} IS NULL AND md5(coalesce(t.description, '')) = v.description_md5
+    """, [(r['id'], r['description_md5'], vector_literal(e)) for r, e in zip(rows, embeddings)], page_size=len(rows))
+    return cur.rowcount
+
+SHADOW_ROWS_SQL = f"""
+    SELECT id, description, md5(coalesce(description, '')) AS description_md5 FROM cleaned_tenders
+    WHERE {SHADOW_COLUMN} IS NULL AND id > %s
+    ORDER BY id
+    LIMIT %s
+"""
+
+def activate_embedding_version(version_id, provider, max_catch_up=REEMBED_BATCH_ROWS * 4):
+    # The switch. Locking the version rows pauses the writers of the active
+    # column (see lock_embedding_version); the few rows they changed since the
+    # last backfill pass are encoded, then embedding_next replaces embedding
+    # in one transaction, so a search sees either the old column and index or
+    # the new ones. Returns False when the caller should run another backfill
+    # pass first (too many rows behind, or readers held the table too long).
+    started = time.perf_counter()
+    with get_db_connection() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute("SELECT * FROM embedding_versions WHERE status = 'active' OR id = %s ORDER BY id FOR UPDATE",
+                    (version_id,))
+        version = next((v for v in cur.fetchall() if v['id'] == version_id), None)
+        if not version or version['status'] != 'ready':
+            raise ValueError(f"Embedding version {version_id} is not ready to activate")
+        
+        cur.execute(f"""
+            SELECT id, description, md5(coalesce(description, '')) AS description_md5 FROM cleaned_tenders
+            WHERE {SHADOW_COLUMN} IS NULL AND embedding IS NOT NULL
+            LIMIT %s
+        """, (max_catch_up + 1,))
+        rows = cur.fetchall()
+        if len(rows) > max_catch_up:
+            conn.rollback()
+            return False
+        if rows:
+            fill_shadow_embeddings(cur, rows, provider, EmbeddingStats())
+        
+        cur.execute("SELECT set_config('lock_timeout', %s, true)", (SWITCH_LOCK_TIMEOUT,))
+        try:
+            cur.execute("LOCK TABLE cleaned_tenders IN ACCESS EXCLUSIVE MODE")
+        except psycopg2.OperationalError as e:
+            if e.pgcode != '55P03':
+                raise
+            conn.rollback()
+            return False
+        # Rows cleaned without a vector (deferred embedding) switch as NULL and
+        # are left to the embedding backfill
+        cur.execute(f"SELECT EXISTS (SELECT 1 FROM cleaned_tenders WHERE {SHADOW_COLUMN} IS NULL "
+                    "AND embedding IS NOT NULL) AS behind")
+        if cur.fetchone()['behind']:
+            conn.rollback()
+            return False
+        
+        cur.execute(f"DROP TRIGGER IF EXISTS {SHADOW_TRIGGER} ON cleaned_tenders")
+        # Takes the old ANN index and the partial indexes on embedding with it
+        cur.execute("ALTER TABLE cleaned_tenders DROP COLUMN embedding")
+        cur.execute(f"ALTER TABLE cleaned_tenders RENAME COLUMN {SHADOW_COLUMN} TO embedding")
+        cur.execute(f"ALTER INDEX IF EXISTS {SHADOW_INDEX_NAME} RENAME TO {VECTOR_INDEX_NAME}")
+        # After the rename its predicate is "embedding IS NULL": the backfill queue
+        cur.execute(f"ALTER INDEX {SHADOW_PENDING_INDEX_NAME} RENAME TO cleaned_tenders_unembedded_idx")
+        cur.execute("TRUNCATE tender_neighbours")
+        # Drift baselines restart with the new model; value and category history is kept
+        cur.execute("""
+            UPDATE batch_profiles SET model_name = %s, embedding_count = 0,
+                embedding_sum = NULL, embedding_sq_sum = NULL, updated_at = CURRENT_TIMESTAMP
+        """, (version['model_name'],))
+        cur.execute("UPDATE embedding_versions SET status = 'retired', updated_at = CURRENT_TIMESTAMP "
+                    "WHERE status = 'active'")
+        cur.execute("""
+            UPDATE embedding_versions SET status = 'active', error = NULL,
+                activated_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+            WHERE id = %s
+            RETURNING *
+        """, (version_id,))
+        version = cur.fetchone()
+        conn.commit()
+        cur.close()
+    OPERATION_SECONDS.observe(time.perf_counter() - started, operation='embedding_switch')
+    adopt_embedding_version(version, provider)
+    return True
+
+def finish_embedding_switch(chunk_rows=10000):
+    # Outside the switch so it stays short: recreate the watermark indexes the
+    # old column took with it and send every row back through the neighbour
+    # stage. Near-duplicate checks already made are kept.
+    with get_db_connection() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        with autocommit(conn):
+            cur.execute("""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS cleaned_tenders_near_dup_pending_idx ON cleaned_tenders (id)
+                WHERE near_dup_checked_at IS NULL AND embedding IS NOT NULL
+            """)
+            cur.execute("""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS cleaned_tenders_neighbours_pending_idx ON cleaned_tenders (id)
+                WHERE neighbours_at IS NULL AND embedding IS NOT NULL
+            """)
+        last_id = ''
+        while True:
+            cur.execute("""
+                UPDATE cleaned_tenders SET neighbours_at = NULL
+                WHERE id IN (SELECT id FROM cleaned_tenders WHERE id > %s ORDER BY id LIMIT %s)
+                RETURNING id
+            """, (last_id, chunk_rows))
+            ids = [row['id'] for row in cur.fetchall()]
+            conn.commit()
+            if not ids:
+                break
+            last_id = max(ids)
+        cur.close()
+
+class EmbeddingReembedder:
+    # Rolls a pending version out while search keeps serving the active one:
+    # load the model, add the shadow column, fill it in throttled batches,
+    # build its ANN index concurrently, then switch. Every step is resumable,
+    # so a restart carries on from the version's status. One runs per
+    # database at a time (session advisory lock).
+    def __init__(self, version_id, activate=REEMBED_AUTO_SWITCH):
+        self.version_id = version_id
+        self.activate = activate
+        self.provider = None
+        self.stats = EmbeddingStats()
+        self.rows = 0
+        self.started = time.perf_counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name=f'reembed-{self.version_id}', daemon=True)
+        self._thread.start()
+
+    def cancel(self, timeout=60):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def run(self):
+        try:
+            with get_db_connection() as conn:
+                cur = conn.cursor(cursor_factory=RealDictCursor)
+                cur.execute("SELECT pg_try_advisory_lock(hashtext('embedding_reembed')) AS locked")
+                if not cur.fetchone()['locked']:
+                    logging.info(f"Embedding version {self.version_id} is being rolled out by another process")
+                    return
+                try:
+                    self._run(conn, cur)
+                finally:
+                    conn.rollback()
+                    cur.execute("SELECT pg_advisory_unlock(hashtext('embedding_reembed'))")
+                    conn.commit()
+                    cur.close()
+        except Exception as e:
+            logging.error(f"Re-embedding for embedding version {self.version_id} failed: {str(e)}")
+            set_embedding_version_status(self.version_id, 'failed', error=str(e))
+
+    def _set(self, conn, cur, status, **values):
+        assignments = ''.join(f", {column} = %({column})s" for column in values)
+        cur.execute(f"UPDATE embedding_versions SET status = %(status)s, updated_at = CURRENT_TIMESTAMP{assignments} "
+                    "WHERE id = %(id)s", {'status': status, 'id': self.version_id, **values})
+        conn.commit()
+
+    def _run(self, conn, cur):
+        cur.execute("SELECT * FROM embedding_versions WHERE id = %s", (self.version_id,))
+        version = cur.fetchone()
+        if not version or version['status'] not in PENDING_VERSION_STATES:
+            return
+        status = version['status']
+        self.provider = EmbeddingModelProvider(version['model_name'], EMBEDDING_DEVICE, EMBEDDING_BACKEND,
+                                               dim=version['dim'])
+        self.provider.get()
+        
+        if status == 'loading':
+            with autocommit(conn):
+                cur.execute(f"ALTER TABLE cleaned_tenders ADD COLUMN IF NOT EXISTS {SHADOW_COLUMN} "
+                            f"vector({self.provider.dim})")
+                cur.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {SHADOW_PENDING_INDEX_NAME} "
+                            f"ON cleaned_tenders (id) WHERE {SHADOW_COLUMN} IS NULL")
+                # An edited description invalidates the shadow vector written for it
+                cur.execute(f"""
+                    CREATE OR REPLACE FUNCTION {SHADOW_TRIGGER}() RETURNS trigger AS $$
+                    BEGIN
+                        NEW.{SHADOW_COLUMN} := NULL;
+                        RETURN NEW;
+                    END
+                    $$ LANGUAGE plpgsql
+                """)
+                cur.execute(f"DROP TRIGGER IF EXISTS {SHADOW_TRIGGER} ON cleaned_tenders")
+                cur.execute(f"""
+                    CREATE TRIGGER {SHADOW_TRIGGER} BEFORE UPDATE OF description ON cleaned_tenders
+                    FOR EACH ROW WHEN (OLD.description IS DISTINCT FROM NEW.description)
+                    EXECUTE FUNCTION {SHADOW_TRIGGER}()
+                """)
+            status = 'backfilling'
+            self._set(conn, cur, status, dim=self.provider.dim)
+        
+        if status == 'backfilling':
+            if not self._backfill(conn, cur):
+                return
+            status = 'indexing'
+            self._set(conn, cur, status)
+        
+        if status == 'indexing':
+            self._build_index(conn, cur)
+            status = 'ready'
+            self._set(conn, cur, status)
+        
+        if not self.activate:
+            logging.info(f"Embedding version {self.version_id} is ready; activate it with "
+                         f"POST /api/embedding-versions/{self.version_id}/activate")
+            return
+        # Rows keep arriving during the index build; catch up until the switch fits
+        while not activate_embedding_version(self.version_id, self.provider):
+            if not self._backfill(conn, cur):
+                return
+        finish_embedding_switch()
+
+    def _backfill(self, conn, cur):
+        # Keyset passes over the rows without a shadow vector until none are
+        # left; rows edited mid-pass are reset by the trigger and caught by the
+        # next pass. Returns False when cancelled.
+        last_id = None
+        while not self._stop.is_set():
+            if last_id is None:
+                cur.execute(f"SELECT COUNT(*) AS pending FROM cleaned_tenders WHERE {SHADOW_COLUMN} IS NULL")
+                pending = cur.fetchone()['pending']
+                cur.execute("UPDATE embedding_versions SET rows_total = rows_done + %s WHERE id = %s",
+                            (pending, self.version_id))
+                conn.commit()
+                last_id = ''
+            started = time.perf_counter()
+            cur.execute(SHADOW_ROWS_SQL, (last_id, REEMBED_BATCH_ROWS))
+            rows = cur.fetchall()
+            if not rows:
+                if not pending:
+                    # Nothing of ours may hold cleaned_tenders when the switch locks it
+                    conn.commit()
+                    return True
+                last_id = None
+                continue
+            last_id = rows[-1]['id']
+            with OPERATION_SECONDS.time(operation='reembed_batch'):
+                written = fill_shadow_embeddings(cur, rows, self.provider, self.stats)
+                self.rows += written
+                cur.execute("""
+                    UPDATE embedding_versions SET rows_done = rows_done + %s, rows_per_sec = %s,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE id = %s
+                """, (written, round(self.rows / (time.perf_counter() - self.started), 1), self.version_id))
+                conn.commit()
+            PIPELINE_ROWS.inc(written, operation='reembed')
+            if REEMBED_MAX_ROWS_PER_SEC > 0:
+                self._stop.wait(max(0, len(rows) / REEMBED_MAX_ROWS_PER_SEC - (time.perf_counter() - started)))
+        conn.commit()
+        return False
+
+    def _build_index(self, conn, cur):
+        # Same type, storage and build parameters as the live index
+        index = describe_vector_index(cur)
+        if not index or index['type'] == 'other':
+            return
+        definition = index['definition']
+        options = definition.rsplit('WITH (', 1)[1].rstrip(')') if 'WITH (' in definition else ''
+        params = {key.strip(): int(value.strip().strip("'"))
+                  for key, value in (option.split('=') for option in options.split(',') if '=' in option)
+                  if key.strip() in ('m', 'ef_construction', 'lists')}
+        started = time.perf_counter()
+        with autocommit(conn):
+            # A build interrupted by a restart leaves an invalid index behind
+            cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {SHADOW_INDEX_NAME}")
+            cur.execute(vector_index_sql(index['type'], column=SHADOW_COLUMN, name=SHADOW_INDEX_NAME,
+                                         storage=index['storage'], dim=self.provider.dim, concurrently=True,
+                                         **params))
+        logging.info(f"Built shadow index {SHADOW_INDEX_NAME} in {time.perf_counter() - started:.1f}s")
+
+    def status(self):
+        elapsed = time.perf_counter() - self.started
+        return {"version_id": self.version_id, "running": self.running, "rows_written": self.rows,
+                "rows_per_sec": round(self.rows / elapsed, 1) if elapsed > 0 else None,
+                "embedding": self.stats.as_dict()}
+
+# The rollout running in this process, if any
+reembedder = None
+
+def start_reembedder(version_id, activate=REEMBED_AUTO_SWITCH):
+    global reembedder
+    if reembedder is not None and reembedder.running:
+        if reembedder.version_id == version_id:
+            reembedder.activate = reembedder.activate or activate
+            return reembedder
+        reembedder.cancel()
+    reembedder = EmbeddingReembedder(version_id, activate)
+    reembedder.start()
+    return reembedder
+
+def resume_embedding_version():
+    # A rollout interrupted by a restart carries on; 'ready' waits to be activated
+    with get_db_connection() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute("SELECT id FROM embedding_versions WHERE status IN ('loading', 'backfilling', 'indexing')")
+        version = cur.fetchone()
+        cur.close()
+    if version:
+        start_reembedder(version['id'])
+    return version
+
+def refresh_tender_neighbours(k=SIMILAR_TENDERS_K, candidates=SIMILAR_TENDERS_CANDIDATES,
+                              max_rows=SIMILAR_TENDERS_MAX_ROWS, chunk_rows=1000):
+    # Places every row whose vector is new or changed (neighbours_at IS NULL)
+    # into tender_neighbours, touching only what it affects:
+    #   - its own list, from one LATERAL ANN probe;
+    #   - lists that referenced its old vector, recomputed whole;
+    #   - the lists of its probed candidates it now outranks, trimmed back to k.
+    # Returns the number of rows placed; the rest wait for the next call.
+    probe_sql = vector_candidates_sql('cleaned_tenders', " AND id <> t.id AND vector_norm(embedding) > 0",
+                                      't.embedding', '%(candidates)s', columns='id')
+    candidates = max(candidates, k)
+    refreshed = 0
+    with get_db_connection() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        while refreshed < max_rows:
+            started = time.perf_counter()
+            # Refreshers update each other's lists; one at a time avoids deadlocks
+            cur.execute("SELECT pg_advisory_xact_lock(hashtext('tender_neighbours'))")
+            apply_search_tuning(cur, first_stage_limit(candidates, 'cleaned_tenders'), filtered=True)
+            cur.execute("""
+                SELECT id FROM cleaned_tenders
+                WHERE neighbours_at IS NULL AND embedding IS NOT NULL
+                ORDER BY id
+                LIMIT %s
+            """, (min(chunk_rows, max_rows - refreshed),))
+            ids = [row['id'] for row in cur.fetchall()]
+            if not ids:
+                break
+            
+            cur.execute("DELETE FROM tender_neighbours WHERE neighbour_id = ANY(%(ids)s) AND NOT id = ANY(%(ids)s) "
+                        "RETURNING id", {'ids': ids})
+            owners = ids + sorted({row['id'] for row in cur.fetchall()})
+            cur.execute(f"""
+                SELECT t.id, n.id AS neighbour_id, n.similarity
+                FROM cleaned_tenders t
+                CROSS JOIN LATERAL (
+                    {probe_sql}
+                ) n
+                WHERE t.id = ANY(%(owners)s) AND vector_norm(t.embedding) > 0
+            """, {'owners': owners, 'candidates': candidates})
+            probes = {}
+            for row in cur.fetchall():
+                probes.setdefault(row['id'], []).append((row['neighbour_id'], float(row['similarity'])))
+            
+            cur.execute("DELETE FROM tender_neighbours WHERE id = ANY(%s)", (owners,))
+            own = [(owner, neighbour, similarity) for owner, hits in probes.items()
+                   for neighbour, similarity in sorted(hits, key=lambda hit: -hit[1])[:k]]
+            if own:
+                execute_values(cur, "INSERT INTO tender_neighbours (id, neighbour_id, similarity) VALUES %s", own,
+                               page_size=len(own))
+            
+            # Similarity is symmetric: a new row enters a candidate's list when
+            # it beats that list's current k-th entry
+            reverse = sorted({(neighbour, owner, similarity) for owner in ids
+                              for neighbour, similarity in probes.get(owner, [])})
+            if reverse:
+                execute_values(cur, f"""
+                    INSERT INTO tender_neighbours (id, neighbour_id, similarity)
+                    SELECT v.id, v.neighbour_id, v.similarity
+                    FROM (VALUES %s) AS v(id, neighbour_id, similarity)
+                    LEFT JOIN LATERAL (
+                        SELECT similarity FROM tender_neighbours
+                        WHERE id = v.id
+                        ORDER BY similarity DESC
+                        OFFSET {int(k) - 1} LIMIT 1
+                    ) kth ON true
+                    WHERE kth.similarity IS NULL OR v.similarity > kth.similarity
+                    ON CONFLICT (id, neighbour_id) DO UPDATE SET similarity = EXCLUDED.similarity
+                """, reverse, page_size=len(reverse))
+                cur.execute("""
+                    DELETE FROM tender_neighbours x
+                    USING (
+                        SELECT id, neighbour_id,
+                               row_number() OVER (PARTITION BY id ORDER BY similarity DESC, neighbour_id) AS rank
+                        FROM tender_neighbours
+                        WHERE id = ANY(%(affected)s)
+                    ) r
+                    WHERE x.id = r.id AND x.neighbour_id = r.neighbour_id AND r.rank > %(k)s
+                """, {'affected': sorted({neighbour for neighbour, _, _ in reverse}), 'k': k})
+            
+            cur.execute("UPDATE cleaned_tenders SET neighbours_at = CURRENT_TIMESTAMP WHERE id = ANY(%s)", (ids,))
+            conn.commit()
+            refreshed += len(ids)
+            OPERATION_SECONDS.observe(time.perf_counter() - started, operation='neighbours_chunk')
+            PIPELINE_ROWS.inc(len(ids), operation='neighbours')
+        cur.close()
+    return refreshed
+
+class QualityRule:
+    # A rule contributes aggregate expressions to the shared scan over
+    # cleaned_tenders and turns the results into at most one log entry.
+    check_type = None
+    severity = 'low'
+
+    def aggregates(self):
+        return {}
+
+    def evaluate(self, cur, stats):
+        return None
+
+class NullRatioRule(QualityRule):
+    check_type = 'null_check'
+
+    def __init__(self, column, max_ratio=0.0, severity='high', message=None):
+        self.column = column
+        self.max_ratio = max_ratio
+        self.severity = severity
+        self.message = message or f"Missing {column} values detected"
+
+    def aggregates(self):
+        return {f"null_{self.column}": f"COUNT(*) FILTER (WHERE {self.column} IS NULL OR {self.column}::text = '')"}
+
+    def evaluate(self, cur, stats):
+        null_count = stats[f"null_{self.column}"]
+        total = stats['total']
+        if null_count == 0 or null_count / total <= self.max_ratio:
+            return None
+        return self.message, {'column': self.column, 'null_count': null_count,
+                              'percentage': round((null_count / total) * 100, 2)}, null_count
+
+class DuplicateIdRule(QualityRule):
+    # tender_id is unique in cleaned_tenders, where the clean stage keeps the
+    # last copy of a repeated ID, so duplicates only show in the batch's raw rows
+    check_type = 'duplicate_check'
+    severity = 'medium'
+    MAX_LOGGED_IDS = 100
+
+    def evaluate(self, cur, stats):
+        if not stats['batch_id']:
+            return None
+        cur.execute("""
+            SELECT tender_id, COUNT(*) AS copies FROM raw_tenders
+            WHERE batch_id = %s AND tender_id IS NOT NULL AND tender_id <> ''
+            GROUP BY tender_id HAVING COUNT(*) > 1
+            ORDER BY copies DESC, tender_id
+        """, (stats['batch_id'],))
+        duplicates = cur.fetchall()
+        if not duplicates:
+            return None
+        return ('Duplicate tender IDs found',
+                {'batch_id': stats['batch_id'], 'duplicate_count': len(duplicates),
+                 'duplicate_ids': [row['tender_id'] for row in duplicates[:self.MAX_LOGGED_IDS]]},
+                len(duplicates))
+
+class ValueThresholdRule(QualityRule):
+    check_type = 'outlier_check'
+
+    def __init__(self, threshold=1000000000):
+        self.threshold = threshold
+
+    def aggregates(self):
+        return {'value_outliers': f"COUNT(*) FILTER (WHERE value > {float(self.threshold)})"}
+
+    def evaluate(self, cur, stats):
+        outliers = stats['value_outliers']
+        if outliers == 0:
+            return None
+        return 'High value outliers detected', {'outlier_count': outliers, 'threshold': self.threshold}, outliers
+
+class SchemaRule(QualityRule):
+    check_type = 'schema_check'
+    severity = 'medium'
+    CONDITIONS = {
+        'negative_value': "value < 0",
+        'deadline_before_published': "deadline < published_date",
+        'invalid_currency': "currency IS NULL OR currency !~ '^[A-Z]{3}$'",
+        'missing_dates': "published_date IS NULL OR deadline IS NULL"
+    }
+
+    def aggregates(self):
+        return {f"schema_{name}": f"COUNT(*) FILTER (WHERE {condition})" for name, condition in self.CONDITIONS.items()}
 
-POSTGRES_URL = os.environ.get('POSTGRES_URL')
-model = SentenceTransformer('all-MiniLM-L6-v2')
+    def evaluate(self, cur, stats):
+        violations = {name: stats[f"schema_{name}"] for name in self.CONDITIONS if stats[f"schema_{name}"]}
+        if not violations:
+            return None
+        return 'Schema/type violations detected', {'violations': violations}, max(violations.values())
 
-def get_db_connection():
-    conn = psycopg2.connect(POSTGRES_URL)
-    return conn
+class CategoryValueOutlierRule(QualityRule):
+    # Scores the batch's rows against the per-category mean and standard
+    # deviation kept in category_value_stats by the clean stage, so an ingest
+    # run costs as much as the batch. A run without a batch (validate,
+    # rebuild) scores every row in one pass against the same moments.
+    check_type = 'category_outlier_check'
 
-def init_database():
-    conn = get_db_connection()
-    cur = conn.cursor()
-    
-    cur.execute("CREATE EXTENSION IF NOT EXISTS vector")
-    
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS raw_tenders (
-            id TEXT PRIMARY KEY,
-            tender_id TEXT,
-            title TEXT,
-            description TEXT,
-            organization TEXT,
-            category TEXT,
-            value NUMERIC,
-            currency TEXT,
-            published_date TEXT,
-            deadline TEXT,
-            location TEXT,
-            status TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS cleaned_tenders (
-            id TEXT PRIMARY KEY,
-            tender_id TEXT UNIQUE,
-            title TEXT,
-            description TEXT,
-            organization TEXT,
-            category TEXT,
-            value NUMERIC,
-            currency TEXT,
-            published_date DATE,
-            deadline DATE,
-            location TEXT,
-            status TEXT,
-            embedding vector(384),
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS data_quality_logs (
-            id TEXT PRIMARY KEY,
-            check_type TEXT,
-            severity TEXT,
-            message TEXT,
-            details JSONB,
-            record_count INTEGER,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS pipeline_health (
-            id TEXT PRIMARY KEY,
-            status TEXT,
-            total_records INTEGER,
-            clean_records INTEGER,
-            quality_score NUMERIC,
-            last_ingestion TIMESTAMP,
-            errors JSONB,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    
-    conn.commit()
-    cur.close()
-    conn.close()
+    def __init__(self, z_threshold=3.0, min_group_size=10):
+        self.z_threshold = z_threshold
+        self.min_group_size = min_group_size
 
-class TenderResponse(BaseModel):
-    id: str
-    tender_id: str
-    title: str
-    description: str
-    organization: str
-    category: str
-    value: float
-    currency: str
-    published_date: str
-    deadline: str
-    location: str
-    status: str
+    def evaluate(self, cur, stats):
+        batch_filter = "AND t.batch_id = %(batch_id)s" if stats['batch_id'] else ""
+        cur.execute(f"""
+            WITH moments AS (
+                SELECT category, value_sum / value_count AS mean,
+                       sqrt(greatest(value_sq_sum / value_count - (value_sum / value_count) ^ 2, 0)) AS stddev
+                FROM category_value_stats
+                WHERE value_count >= %(min_group_size)s
+            )
+            SELECT m.category, COUNT(*) AS outliers
+            FROM cleaned_tenders t
+            JOIN moments m ON m.category = COALESCE(t.category, '')
+            WHERE t.value IS NOT NULL AND m.stddev > 0 AND ABS(t.value - m.mean) > %(z)s * m.stddev {batch_filter}
+            GROUP BY m.category
+        """, {'min_group_size': self.min_group_size, 'z': self.z_threshold, 'batch_id': stats['batch_id']})
+        by_category = {row['category']: row['outliers'] for row in cur.fetchall()}
+        if not by_category:
+            return None
+        return ('Per-category value outliers detected',
+                {'z_threshold': self.z_threshold, 'outliers_by_category': by_category}, sum(by_category.values()))
 
-class DataQualityLog(BaseModel):
-    check_type: str
-    severity: str
-    message: str
-    details: Dict[str, Any]
-    record_count: int
+class NearDuplicateRule(QualityRule):
+    # Finds tenders republished under a new ID with reworded text. Each row not
+    # yet checked looks up its nearest neighbours through the ANN index (one
+    # LATERAL probe per row, never all pairs), so a run only costs as much as
+    # the rows added since the last one.
+    check_type = 'near_duplicate_check'
+    severity = 'medium'
+    CHUNK_ROWS = 1000
+    MAX_LOGGED_CLUSTERS = 50
 
-class PipelineHealth(BaseModel):
-    status: str
-    total_records: int
-    clean_records: int
-    quality_score: float
-    last_ingestion: Optional[str]
-    errors: Dict[str, Any]
+    def __init__(self, threshold=0.95, neighbours=5, max_rows=100000):
+        self.threshold = threshold
+        self.neighbours = neighbours
+        self.max_rows = max_rows
 
-class SearchRequest(BaseModel):
-    query: str
-    limit: int = 5
+    def evaluate(self, cur, stats):
+        apply_search_tuning(cur, first_stage_limit(self.neighbours, 'cleaned_tenders'), filtered=True)
+        # Zero vectors (very short texts) have no direction; cosine against them is NaN
+        neighbours_sql = vector_candidates_sql('cleaned_tenders', " AND id <> t.id AND vector_norm(embedding) > 0",
+                                               't.embedding', '%(k)s', columns='id, tender_id')
+        pairs, checked = [], 0
+        while checked < self.max_rows:
+            cur.execute("""
+                SELECT id FROM cleaned_tenders
+                WHERE near_dup_checked_at IS NULL AND embedding IS NOT NULL
+                ORDER BY id
+                LIMIT %s
+            """, (min(self.CHUNK_ROWS, self.max_rows - checked),))
+            ids = [row['id'] for row in cur.fetchall()]
+            if not ids:
+                break
+            cur.execute(f"""
+                SELECT t.tender_id, n.tender_id AS neighbour_tender_id, n.similarity
+                FROM cleaned_tenders t
+                CROSS JOIN LATERAL (
+                    {neighbours_sql}
+                ) n
+                WHERE t.id = ANY(%(ids)s) AND vector_norm(t.embedding) > 0 AND n.similarity >= %(threshold)s
+            """, {'ids': ids, 'k': self.neighbours, 'threshold': self.threshold})
+            pairs.extend(cur.fetchall())
+            cur.execute("UPDATE cleaned_tenders SET near_dup_checked_at = CURRENT_TIMESTAMP WHERE id = ANY(%s)",
+                        (ids,))
+            checked += len(ids)
+        
+        clusters = self.clusters(pairs)
+        if not clusters:
+            return None
+        cur.execute("SELECT COUNT(*) AS n FROM cleaned_tenders WHERE near_dup_checked_at IS NULL AND embedding IS NOT NULL")
+        remaining = cur.fetchone()['n']
+        clusters.sort(key=lambda c: len(c['tender_ids']), reverse=True)
+        return ('Near-duplicate tenders detected',
+                {'threshold': self.threshold, 'rows_checked': checked, 'rows_pending': remaining,
+                 'cluster_count': len(clusters), 'clusters': clusters[:self.MAX_LOGGED_CLUSTERS]},
+                sum(len(c['tender_ids']) for c in clusters))
 
-@api_router.get("/")
-async def root():
-    return {"message": "Procurement Intelligence Pipeline API", "version": "1.0.0"}
+    @staticmethod
+    def clusters(pairs):
+        # Union-find over the matched pairs; each component is one cluster
+        parent = {}
 
-@api_router.post("/ingest")
-async def ingest_data(file: UploadFile = File(...)):
-    try:
-        contents = await file.read()
-        df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
+        def find(node):
+            parent.setdefault(node, node)
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        for pair in pairs:
+            parent[find(pair['tender_id'])] = find(pair['neighbour_tender_id'])
+        members, similarities = {}, {}
+        for node in parent:
+            members.setdefault(find(node), []).append(node)
+        for pair in pairs:
+            similarities.setdefault(find(pair['tender_id']), []).append(float(pair['similarity']))
+        return [{'tender_ids': sorted(nodes), 'min_similarity': round(min(similarities[root]), 4),
+                 'max_similarity': round(max(similarities[root]), 4)}
+                for root, nodes in members.items()]
+
+class DriftRule(QualityRule):
+    # Compares the profile of the batch being checked against the merged
+    # profiles of the previous batches, so no history is rescanned.
+    severity = 'medium'
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+
+    def profiles(self, cur, stats):
+        if '_drift_profiles' not in stats:
+            stats['_drift_profiles'] = load_drift_profiles(cur, stats['batch_id']) if stats['batch_id'] else None
+        return stats['_drift_profiles']
+
+    def evaluate(self, cur, stats):
+        profiles = self.profiles(cur, stats)
+        if profiles is None:
+            return None
+        current, baseline, batches = profiles
+        measured = self.measure(current, baseline)
+        if measured is None or measured['score'] <= self.threshold:
+            return None
+        measured.update({'threshold': self.threshold, 'baseline_batches': batches,
+                         'batch_rows': current.row_count, 'baseline_rows': baseline.row_count})
+        return self.message, measured, current.row_count
+
+class EmbeddingDriftRule(DriftRule):
+    check_type = 'embedding_drift'
+    message = 'Embedding distribution drift detected'
+
+    def measure(self, current, baseline):
+        if not current.embedding_count or not baseline.embedding_count:
+            return None
+        a, b = current.centroid(), baseline.centroid()
+        norms = np.linalg.norm(a) * np.linalg.norm(b)
+        if norms == 0:
+            return None
+        distance = 1 - float(np.dot(a, b) / norms)
+        baseline_variance = baseline.mean_variance()
+        variance_ratio = current.mean_variance() / baseline_variance if baseline_variance else None
+        return {'score': round(distance, 4), 'centroid_cosine_distance': round(distance, 4),
+                'variance_ratio': round(variance_ratio, 4) if variance_ratio is not None else None}
+
+class ValueDriftRule(DriftRule):
+    check_type = 'value_drift'
+    message = 'Tender value distribution drift detected'
+    QUANTILES = (0.1, 0.5, 0.9)
+
+    def measure(self, current, baseline):
+        if not current.value_sketch.count or not baseline.value_sketch.count:
+            return None
+        shifts = {}
+        for q in self.QUANTILES:
+            now, before = current.value_sketch.quantile(q), baseline.value_sketch.quantile(q)
+            # Relative shift, symmetric so halving and doubling score the same
+            shifts[f"p{int(q * 100)}"] = {'batch': now, 'baseline': before,
+                                          'shift': abs(now - before) / max(now, before) if max(now, before) else 0.0}
+        score = max(shift['shift'] for shift in shifts.values())
+        return {'score': round(score, 4), 'quantiles': shifts}
+
+class CategoryDriftRule(DriftRule):
+    check_type = 'category_drift'
+    message = 'Category mix drift detected'
+
+    def measure(self, current, baseline):
+        if not current.row_count or not baseline.row_count:
+            return None
+        # Population stability index over the union of categories
+        categories = set(current.category_counts) | set(baseline.category_counts)
+        current_total = sum(current.category_counts.values())
+        baseline_total = sum(baseline.category_counts.values())
+        psi, contributions = 0.0, {}
+        for category in categories:
+            actual = max(current.category_counts.get(category, 0) / current_total, 1e-4)
+            expected = max(baseline.category_counts.get(category, 0) / baseline_total, 1e-4)
+            contributions[category] = (actual - expected) * math.log(actual / expected)
+            psi += contributions[category]
+        top = sorted(contributions.items(), key=lambda item: item[1], reverse=True)[:5]
+        return {'score': round(psi, 4), 'psi': round(psi, 4),
+                'top_categories': {category: round(value, 4) for category, value in top}}
+
+def load_drift_profiles(cur, batch_id):
+    cur.execute("SELECT * FROM batch_profiles WHERE batch_id = %s", (batch_id,))
+    row = cur.fetchone()
+    if not row:
+        return None
+    cur.execute("""
+        SELECT * FROM batch_profiles
+        WHERE batch_id <> %s AND model_name = %s AND created_at < %s
+        ORDER BY created_at DESC LIMIT %s
+    """, (batch_id, row['model_name'], row['created_at'], DRIFT_BASELINE_BATCHES))
+    history = cur.fetchall()
+    if not history:
+        return None
+    baseline = BatchProfile()
+    for previous in history:
+        baseline.merge(BatchProfile.from_row(previous))
+    return BatchProfile.from_row(row), baseline, len(history)
+
+QUALITY_RULES = [
+    NullRatioRule('description', message='Missing descriptions detected'),
+    NullRatioRule('title', max_ratio=0.01, severity='low'),
+    NullRatioRule('organization', max_ratio=0.05, severity='low'),
+    NullRatioRule('category', max_ratio=0.05, severity='low'),
+    DuplicateIdRule(),
+    ValueThresholdRule(),
+    SchemaRule(),
+    CategoryValueOutlierRule(),
+    NearDuplicateRule(NEAR_DUPLICATE_THRESHOLD, NEAR_DUPLICATE_NEIGHBOURS, NEAR_DUPLICATE_MAX_ROWS),
+    EmbeddingDriftRule(DRIFT_EMBEDDING_THRESHOLD),
+    ValueDriftRule(DRIFT_VALUE_THRESHOLD),
+    CategoryDriftRule(DRIFT_CATEGORY_PSI_THRESHOLD),
+]
+
+def register_quality_rule(rule):
+    QUALITY_RULES.append(rule)
+
+def run_data_quality_checks(batch_id=None, trigger='ingest'):
+    started = time.perf_counter()
+    with get_db_connection() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
         
-        conn = get_db_connection()
-        cur = conn.cursor()
+        # Every scalar rule shares a single scan of cleaned_tenders
+        aggregates = {'total': "COUNT(*)"}
+        for rule in QUALITY_RULES:
+            aggregates.update(rule.aggregates())
+        with OPERATION_SECONDS.time(operation='quality_scan'):
+            cur.execute("SELECT " + ', '.join(f"{expression} AS {alias}" for alias, expression in aggregates.items())
+                        + " FROM cleaned_tenders")
+            stats = dict(cur.fetchone(), batch_id=batch_id)
         
-        records_inserted = 0
-        for _, row in df.iterrows():
-            tender_id = str(uuid.uuid4())
-            cur.execute("""
-                INSERT INTO raw_tenders (id, tender_id, title, description, organization, 
-                                       category, value, currency, published_date, deadline, 
-                                       location, status)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                tender_id, row.get('tender_id', tender_id), row.get('title', ''),
-                row.get('description', ''), row.get('organization', ''),
-                row.get('category', ''), float(row.get('value', 0)),
-                row.get('currency', 'USD'), row.get('published_date', ''),
-                row.get('deadline', ''), row.get('location', ''),
-                row.get('status', 'Open')
-            ))
-            records_inserted += 1
+        run_id = str(uuid.uuid4())
+        logs = []
+        if stats['total'] > 0:
+            for rule in QUALITY_RULES:
+                with QUALITY_RULE_SECONDS.time(rule=type(rule).__name__):
+                    outcome = rule.evaluate(cur, stats)
+                if outcome:
+                    message, details, record_count = outcome
+                    logs.append((str(uuid.uuid4()), run_id, rule.check_type, rule.severity, message,
+                                 json.dumps(details), record_count))
+        
+        if logs:
+            execute_values(cur, """
+                INSERT INTO data_quality_logs (id, run_id, check_type, severity, message, details, record_count)
+                VALUES %s
+            """, logs)
+        cur.execute("""
+            INSERT INTO data_quality_runs (id, batch_id, trigger, total_records, issue_count, duration_ms)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, (run_id, batch_id, trigger, stats['total'], len(logs), int((time.perf_counter() - started) * 1000)))
         
         conn.commit()
         cur.close()
-        conn.close()
+    return run_id
+
+def update_pipeline_health():
+    with OPERATION_SECONDS.time(operation='pipeline_health'), get_db_connection() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
         
-        cleaned_count = await clean_and_normalize()
-        await run_data_quality_checks()
-        await update_pipeline_health()
+        counts = read_table_counts(cur)
+        total = counts.get('raw_tenders', 0)
+        clean = counts.get('cleaned_tenders', 0)
         
-        return {
-            "status": "success",
-            "records_ingested": records_inserted,
-            "records_cleaned": cleaned_count,
-            "message": "Data ingested and processed successfully"
-        }
-    except Exception as e:
-        logging.error(f"Ingestion error: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-async def clean_and_normalize():
-    conn = get_db_connection()
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-    
-    cur.execute("SELECT * FROM raw_tenders")
-    raw_records = cur.fetchall()
-    
-    cleaned_count = 0
-    for record in raw_records:
-        try:
-            description = record['description'] or ''
-            if len(description) > 10:
-                embedding = model.encode(description)
-                embedding_list = embedding.tolist()
-            else:
-                embedding_list = [0.0] * 384
-            
-            cur.execute("""
-                INSERT INTO cleaned_tenders 
-                (id, tender_id, title, description, organization, category, value, 
-                 currency, published_date, deadline, location, status, embedding)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (tender_id) DO UPDATE SET
-                    title = EXCLUDED.title,
-                    description = EXCLUDED.description,
-                    embedding = EXCLUDED.embedding
-            """, (
-                record['id'], record['tender_id'], record['title'],
-                record['description'], record['organization'],
-                record['category'], record['value'], record['currency'],
-                record['published_date'] or None, record['deadline'] or None,
-                record['location'], record['status'], embedding_list
-            ))
-            cleaned_count += 1
-        except Exception as e:
-            logging.error(f"Cleaning error for record {record['id']}: {str(e)}")
-            continue
-    
-    conn.commit()
-    cur.close()
-    conn.close()
-    return cleaned_count
-
-async def run_data_quality_checks():
-    conn = get_db_connection()
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-    
-    cur.execute("DELETE FROM data_quality_logs")
-    
-    cur.execute("SELECT COUNT(*) as total FROM cleaned_tenders")
-    total_count = cur.fetchone()['total']
-    
-    cur.execute("SELECT COUNT(*) as null_count FROM cleaned_tenders WHERE description IS NULL OR description = ''")
-    null_desc = cur.fetchone()['null_count']
-    if null_desc > 0:
-        cur.execute("""
-            INSERT INTO data_quality_logs (id, check_type, severity, message, details, record_count)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """, (str(uuid.uuid4()), 'null_check', 'high', 'Missing descriptions detected',
-              json.dumps({'null_count': null_desc, 'percentage': round((null_desc/total_count)*100, 2)}),
-              null_desc))
-    
-    cur.execute("""
-        SELECT tender_id, COUNT(*) as dup_count 
-        FROM cleaned_tenders 
-        GROUP BY tender_id 
-        HAVING COUNT(*) > 1
-    """)
-    duplicates = cur.fetchall()
-    if duplicates:
         cur.execute("""
-            INSERT INTO data_quality_logs (id, check_type, severity, message, details, record_count)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """, (str(uuid.uuid4()), 'duplicate_check', 'medium', 'Duplicate tender IDs found',
-              json.dumps({'duplicate_ids': [d['tender_id'] for d in duplicates]}),
-              len(duplicates)))
-    
-    cur.execute("SELECT COUNT(*) as outliers FROM cleaned_tenders WHERE value > 1000000000")
-    outliers = cur.fetchone()['outliers']
-    if outliers > 0:
+            SELECT COUNT(*) as issues FROM data_quality_logs
+            WHERE severity IN ('high', 'medium')
+              AND run_id = (SELECT id FROM data_quality_runs ORDER BY created_at DESC LIMIT 1)
+        """)
+        issues = cur.fetchone()['issues']
+        
+        quality_score = max(0, 100 - (issues * 10))
+        
+        cur.execute("DELETE FROM pipeline_health")
         cur.execute("""
-            INSERT INTO data_quality_logs (id, check_type, severity, message, details, record_count)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """, (str(uuid.uuid4()), 'outlier_check', 'low', 'High value outliers detected',
-              json.dumps({'outlier_count': outliers}), outliers))
-    
-    conn.commit()
-    cur.close()
-    conn.close()
+            INSERT INTO pipeline_health (id, status, total_records, clean_records, quality_score, 
+                                        last_ingestion, errors)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, (str(uuid.uuid4()), 'healthy' if quality_score > 70 else 'warning',
+              total, clean, quality_score, datetime.now(timezone.utc), json.dumps({'issue_count': issues})))
+        
+        conn.commit()
+        cur.close()
 
-async def update_pipeline_health():
-    conn = get_db_connection()
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-    
-    cur.execute("SELECT COUNT(*) as total FROM raw_tenders")
-    total = cur.fetchone()['total']
-    
-    cur.execute("SELECT COUNT(*) as clean FROM cleaned_tenders")
-    clean = cur.fetchone()['clean']
-    
-    cur.execute("SELECT COUNT(*) as issues FROM data_quality_logs WHERE severity IN ('high', 'medium')")
-    issues = cur.fetchone()['issues']
-    
-    quality_score = max(0, 100 - (issues * 10))
-    
-    cur.execute("DELETE FROM pipeline_health")
-    cur.execute("""
-        INSERT INTO pipeline_health (id, status, total_records, clean_records, quality_score, 
-                                    last_ingestion, errors)
-        VALUES (%s, %s, %s, %s, %s, %s, %s)
-    """, (str(uuid.uuid4()), 'healthy' if quality_score > 70 else 'warning',
-          total, clean, quality_score, datetime.now(timezone.utc), json.dumps({'issue_count': issues})))
-    
-    conn.commit()
-    cur.close()
-    conn.close()
+# Everything the API returns about a tender; the embedding is never read here
+TENDER_COLUMNS = ("id, tender_id, title, description, organization, category, value, currency, "
+                  "published_date, deadline, location, status, created_at")
+EXPORT_FIELDS = ["id", "tender_id", "title", "description", "organization", "category", "value",
+                 "currency", "published_date", "deadline", "location", "status"]
 
-@api_router.get("/tenders", response_model=List[TenderResponse])
-async def get_tenders(limit: int = 50):
-    conn = get_db_connection()
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-    cur.execute(f"SELECT * FROM cleaned_tenders ORDER BY created_at DESC LIMIT {limit}")
-    tenders = cur.fetchall()
-    cur.close()
-    conn.close()
-    
-    return [{
+def tender_row(t):
+    return {
         "id": t['id'],
         "tender_id": t['tender_id'],
         "title": t['title'],
@@ -323,60 +3063,592 @@ async def get_tenders(limit: int = 50):
         "deadline": str(t['deadline']) if t['deadline'] else '',
         "location": t['location'],
         "status": t['status']
-    } for t in tenders]
+    }
 
-@api_router.post("/search")
-async def semantic_search(request: SearchRequest):
+def encode_tender_cursor(row):
+    raw = f"{row['created_at'].isoformat()}|{row['id']}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_tender_cursor(cursor):
     try:
-        query_embedding = model.encode(request.query).tolist()
-        
-        conn = get_db_connection()
+        created_at, tender_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|', 1)
+        return datetime.fromisoformat(created_at), tender_id
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@api_router.get("/tenders", response_model=List[TenderResponse])
+def get_tenders(response: Response, limit: int = Query(50, ge=1), cursor: Optional[str] = None):
+    # Newest first, paged on (created_at, id) so deep pages cost the same as the first.
+    # The cursor for the next page is returned in the X-Next-Cursor header.
+    limit = min(limit, TENDERS_MAX_PAGE_SIZE)
+    params = {'limit': limit + 1}
+    where = ""
+    if cursor:
+        params['created_at'], params['id'] = decode_tender_cursor(cursor)
+        where = "WHERE (created_at, id) < (%(created_at)s, %(id)s)"
+    with get_db_connection() as conn:
         cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute(f"""
+            SELECT {TENDER_COLUMNS} FROM cleaned_tenders {where}
+            ORDER BY created_at DESC, id DESC
+            LIMIT %(limit)s
+        """, params)
+        tenders = cur.fetchall()
+        cur.close()
+    
+    if len(tenders) > limit:
+        tenders = tenders[:limit]
+        response.headers['X-Next-Cursor'] = encode_tender_cursor(tenders[-1])
+    return [tender_row(t) for t in tenders]
+
+def stream_tenders(fmt):
+    # A named (server-side) cursor keeps memory flat however many rows are exported;
+    # rows are pulled EXPORT_FETCH_SIZE at a time and written out as they arrive.
+    with get_db_connection() as conn:
+        cur = conn.cursor(name=f"export_{uuid.uuid4().hex}", cursor_factory=RealDictCursor)
+        cur.itersize = EXPORT_FETCH_SIZE
+        try:
+            cur.execute(f"SELECT {TENDER_COLUMNS} FROM cleaned_tenders ORDER BY created_at DESC, id DESC")
+            if fmt == 'csv':
+                buffer = io.StringIO()
+                writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+                writer.writeheader()
+                for t in cur:
+                    writer.writerow(tender_row(t))
+                    if buffer.tell() >= 65536:
+                        yield buffer.getvalue()
+                        buffer.seek(0)
+                        buffer.truncate()
+                yield buffer.getvalue()
+            else:
+                lines = []
+                for t in cur:
+                    lines.append(json.dumps(tender_row(t)))
+                    if len(lines) >= 500:
+                        yield '\n'.join(lines) + '\n'
+                        lines = []
+                if lines:
+                    yield '\n'.join(lines) + '\n'
+        finally:
+            cur.close()
+            conn.rollback()
+
+@api_router.get("/tenders/export")
+def export_tenders(format: str = Query('ndjson', pattern='^(ndjson|csv)$')):
+    media_type = 'text/csv' if format == 'csv' else 'application/x-ndjson'
+    return StreamingResponse(stream_tenders(format), media_type=media_type,
+                             headers={'Content-Disposition': f'attachment; filename="tenders.{format}"'})
+
+@api_router.get("/tenders/{id}/similar")
+def get_similar_tenders(id: str, limit: int = Query(SIMILAR_TENDERS_K, ge=1)):
+    # Served from tender_neighbours with one indexed read. A tender whose
+    # vector has not been placed yet is answered by probing the index with its
+    # stored embedding; the query text is never re-encoded.
+    limit = min(limit, SIMILAR_TENDERS_K)
+    with get_db_connection() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute("SELECT neighbours_at, embedding IS NOT NULL AS embedded FROM cleaned_tenders WHERE id = %s",
+                    (id,))
+        tender = cur.fetchone()
+        if not tender:
+            cur.close()
+            raise HTTPException(status_code=404, detail="Tender not found")
         
-        cur.execute("""
-            SELECT id, tender_id, title, description, organization, category, 
-                   value, currency, location, status,
-                   1 - (embedding <=> %s::vector) as similarity
-            FROM cleaned_tenders
-            WHERE embedding IS NOT NULL
-            ORDER BY embedding <=> %s::vector
-            LIMIT %s
-        """, (query_embedding, query_embedding, request.limit))
-        
-        results = cur.fetchall()
+        results = []
+        if tender['neighbours_at'] is not None:
+            source = 'precomputed'
+            cur.execute(f"""
+                SELECT {', '.join(f't.{column}' for column in SEARCH_COLUMNS.split(', '))}, n.similarity
+                FROM tender_neighbours n
+                JOIN cleaned_tenders t ON t.id = n.neighbour_id
+                WHERE n.id = %s
+                ORDER BY n.similarity DESC
+                LIMIT %s
+            """, (id, limit))
+            results = cur.fetchall()
+        # Also covers the lists an embedding version switch empties until they are rebuilt
+        if not results and tender['embedded']:
+            source = 'live'
+            apply_search_tuning(cur, first_stage_limit(limit, 'cleaned_tenders'), filtered=True)
+            neighbours_sql = vector_candidates_sql('cleaned_tenders', " AND id <> t.id AND vector_norm(embedding) > 0",
+                                                   't.embedding', '%(limit)s')
+            cur.execute(f"""
+                SELECT n.* FROM cleaned_tenders t
+                CROSS JOIN LATERAL (
+                    {neighbours_sql}
+                ) n
+                WHERE t.id = %(id)s AND vector_norm(t.embedding) > 0
+                ORDER BY n.similarity DESC
+            """, {'id': id, 'limit': limit})
+            results = cur.fetchall()
+        elif not results and tender['neighbours_at'] is None:
+            source = 'pending'
         cur.close()
-        conn.close()
+    
+    return {"id": id, "source": source, "results": [search_result_row(r) for r in results]}
+
+SEARCH_COLUMNS = "id, tender_id, title, description, organization, category, value, currency, location, status"
+
+def build_search_filters(filters):
+    clauses, params = [], {}
+    if filters is None:
+        return '', params
+    for column in ['category', 'organization', 'status', 'location']:
+        value = getattr(filters, column)
+        if value is not None:
+            clauses.append(f"{column} = %(f_{column})s")
+            params[f"f_{column}"] = value
+    for field, clause in [('min_value', "value >= %(f_min_value)s"), ('max_value', "value <= %(f_max_value)s"),
+                          ('deadline_from', "deadline >= %(f_deadline_from)s"),
+                          ('deadline_to', "deadline <= %(f_deadline_to)s")]:
+        value = getattr(filters, field)
+        if value is not None:
+            clauses.append(clause)
+            params[f"f_{field}"] = value
+    return ''.join(f" AND {clause}" for clause in clauses), params
+
+def plan_vector_source(cur, filter_sql, params):
+    # Returns (cte, source, where) for the vector-ordered part of a search.
+    # A selective filter is cheapest as a B-tree lookup followed by exact
+    # distances over the survivors; the materialized CTE keeps the planner from
+    # folding it back into an ANN scan that would post-filter and come up short.
+    if not filter_sql:
+        return [], 'cleaned_tenders', ''
+    cur.execute(f"""
+        SELECT COUNT(*) AS n FROM (
+            SELECT 1 FROM cleaned_tenders WHERE embedding IS NOT NULL{filter_sql} LIMIT %(f_probe_cap)s
+        ) s
+    """, {**params, 'f_probe_cap': SEARCH_EXACT_FILTER_MAX_ROWS + 1})
+    if cur.fetchone()['n'] <= SEARCH_EXACT_FILTER_MAX_ROWS:
+        cte = f"""candidates AS MATERIALIZED (
+            SELECT {SEARCH_COLUMNS}, embedding FROM cleaned_tenders
+            WHERE embedding IS NOT NULL{filter_sql}
+        )"""
+        return [cte], 'candidates', ''
+    return [], 'cleaned_tenders', filter_sql
+
+def with_clause(ctes):
+    return f"WITH {', '.join(ctes)} " if ctes else ''
+
+def run_semantic_search(cur, query_embedding, request):
+    filter_sql, params = build_search_filters(request.filters)
+    ctes, source, source_filter = plan_vector_source(cur, filter_sql, params)
+    vector_limit = request.limit * HYBRID_CANDIDATE_FACTOR if request.hybrid else request.limit
+    apply_search_tuning(cur, first_stage_limit(vector_limit, source), request.ef_search, request.probes,
+                        filtered=bool(source_filter))
+    params.update(qvec=vector_literal(query_embedding), limit=request.limit)
+    
+    if not request.hybrid:
+        cur.execute(f"""
+            {with_clause(ctes)}
+            SELECT * FROM (
+                {vector_candidates_sql(source, source_filter, '%(qvec)s', '%(limit)s')}
+            ) hits
+            ORDER BY similarity DESC
+        """, params)
+        return cur.fetchall()
+    
+    # Hybrid: union the top vector and top full-text candidates, then rank by
+    # a weighted sum of cosine similarity and ts_rank_cd (normalized to 0..1)
+    params.update(qtext=request.query, weight=request.hybrid_weight, candidates=vector_limit)
+    ctes = ctes + [
+        f"""vector_hits AS (
+            {vector_candidates_sql(source, source_filter, '%(qvec)s', '%(candidates)s', columns='id')}
+        )""",
+        f"""text_hits AS (
+            SELECT id, ts_rank_cd(search_tsv, websearch_to_tsquery('english', %(qtext)s), 32) AS text_rank
+            FROM cleaned_tenders
+            WHERE search_tsv @@ websearch_to_tsquery('english', %(qtext)s){filter_sql}
+            ORDER BY text_rank DESC
+            LIMIT %(candidates)s
+        )"""
+    ]
+    cur.execute(f"""
+        {with_clause(ctes)}
+        SELECT {', '.join(f't.{column}' for column in SEARCH_COLUMNS.split(', '))},
+               1 - (t.embedding <=> %(qvec)s::vector) AS similarity,
+               COALESCE(th.text_rank, 0) AS text_rank,
+               %(weight)s * (1 - (t.embedding <=> %(qvec)s::vector))
+                   + (1 - %(weight)s) * COALESCE(th.text_rank, 0) AS score
+        FROM (SELECT id FROM vector_hits UNION SELECT id FROM text_hits) c
+        JOIN cleaned_tenders t ON t.id = c.id
+        LEFT JOIN text_hits th ON th.id = c.id
+        WHERE t.embedding IS NOT NULL
+        ORDER BY score DESC
+        LIMIT %(limit)s
+    """, params)
+    return cur.fetchall()
+
+def search_result_row(r):
+    row = {
+        "id": r['id'],
+        "tender_id": r['tender_id'],
+        "title": r['title'],
+        "description": r['description'] or '',
+        "organization": r['organization'],
+        "category": r['category'],
+        "value": float(r['value']),
+        "currency": r['currency'],
+        "location": r['location'],
+        "status": r['status'],
+        "similarity": round(float(r['similarity']), 3)
+    }
+    if 'score' in r:
+        row['text_rank'] = round(float(r['text_rank']), 3)
+        row['score'] = round(float(r['score']), 3)
+    return row
+
+def run_batch_semantic_search(cur, embeddings, request):
+    # One round trip: each query vector drives its own index-ordered LIMIT
+    # scan (or exact scan over the shared filtered candidates)
+    filter_sql, params = build_search_filters(request.filters)
+    ctes, source, source_filter = plan_vector_source(cur, filter_sql, params)
+    apply_search_tuning(cur, first_stage_limit(request.limit, source), request.ef_search, request.probes,
+                        filtered=bool(source_filter))
+    params.update(qvecs=[vector_literal(e) for e in embeddings], limit=request.limit)
+    cur.execute(f"""
+        {with_clause(ctes)}
+        SELECT q.ord - 1 AS query_index, t.*
+        FROM unnest(%(qvecs)s::text[]) WITH ORDINALITY AS q(vec, ord)
+        CROSS JOIN LATERAL (
+            {vector_candidates_sql(source, source_filter, 'q.vec', '%(limit)s')}
+        ) t
+        ORDER BY q.ord, t.similarity DESC
+    """, params)
+    results = [[] for _ in embeddings]
+    for r in cur.fetchall():
+        results[r['query_index']].append(r)
+    return results
+
+class PgVectorBackend:
+    # The embedding column is the index, so there is nothing to keep in step
+    name = 'pgvector'
+
+    def search(self, cur, query_embedding, request):
+        return run_semantic_search(cur, query_embedding, request)
+
+    def search_batch(self, cur, embeddings, request):
+        return run_batch_semantic_search(cur, embeddings, request)
+
+    def update(self, tender_ids, embeddings):
+        pass
+
+    def status(self):
+        return {"backend": self.name}
+
+class NumpyVectorBackend(PgVectorBackend):
+    # Nearest neighbours come from a NumpyVectorStore keyed by tender_id. The
+    # store is filled from cleaned_tenders once (sync) and then follows every
+    # committed clean page and backfill chunk. Until the first sync finishes,
+    # and for hybrid queries, searches go to pgvector.
+    name = 'numpy'
+
+    def __init__(self, store):
+        self.store = store
+        self.ready = bool(store.info.get('synced_at'))
+        self.syncing = False
+        self._touched = set()
+        self._lock = threading.Lock()
+
+    def search(self, cur, query_embedding, request):
+        if request.hybrid or not self.ready:
+            return super().search(cur, query_embedding, request)
+        return self._search(cur, [query_embedding], request)[0]
+
+    def search_batch(self, cur, embeddings, request):
+        if not self.ready:
+            return super().search_batch(cur, embeddings, request)
+        return self._search(cur, embeddings, request)
+
+    def _search(self, cur, embeddings, request):
+        # A filter is applied as an allow-list of tender_ids, read with the
+        # same cap plan_vector_source uses; a broader filter goes to pgvector,
+        # whose filtered index scan does not have to load every match.
+        filter_sql, params = build_search_filters(request.filters)
+        allowed = None
+        if filter_sql:
+            cur.execute(f"""
+                SELECT tender_id FROM cleaned_tenders WHERE embedding IS NOT NULL{filter_sql}
+                LIMIT %(f_probe_cap)s
+            """, {**params, 'f_probe_cap': SEARCH_EXACT_FILTER_MAX_ROWS + 1})
+            allowed = [r['tender_id'] for r in cur.fetchall()]
+            if len(allowed) > SEARCH_EXACT_FILTER_MAX_ROWS:
+                return super().search_batch(cur, embeddings, request)
+        hits = self.store.search_many(embeddings, request.limit, allowed)
+        tender_ids = list({tender_id for query_hits in hits for tender_id, _ in query_hits})
+        cur.execute(f"SELECT {SEARCH_COLUMNS} FROM cleaned_tenders WHERE tender_id = ANY(%s)", (tender_ids,))
+        rows = {r['tender_id']: r for r in cur.fetchall()}
+        return [[{**rows[tender_id], 'similarity': similarity} for tender_id, similarity in query_hits
+                 if tender_id in rows] for query_hits in hits]
+
+    def update(self, tender_ids, embeddings):
+        # Called after the rows are committed; a NULL embedding becomes a tombstone
+        if not (self.ready or self.syncing):
+            return
+        with self._lock:
+            if self.syncing:
+                self._touched.update(tender_ids)
+        present = [(t, e) for t, e in zip(tender_ids, embeddings) if e is not None]
+        if present:
+            self.store.upsert([t for t, _ in present], [e for _, e in present])
+        removed = [t for t, e in zip(tender_ids, embeddings) if e is None]
+        if removed:
+            self.store.delete(removed)
+
+    def _load_rows(self, cur):
+        while True:
+            rows = cur.fetchmany(VECTOR_STORE_SYNC_ROWS)
+            if not rows:
+                return
+            self.store.upsert([r[0] for r in rows], [r[1] for r in rows])
+
+    def sync(self):
+        # Rebuilds the store from cleaned_tenders. Rows written while the scan
+        # runs may be read in an older version, so they are re-read at the end.
+        with self._lock:
+            self.ready, self.syncing, self._touched = False, True, set()
+        started = time.perf_counter()
+        try:
+            self.store.clear()
+            with get_db_connection() as conn:
+                cur = conn.cursor(name=f"vector_sync_{uuid.uuid4().hex}")
+                cur.itersize = VECTOR_STORE_SYNC_ROWS
+                try:
+                    cur.execute("SELECT tender_id, embedding::real[] FROM cleaned_tenders WHERE embedding IS NOT NULL")
+                    self._load_rows(cur)
+                finally:
+                    cur.close()
+                    conn.rollback()
+                with self._lock:
+                    touched, self.syncing = list(self._touched), False
+                    self._touched = set()
+                cur = conn.cursor()
+                cur.execute("SELECT tender_id, embedding::real[] FROM cleaned_tenders "
+                            "WHERE tender_id = ANY(%s) AND embedding IS NOT NULL", (touched,))
+                self._load_rows(cur)
+                cur.close()
+            self.store.set_info(synced_at=datetime.now(timezone.utc).isoformat())
+            self.ready = True
+            OPERATION_SECONDS.observe(time.perf_counter() - started, operation='vector_store_sync')
+            logging.info(f"Vector store synced: {len(self.store)} rows in {time.perf_counter() - started:.1f}s")
+        except Exception as e:
+            self.syncing = False
+            logging.error(f"Vector store sync failed: {str(e)}")
+
+    def start_sync(self):
+        threading.Thread(target=self.sync, name='vector-store-sync', daemon=True).start()
+
+    def status(self):
+        return {**self.store.stats(), "ready": self.ready, "syncing": self.syncing}
+
+# Replaced by init_vector_backend. Each process opens its own view of the
+# store; writes are serialized on the files, but only one server process
+# should run the initial sync.
+vector_backend = PgVectorBackend()
+
+def init_vector_backend(sync=True):
+    global vector_backend
+    if VECTOR_SEARCH_BACKEND == 'pgvector':
+        return vector_backend
+    if VECTOR_SEARCH_BACKEND != 'numpy':
+        raise ValueError(f"Unsupported vector search backend: {VECTOR_SEARCH_BACKEND}")
+    vector_backend = NumpyVectorBackend(NumpyVectorStore(VECTOR_STORE_DIR, model_provider.dim, VECTOR_STORE_DTYPE,
+                                                         model_provider.model_name))
+    if sync and not vector_backend.ready:
+        vector_backend.start_sync()
+    return vector_backend
+
+@api_router.post("/search")
+def semantic_search(request: SearchRequest):
+    try:
+        check_embedding_version()
+        cache_key = (model_provider.model_name, normalize_text(request.query),
+                     request.model_dump_json(exclude={'query'}))
+        # Only the results are cached; the query echoed back is always this request's
+        results = search_result_cache.get(cache_key)
+        if results is None:
+            generation = search_result_cache.generation
+            query_embedding = get_query_embedding(request.query)
+            
+            with get_db_connection() as conn:
+                cur = conn.cursor(cursor_factory=RealDictCursor)
+                results = [search_result_row(r) for r in vector_backend.search(cur, query_embedding, request)]
+                cur.close()
+            search_result_cache.set(cache_key, results, generation=generation)
         
         return {
             "query": request.query,
-            "results": [{
-                "id": r['id'],
-                "tender_id": r['tender_id'],
-                "title": r['title'],
-                "description": r['description'] or '',
-                "organization": r['organization'],
-                "category": r['category'],
-                "value": float(r['value']),
-                "currency": r['currency'],
-                "location": r['location'],
-                "status": r['status'],
-                "similarity": round(float(r['similarity']), 3)
-            } for r in results]
+            "results": results
         }
     except Exception as e:
         logging.error(f"Search error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.post("/search/batch")
+def batch_semantic_search(request: BatchSearchRequest):
+    try:
+        # Identical queries are looked up once and fanned back out
+        unique_queries = list(dict.fromkeys(request.queries))
+        if not unique_queries:
+            return {"query_count": 0, "results": []}
+        check_embedding_version()
+        embeddings = get_query_embeddings(unique_queries)
+        
+        with get_db_connection() as conn:
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+            results = vector_backend.search_batch(cur, embeddings, request)
+            cur.close()
+        
+        grouped = {query: [search_result_row(r) for r in rows] for query, rows in zip(unique_queries, results)}
+        
+        return {
+            "query_count": len(request.queries),
+            "results": [{"query": query, "results": grouped[query]} for query in request.queries]
+        }
+    except Exception as e:
+        logging.error(f"Batch search error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.get("/search-index")
+def get_search_index():
+    with get_db_connection() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        index = describe_vector_index(cur)
+        cur.close()
+    return {"index": index, "default_ef_search": SEARCH_EF_SEARCH, "default_probes": SEARCH_PROBES,
+            "rerank_factor": VECTOR_RERANK_FACTOR[vector_storage], "search_backend": vector_backend.status(),
+            "build": dict(vector_index_build)}
+
+@api_router.post("/search-index", status_code=202)
+def rebuild_search_index(request: VectorIndexRequest):
+    # Runs in the background; GET /api/search-index reports the build
+    if request.index_type not in ('hnsw', 'ivfflat', 'none'):
+        raise HTTPException(status_code=400, detail="index_type must be 'hnsw', 'ivfflat' or 'none'")
+    if request.storage not in VECTOR_RERANK_FACTOR:
+        raise HTTPException(status_code=400, detail="storage must be 'full', 'halfvec' or 'binary'")
+    with _vector_index_build_lock:
+        if vector_index_build['status'] == 'running':
+            raise HTTPException(status_code=409, detail="A search index build is already running")
+        vector_index_build.clear()
+        vector_index_build.update(status='running', index_type=request.index_type, storage=request.storage,
+                                  started_at=datetime.now(timezone.utc).isoformat())
+    threading.Thread(target=run_vector_index_build, args=(request,), name='vector-index-build', daemon=True).start()
+    return {"status": "running", "build": dict(vector_index_build), "status_url": "/api/search-index"}
+
+def embedding_version_response(row):
+    pending = max(0, (row['rows_total'] or 0) - (row['rows_done'] or 0))
+    return {
+        "id": row['id'],
+        "model_name": row['model_name'],
+        "dim": row['dim'],
+        "status": row['status'],
+        "rows_total": row['rows_total'],
+        "rows_done": row['rows_done'],
+        "progress": round(min(1.0, row['rows_done'] / row['rows_total']), 4) if row['rows_total'] else None,
+        "rows_per_sec": row['rows_per_sec'],
+        "eta_seconds": round(pending / row['rows_per_sec'])
+        if row['status'] == 'backfilling' and row['rows_per_sec'] else None,
+        "error": row['error'],
+        "created_at": row['created_at'].isoformat(),
+        "updated_at": row['updated_at'].isoformat(),
+        "activated_at": row['activated_at'].isoformat() if row['activated_at'] else None
+    }
+
+@api_router.get("/embedding-versions")
+def list_embedding_versions(limit: int = Query(20, ge=1, le=100)):
+    with get_db_connection() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute("SELECT * FROM embedding_versions ORDER BY id DESC LIMIT %s", (limit,))
+        versions = cur.fetchall()
+        cur.close()
+    return {
+        "active": next((embedding_version_response(v) for v in versions if v['status'] == 'active'), None),
+        "versions": [embedding_version_response(v) for v in versions],
+        "rollout": reembedder.status() if reembedder else None
+    }
+
+@api_router.post("/embedding-versions", status_code=202)
+def create_embedding_version(request: EmbeddingVersionRequest):
+    # Starts rolling a new model out; search keeps using the active version
+    # until the switch. Progress is reported by GET /api/embedding-versions.
+    if request.model_name == model_provider.model_name:
+        raise HTTPException(status_code=409, detail="That model is already the active embedding version")
+    with get_db_connection() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute(f"SELECT id FROM embedding_versions WHERE status IN {PENDING_VERSION_STATES}")
+        pending = cur.fetchone()
+        if pending:
+            cur.close()
+            raise HTTPException(status_code=409, detail=f"Embedding version {pending['id']} is still rolling out")
+        # Whatever a failed or cancelled rollout left behind
+        drop_shadow_column(cur)
+        try:
+            cur.execute("INSERT INTO embedding_versions (model_name, status) VALUES (%s, 'loading') RETURNING *",
+                        (request.model_name,))
+        except psycopg2.IntegrityError:
+            raise HTTPException(status_code=409, detail="Another embedding version is already rolling out")
+        version = cur.fetchone()
+        conn.commit()
+        cur.close()
+    start_reembedder(version['id'])
+    return embedding_version_response(version)
+
+@api_router.post("/embedding-versions/{version_id}/activate", status_code=202)
+def request_embedding_version_activation(version_id: int):
+    # For REEMBED_AUTO_SWITCH=false: catches up on rows added since the
+    # version became ready, then switches
+    with get_db_connection() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute("SELECT * FROM embedding_versions WHERE id = %s", (version_id,))
+        version = cur.fetchone()
+        cur.close()
+    if not version:
+        raise HTTPException(status_code=404, detail="Embedding version not found")
+    if version['status'] != 'ready':
+        raise HTTPException(status_code=409, detail=f"Embedding version {version_id} is {version['status']}; "
+                                                    "only a ready version can be activated")
+    start_reembedder(version_id, activate=True)
+    return embedding_version_response(version)
+
+@api_router.delete("/embedding-versions/{version_id}")
+def cancel_embedding_version(version_id: int):
+    if reembedder is not None and reembedder.version_id == version_id:
+        reembedder.cancel()
+    with get_db_connection() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute("SELECT status FROM embedding_versions WHERE id = %s FOR UPDATE", (version_id,))
+        version = cur.fetchone()
+        if not version or version['status'] not in PENDING_VERSION_STATES:
+            cur.close()
+            raise HTTPException(status_code=404 if not version else 409,
+                                detail="Embedding version not found" if not version
+                                else f"Embedding version {version_id} is {version['status']}")
+        # A rollout running in another process fails on its next batch and stays cancelled
+        drop_shadow_column(cur)
+        cur.execute("""
+            UPDATE embedding_versions SET status = 'cancelled', updated_at = CURRENT_TIMESTAMP
+            WHERE id = %s
+            RETURNING *
+        """, (version_id,))
+        version = cur.fetchone()
+        conn.commit()
+        cur.close()
+    return embedding_version_response(version)
+
 @api_router.get("/data-quality")
-async def get_data_quality():
-    conn = get_db_connection()
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-    cur.execute("SELECT * FROM data_quality_logs ORDER BY created_at DESC")
-    logs = cur.fetchall()
-    cur.close()
-    conn.close()
+def get_data_quality(run_id: Optional[str] = None):
+    with get_db_connection() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        if run_id is None:
+            cur.execute("SELECT id FROM data_quality_runs ORDER BY created_at DESC LIMIT 1")
+            latest = cur.fetchone()
+            run_id = latest['id'] if latest else None
+        cur.execute("SELECT * FROM data_quality_logs WHERE run_id = %s ORDER BY created_at DESC", (run_id,))
+        logs = cur.fetchall()
+        cur.close()
     
     return {
+        "run_id": run_id,
         "total_checks": len(logs),
         "logs": [{
             "check_type": log['check_type'],
@@ -388,14 +3660,33 @@ async def get_data_quality():
         } for log in logs]
     }
 
+@api_router.get("/data-quality/history")
+def get_data_quality_history(limit: int = 20):
+    with get_db_connection() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute("SELECT * FROM data_quality_runs ORDER BY created_at DESC LIMIT %s", (limit,))
+        runs = cur.fetchall()
+        cur.close()
+    
+    return {
+        "runs": [{
+            "run_id": run['id'],
+            "batch_id": run['batch_id'],
+            "trigger": run['trigger'],
+            "total_records": run['total_records'],
+            "issue_count": run['issue_count'],
+            "duration_ms": run['duration_ms'],
+            "created_at": run['created_at'].isoformat()
+        } for run in runs]
+    }
+
 @api_router.get("/pipeline-health")
-async def get_pipeline_health():
-    conn = get_db_connection()
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-    cur.execute("SELECT * FROM pipeline_health ORDER BY created_at DESC LIMIT 1")
-    health = cur.fetchone()
-    cur.close()
-    conn.close()
+def get_pipeline_health():
+    with get_db_connection() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute("SELECT * FROM pipeline_health ORDER BY created_at DESC LIMIT 1")
+        health = cur.fetchone()
+        cur.close()
     
     if not health:
         return {
@@ -416,11 +3707,138 @@ async def get_pipeline_health():
         "errors": health['errors']
     }
 
+@api_router.get("/analytics")
+def get_analytics(group_by: str = Query('category', pattern='^(category|organization|location|status)$'),
+                  interval: Optional[str] = Query(None, pattern='^(month|quarter|year)$'),
+                  date_from: Optional[date] = None, date_to: Optional[date] = None,
+                  currency: Optional[str] = None, limit: int = Query(20, ge=1)):
+    # Served from spend_rollup only, so the cost follows the number of groups
+    # and months rather than tenders. Values are summed per currency, never
+    # converted. Undated tenders count in the totals unless a date range is
+    # given, and never in the time series.
+    limit = min(limit, ANALYTICS_MAX_GROUPS)
+    where = ["dimension = %(dimension)s"]
+    params = {'dimension': group_by, 'limit': limit, 'undated': UNDATED_MONTH}
+    if date_from is not None:
+        where.append("month >= date_trunc('month', %(date_from)s::date)")
+        params['date_from'] = date_from
+    if date_to is not None:
+        where.append("month <= %(date_to)s AND month > %(undated)s")
+        params['date_to'] = date_to
+    if currency is not None:
+        where.append("currency = %(currency)s")
+        params['currency'] = currency
+    where_sql = ' AND '.join(where)
+    
+    with get_db_connection() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute(f"""
+            SELECT dim_value AS key, currency, SUM(tender_count) AS tender_count, SUM(total_value) AS total_value
+            FROM spend_rollup
+            WHERE {where_sql}
+            GROUP BY dim_value, currency
+            ORDER BY total_value DESC, key, currency
+            LIMIT %(limit)s
+        """, params)
+        totals = cur.fetchall()
+        series = []
+        if interval and totals:
+            params.update(interval=interval, keys=list({t['key'] for t in totals}))
+            cur.execute(f"""
+                SELECT date_trunc(%(interval)s, month)::date AS period, dim_value AS key, currency,
+                       SUM(tender_count) AS tender_count, SUM(total_value) AS total_value
+                FROM spend_rollup
+                WHERE {where_sql} AND dim_value = ANY(%(keys)s) AND month > %(undated)s
+                GROUP BY 1, 2, 3
+                ORDER BY 1, 2, 3
+            """, params)
+            series = cur.fetchall()
+        counts = read_table_counts(cur)
+        cur.close()
+    
+    def cell(row):
+        return {"key": row['key'], "currency": row['currency'], "tender_count": int(row['tender_count']),
+                "total_value": float(row['total_value'])}
+    
+    return {
+        "group_by": group_by,
+        "interval": interval,
+        "record_counts": counts,
+        "totals": [cell(t) for t in totals],
+        "series": [{"period": s['period'].isoformat(), **cell(s)} for s in series]
+    }
+
+@api_router.get("/stats")
+def get_runtime_stats():
+    return {
+        "db_pool": db_pool.stats() if db_pool else None,
+        "query_embedding_cache": query_embedding_cache.stats(),
+        "search_result_cache": search_result_cache.stats(),
+        "embedding_model": model_provider.status(),
+        "embedding_version": active_embedding_version,
+        "embedding_rollout": reembedder.status() if reembedder else None,
+        "vector_search": vector_backend.status(),
+        "startup": startup_timings
+    }
+
+def _pool_stats():
+    return db_pool.stats() if db_pool else {}
+
+metrics.callback('db_pool_connections_in_use', 'Connections currently checked out', 'gauge',
+                 lambda: [({}, _pool_stats().get('in_use'))])
+metrics.callback('db_pool_checkouts_total', 'Connections handed out since start', 'counter',
+                 lambda: [({}, _pool_stats().get('checkouts'))])
+metrics.callback('cache_hits_total', 'In-process cache hits', 'counter',
+                 lambda: [({'cache': 'query_embedding'}, query_embedding_cache.stats()['hits']),
+                          ({'cache': 'search_result'}, search_result_cache.stats()['hits'])])
+metrics.callback('cache_misses_total', 'In-process cache misses', 'counter',
+                 lambda: [({'cache': 'query_embedding'}, query_embedding_cache.stats()['misses']),
+                          ({'cache': 'search_result'}, search_result_cache.stats()['misses'])])
+metrics.callback('cache_entries', 'In-process cache size', 'gauge',
+                 lambda: [({'cache': 'query_embedding'}, query_embedding_cache.stats()['size']),
+                          ({'cache': 'search_result'}, search_result_cache.stats()['size'])])
+metrics.callback('embedding_model_ready', 'Whether the embedding model is loaded', 'gauge',
+                 lambda: [({'model': model_provider.model_name, 'backend': model_provider.backend},
+                           int(model_provider.ready))])
+
+def _vector_store_rows():
+    status = vector_backend.status()
+    return [({'state': 'live'}, status.get('live_rows')), ({'state': 'tombstone'}, status.get('tombstones'))]
+
+metrics.callback('vector_store_rows', 'Rows in the in-process vector store by state', 'gauge', _vector_store_rows)
+
+@api_router.get("/metrics")
+def get_metrics():
+    return Response(content=metrics.render(), media_type='text/plain; version=0.0.4; charset=utf-8')
+
+@api_router.post("/rebuild")
+def rebuild_cleaned_data():
+    try:
+        embedding_stats = EmbeddingStats()
+        cleaned_count = clean_and_normalize(full_rebuild=True, stats=embedding_stats)
+        with get_db_connection() as conn:
+            cur = conn.cursor()
+            rebuild_rollups(cur)
+            conn.commit()
+            cur.close()
+        refresh_tender_neighbours()
+        run_data_quality_checks(trigger='rebuild')
+        update_pipeline_health()
+        return {
+            "status": "success",
+            "records_cleaned": cleaned_count,
+            "embedding": embedding_stats.as_dict(),
+            "message": "Full rebuild completed"
+        }
+    except Exception as e:
+        logging.error(f"Rebuild error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @api_router.post("/validate")
-async def trigger_validation():
+def trigger_validation():
     try:
-        await run_data_quality_checks()
-        await update_pipeline_health()
+        run_data_quality_checks(trigger='validate')
+        update_pipeline_health()
         return {"status": "success", "message": "Validation completed"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -433,6 +3851,7 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 logging.basicConfig(
@@ -443,9 +3862,28 @@ logger = logging.getLogger(__name__)
 
 @app.on_event("startup")
 async def startup_event():
+    started = time.perf_counter()
+    if EMBEDDING_MODEL_LOAD == 'background':
+        model_provider.start_warmup()
+    init_db_pool()
     init_database()
     logger.info("Database initialized successfully")
+    init_vector_backend()
+    resumed = resume_ingestion_jobs()
+    if resumed:
+        logger.info(f"Resumed {resumed} unfinished ingestion jobs")
+    if resume_embedding_version():
+        logger.info("Resumed an unfinished embedding version rollout")
+    startup_timings['startup_seconds'] = round(time.perf_counter() - started, 3)
+    logger.info(f"Startup took {startup_timings['startup_seconds']}s "
+                f"(module body {startup_timings['module_seconds']}s)")
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    logger.info("Application shutting down")
\ No newline at end of file
+    ingest_job_executor.shutdown(wait=False)
+    bulk_embedding_executor.shutdown(wait=False)
+    query_embedding_executor.shutdown(wait=False)
+    close_db_pool()
+    logger.info("Application shutting down")
+
+startup_timings['module_seconds'] = round(time.perf_counter() - MODULE_STARTED, 3)
@@ -0,0 +1,305 @@
+"""In-process vector index over a memory-mapped NumPy matrix.
+
+Embeddings are stored L2-normalized in one contiguous float32 (or float16)
+matrix on disk and searched with blocked matrix products and argpartition.
+Cosine similarity is therefore a plain dot product, and the search is exact.
+Rows are appended as keys arrive. Re-upserting a key overwrites its row in
+place. A delete only flips a tombstone byte, and compact() rewrites the files
+once tombstones pile up.
+
+Only numpy is needed, so the store can be used without Postgres. Writes
+from several processes are serialized with an flock. A reader picks up
+another process's writes the next time it touches the store.
+"""
+import fcntl
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+
+class NumpyVectorStore:
+    # Rows are scored in blocks: small enough that a float16 block upcast to
+    # float32 stays in cache, and with the score matrix of a query batch
+    # bounded to about SCORE_BLOCK_FLOATS
+    BLOCK_ROWS = 32768
+    SCORE_BLOCK_FLOATS = 16 * 1024 * 1024
+    MIN_CAPACITY = 1024
+    COMPACT_TOMBSTONE_RATIO = 0.25
+    DATA_FILES = ('vectors.bin', 'alive.bin', 'keys.txt')
+
+    def __init__(self, path, dim, dtype='float32', model_name=None):
+        self.path = Path(path)
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.model_name = model_name
+        self.count = 0
+        self.capacity = 0
+        self.reset = False
+        self.info = {}
+        self._version = None
+        self._meta_mtime = None
+        self._keys = []
+        self._rows = {}
+        self._vectors = np.empty((0, dim), dtype=self.dtype)
+        self._alive = np.empty(0, dtype=np.uint8)
+        self._lock = threading.RLock()
+        self.path.mkdir(parents=True, exist_ok=True)
+        with self._lock, self._file_lock():
+            self._finish_compact()
+            self._load()
+
+    # -- files -------------------------------------------------------------
+
+    @property
+    def _meta_path(self):
+        return self.path / 'meta.json'
+
+    @contextmanager
+    def _file_lock(self):
+        with open(self.path / 'lock', 'a') as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _load(self):
+        meta = json.loads(self._meta_path.read_text()) if self._meta_path.exists() else None
+        if meta and (meta['dim'] != self.dim or meta['dtype'] != self.dtype.name
+                     or meta.get('model_name') != self.model_name):
+            logging.info(f"Vector store at {self.path} was built for another model or layout; resetting it")
+            self._reset_files()
+            self.reset = True
+            meta = None
+        if meta is None:
+            self.count, self.capacity, self._version = 0, 0, 0
+            self._keys, self._rows, self.info = [], {}, {}
+            self._map(0)
+            self._write_meta()
+            return
+        self.count, self.capacity, self._version = meta['count'], meta['capacity'], meta['version']
+        self.info = meta.get('info', {})
+        self._meta_mtime = self._meta_path.stat().st_mtime_ns
+        keys_path = self.path / 'keys.txt'
+        lines = keys_path.read_text().splitlines() if keys_path.exists() else []
+        if len(lines) > self.count:
+            # A crash between appending keys and committing meta.json
+            keys_path.write_text(''.join(f"{key}\n" for key in lines[:self.count]))
+        self._keys = lines[:self.count]
+        self._rows = {key: row for row, key in enumerate(self._keys)}
+        self._map(self.capacity)
+
+    def _map(self, capacity):
+        self._vectors = self._vectors[:0]
+        self._alive = self._alive[:0]
+        self.capacity = capacity
+        if capacity == 0:
+            return
+        self._vectors = np.memmap(self.path / 'vectors.bin', dtype=self.dtype, mode='r+', shape=(capacity, self.dim))
+        self._alive = np.memmap(self.path / 'alive.bin', dtype=np.uint8, mode='r+', shape=(capacity,))
+
+    def _resize_files(self, capacity):
+        for name, row_bytes in (('vectors.bin', self.dim * self.dtype.itemsize), ('alive.bin', 1)):
+            with open(self.path / name, 'ab') as handle:
+                handle.truncate(capacity * row_bytes)
+
+    def _reset_files(self):
+        for name in self.DATA_FILES + ('meta.json',):
+            (self.path / name).unlink(missing_ok=True)
+
+    def _write_meta(self, target=None):
+        target = target or self._meta_path
+        meta = {"dim": self.dim, "dtype": self.dtype.name, "model_name": self.model_name,
+                "count": self.count, "capacity": self.capacity, "version": self._version, "info": self.info}
+        tmp = target.with_name(f"{target.name}.tmp")
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, target)
+        if target == self._meta_path:
+            self._meta_mtime = self._meta_path.stat().st_mtime_ns
+
+    def _finish_compact(self):
+        # compact() writes meta.json.compact only once its new files are
+        # complete. If it is there, the compaction is rolled forward; otherwise
+        # any half-written files are dropped and the old ones stay in use.
+        pending = self.path / 'meta.json.compact'
+        committed = pending.exists()
+        for name in self.DATA_FILES:
+            tmp = self.path / f"{name}.compact"
+            if committed and tmp.exists():
+                os.replace(tmp, self.path / name)
+            else:
+                tmp.unlink(missing_ok=True)
+        if committed:
+            os.replace(pending, self._meta_path)
+
+    def _refresh(self):
+        # Another process committed since we last looked
+        try:
+            mtime = self._meta_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._meta_mtime:
+            self._load()
+
+    @contextmanager
+    def _write(self):
+        with self._lock, self._file_lock():
+            self._finish_compact()
+            self._refresh()
+            yield
+            if self.capacity:
+                self._vectors.flush()
+                self._alive.flush()
+            self._version += 1
+            self._write_meta()
+
+    def _ensure_capacity(self, rows):
+        if rows <= self.capacity:
+            return
+        capacity = max(rows, self.capacity * 2, self.MIN_CAPACITY)
+        self._map(0)
+        self._resize_files(capacity)
+        self._map(capacity)
+
+    # -- writes ------------------------------------------------------------
+
+    def upsert(self, keys, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms > 0, norms, 1)
+        with self._write():
+            new_keys, rows = [], []
+            for key in keys:
+                row = self._rows.get(key)
+                if row is None:
+                    row = self.count + len(new_keys)
+                    self._rows[key] = row
+                    new_keys.append(key)
+                rows.append(row)
+            self._ensure_capacity(self.count + len(new_keys))
+            rows = np.asarray(rows, dtype=np.int64)
+            self._vectors[rows] = vectors.astype(self.dtype)
+            # Zero vectors (very short texts) have no direction and are never returned
+            self._alive[rows] = (norms[:, 0] > 0).astype(np.uint8)
+            if new_keys:
+                with open(self.path / 'keys.txt', 'a') as handle:
+                    handle.write(''.join(f"{key}\n" for key in new_keys))
+                self._keys.extend(new_keys)
+                self.count += len(new_keys)
+
+    def delete(self, keys):
+        with self._write():
+            rows = [self._rows[key] for key in keys if key in self._rows]
+            if rows:
+                self._alive[np.asarray(rows, dtype=np.int64)] = 0
+        if self.count > self.MIN_CAPACITY and self.tombstones() > self.count * self.COMPACT_TOMBSTONE_RATIO:
+            self.compact()
+
+    def clear(self):
+        with self._write():
+            self._map(0)
+            self._reset_files()
+            self.count, self._keys, self._rows, self.info = 0, [], {}, {}
+        self.reset = False
+
+    def set_info(self, **values):
+        # Small caller-owned notes kept in meta.json (e.g. when it was last synced)
+        with self._write():
+            self.info = {**self.info, **values}
+
+    def compact(self):
+        # Rewrites only the live rows; keys of deleted rows are forgotten. The
+        # new files are written beside the old ones and swapped in by
+        # _finish_compact, so a crash part-way leaves one complete store.
+        with self._write():
+            live = np.flatnonzero(self._alive[:self.count])
+            keys = [self._keys[row] for row in live]
+            capacity = max(len(keys), self.MIN_CAPACITY) if keys else 0
+            with open(self.path / 'vectors.bin.compact', 'wb') as handle:
+                for start in range(0, len(live), self.BLOCK_ROWS):
+                    handle.write(np.ascontiguousarray(self._vectors[live[start:start + self.BLOCK_ROWS]]).tobytes())
+                handle.truncate(capacity * self.dim * self.dtype.itemsize)
+            with open(self.path / 'alive.bin.compact', 'wb') as handle:
+                handle.write(np.ones(len(keys), dtype=np.uint8).tobytes())
+                handle.truncate(capacity)
+            (self.path / 'keys.txt.compact').write_text(''.join(f"{key}\n" for key in keys))
+            self._map(0)
+            self.count, self.capacity = len(keys), capacity
+            self._keys = keys
+            self._rows = {key: row for row, key in enumerate(keys)}
+            self._write_meta(self.path / 'meta.json.compact')
+            self._finish_compact()
+            self._map(capacity)
+
+    # -- reads -------------------------------------------------------------
+
+    def search(self, query, k, allowed=None):
+        return self.search_many([query], k, allowed)[0]
+
+    def search_many(self, queries, k, allowed=None):
+        """Exact top-k cosine neighbours for each query as [(key, similarity), ...].
+
+        `allowed` optionally restricts the search to a set of keys (a
+        pre-filtered candidate list); unknown keys are ignored.
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms > 0, norms, 1)
+        with self._lock:
+            self._refresh()
+            if allowed is not None:
+                rows = np.fromiter((self._rows[key] for key in allowed if key in self._rows), dtype=np.int64)
+                total = len(rows)
+            else:
+                rows, total = None, self.count
+            best_scores = np.empty((len(queries), 0), dtype=np.float32)
+            best_rows = np.empty((len(queries), 0), dtype=np.int64)
+            block = max(1024, min(self.BLOCK_ROWS, self.SCORE_BLOCK_FLOATS // max(1, len(queries))))
+            for start in range(0, total, block):
+                end = min(start + block, total)
+                if rows is None:
+                    block_rows = np.arange(start, end)
+                    vectors, alive = self._vectors[start:end], self._alive[start:end]
+                else:
+                    block_rows = rows[start:end]
+                    vectors, alive = self._vectors[block_rows], self._alive[block_rows]
+                scores = queries @ vectors.T.astype(np.float32, copy=False)
+                scores[:, alive == 0] = -np.inf
+                best_scores = np.hstack([best_scores, scores])
+                best_rows = np.hstack([best_rows, np.broadcast_to(block_rows, scores.shape)])
+                if best_scores.shape[1] > k:
+                    keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                    best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                    best_rows = np.take_along_axis(best_rows, keep, axis=1)
+            order = np.argsort(-best_scores, axis=1)
+            best_scores = np.take_along_axis(best_scores, order, axis=1)
+            best_rows = np.take_along_axis(best_rows, order, axis=1)
+            return [[(self._keys[row], float(score)) for row, score in zip(rows_, scores_) if score > -np.inf]
+                    for rows_, scores_ in zip(best_rows, best_scores)]
+
+    def tombstones(self):
+        return int(self.count - np.count_nonzero(self._alive[:self.count]))
+
+    def stats(self):
+        with self._lock:
+            tombstones = self.tombstones()
+            return {
+                "backend": "numpy",
+                "path": str(self.path),
+                "dtype": self.dtype.name,
+                "model_name": self.model_name,
+                "info": self.info,
+                "rows": self.count,
+                "live_rows": self.count - tombstones,
+                "tombstones": tombstones,
+                "capacity": self.capacity,
+                "matrix_bytes": self.capacity * self.dim * self.dtype.itemsize,
+            }
+
+    def __len__(self):
+        return self.count
@@ -100,12 +100,10 @@ class ProcurementAPITester:
             # Read sample CSV file
             with open('/app/sample_data.csv', 'rb') as f:
                 files = {'file': ('sample_data.csv', f, 'text/csv')}
-                success, response = self.run_test("File Upload & Ingestion", "POST", "ingest", 200, files=files)
+                success, response = self.run_test("File Upload & Ingestion", "POST", "ingest", 202, files=files)
                 
                 if success:
-                    # Wait a moment for processing
-                    time.sleep(2)
-                    return True, response
+                    return self.wait_for_job(response['job_id'])
                 return False, {}
         except FileNotFoundError:
             self.log_test("File Upload & Ingestion", False, "Sample CSV file not found")
@@ -114,15 +112,160 @@ class ProcurementAPITester:
             self.log_test("File Upload & Ingestion", False, f"Upload error: {str(e)}")
             return False, {}
 
+    def wait_for_job(self, job_id, timeout=120):
+        """Poll an ingestion job until it completes or fails"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            response = requests.get(f"{self.api_url}/jobs/{job_id}", timeout=30)
+            job = response.json() if response.status_code == 200 else {}
+            if job.get('status') in ('completed', 'failed'):
+                success = job['status'] == 'completed'
+                self.log_test("Ingestion Job Completion", success,
+                              f"Stage timings: {[(k, v.get('seconds')) for k, v in job['stages'].items()]}"
+                              if success else f"Error: {job.get('error')}")
+                return success, job.get('result') or {}
+            time.sleep(1)
+        self.log_test("Ingestion Job Completion", False, "Job did not finish in time")
+        return False, {}
+
     def test_tenders_with_data(self):
         """Test tenders endpoint after data upload"""
         return self.run_test("Get Tenders (With Data)", "GET", "tenders?limit=10", 200)
 
+    def test_tenders_pagination(self):
+        """Test keyset pagination returns disjoint pages"""
+        first = requests.get(f"{self.api_url}/tenders?limit=5", timeout=30)
+        cursor = first.headers.get('X-Next-Cursor')
+        if first.status_code != 200 or not cursor:
+            self.log_test("Tenders Pagination", False, f"Status: {first.status_code} | Cursor: {cursor}")
+            return False
+        second = requests.get(f"{self.api_url}/tenders", params={"limit": 5, "cursor": cursor}, timeout=30)
+        overlap = {t['id'] for t in first.json()} & {t['id'] for t in second.json()}
+        success = second.status_code == 200 and not overlap
+        self.log_test("Tenders Pagination", success, f"Second page: {len(second.json())} | Overlap: {len(overlap)}")
+        return success
+
+    def test_tenders_export(self):
+        """Test streaming NDJSON export"""
+        response = requests.get(f"{self.api_url}/tenders/export?format=ndjson", stream=True, timeout=60)
+        rows = [json.loads(line) for line in response.iter_lines() if line]
+        success = response.status_code == 200 and len(rows) > 0 and 'embedding' not in rows[0]
+        self.log_test("Tenders Export (NDJSON)", success, f"Status: {response.status_code} | Rows: {len(rows)}")
+        return success
+
+    def test_analytics(self):
+        """Test spend analytics served from the rollups"""
+        response = requests.get(f"{self.api_url}/analytics", params={"group_by": "category", "interval": "month"},
+                                timeout=30)
+        body = response.json() if response.status_code == 200 else {}
+        success = response.status_code == 200 and len(body.get('totals', [])) > 0
+        self.log_test("Spend Analytics", success, f"Status: {response.status_code} | "
+                      f"Groups: {len(body.get('totals', []))} | Points: {len(body.get('series', []))}")
+        return success
+
+    def test_similar_tenders(self):
+        """Test the precomputed "more like this" neighbours"""
+        tenders = requests.get(f"{self.api_url}/tenders?limit=1", timeout=30).json()
+        if not tenders:
+            self.log_test("Similar Tenders", False, "No tenders to look up")
+            return False
+        response = requests.get(f"{self.api_url}/tenders/{tenders[0]['id']}/similar?limit=5", timeout=30)
+        body = response.json() if response.status_code == 200 else {}
+        ids = [r['id'] for r in body.get('results', [])]
+        success = response.status_code == 200 and tenders[0]['id'] not in ids
+        self.log_test("Similar Tenders", success, f"Status: {response.status_code} | "
+                      f"Source: {body.get('source')} | Results: {len(ids)}")
+        return success
+
+    def test_embedding_versions(self):
+        """Test that exactly one embedding version is active"""
+        response = requests.get(f"{self.api_url}/embedding-versions", timeout=30)
+        body = response.json() if response.status_code == 200 else {}
+        active = body.get('active') or {}
+        success = response.status_code == 200 and bool(active.get('model_name')) and bool(active.get('dim'))
+        self.log_test("Embedding Versions", success, f"Status: {response.status_code} | "
+                      f"Active: {active.get('model_name')} ({active.get('dim')})")
+        return success
+
     def test_search_with_data(self):
         """Test search endpoint with data"""
         search_data = {"query": "cloud infrastructure upgrade", "limit": 5}
         return self.run_test("Search With Data", "POST", "search", 200, data=search_data)
 
+    def test_batch_search(self):
+        """Test batch search keeps query order and matches single searches"""
+        queries = ["healthcare analytics", "cloud infrastructure upgrade", "renewable energy",
+                   "cloud infrastructure upgrade"]
+        response = requests.post(f"{self.api_url}/search/batch", json={"queries": queries, "limit": 3}, timeout=60)
+        body = response.json() if response.status_code == 200 else {}
+        grouped = body.get('results', [])
+        success = (response.status_code == 200 and body.get('query_count') == len(queries)
+                   and [g['query'] for g in grouped] == queries)
+        for query, group in zip(queries, grouped):
+            single = requests.post(f"{self.api_url}/search", json={"query": query, "limit": 3}, timeout=30).json()
+            success = success and [r['id'] for r in group['results']] == [r['id'] for r in single['results']]
+        self.log_test("Batch Search", success, f"Status: {response.status_code} | Groups: {len(grouped)}")
+        
+        empty = requests.post(f"{self.api_url}/search/batch", json={"queries": []}, timeout=30)
+        empty_success = empty.status_code == 200 and empty.json() == {"query_count": 0, "results": []}
+        self.log_test("Batch Search (Empty)", empty_success, f"Status: {empty.status_code}")
+        return success and empty_success
+
+    def test_search_limits(self):
+        """Test out-of-range limits and oversized batches are rejected"""
+        results = [
+            self.run_test("Search Limit Zero", "POST", "search", 422, data={"query": "cloud", "limit": 0}),
+            self.run_test("Search Limit Too Large", "POST", "search", 422, data={"query": "cloud", "limit": 101}),
+            self.run_test("Batch Search Negative Limit", "POST", "search/batch", 422,
+                          data={"queries": ["cloud"], "limit": -1}),
+            self.run_test("Batch Search Too Many Queries", "POST", "search/batch", 422,
+                          data={"queries": ["cloud"] * 1001}),
+        ]
+        return all(success for success, _ in results)
+
+    def test_filtered_search(self):
+        """Test every filtered result satisfies every filter, for single and batch search"""
+        cases = [
+            ({"category": "Healthcare IT", "status": "Open"},
+             lambda r: r['category'] == "Healthcare IT" and r['status'] == "Open"),
+            ({"min_value": 2000000, "max_value": 3500000, "status": "Open"},
+             lambda r: 2000000 <= r['value'] <= 3500000 and r['status'] == "Open"),
+            # No sample tender matches both
+            ({"location": "Boston", "min_value": 4000000}, lambda r: not r['tender_id'].startswith('TND-2025-')),
+            # Sample tenders due by 2025-03-05
+            ({"deadline_to": "2025-03-05"},
+             lambda r: not r['tender_id'].startswith('TND-2025-')
+             or r['tender_id'] in ('TND-2025-004', 'TND-2025-009', 'TND-2025-014')),
+        ]
+        success = True
+        for filters, check in cases:
+            single = requests.post(f"{self.api_url}/search",
+                                   json={"query": "data platform", "limit": 10, "filters": filters}, timeout=30)
+            batch = requests.post(f"{self.api_url}/search/batch",
+                                  json={"queries": ["data platform"], "limit": 10, "filters": filters}, timeout=30)
+            results = single.json().get('results', []) if single.status_code == 200 else None
+            batch_results = batch.json()['results'][0]['results'] if batch.status_code == 200 else None
+            case_success = (results is not None and batch_results is not None
+                            and all(check(r) for r in results + batch_results)
+                            and [r['id'] for r in results] == [r['id'] for r in batch_results])
+            success = success and case_success
+            self.log_test(f"Filtered Search {sorted(filters)}", case_success,
+                          f"Status: {single.status_code}/{batch.status_code} | Results: {len(results or [])}")
+        return success
+
+    def test_hybrid_search(self):
+        """Test hybrid search ranks an exact keyword match above unrelated hits"""
+        response = requests.post(f"{self.api_url}/search",
+                                 json={"query": "HIPAA compliance", "limit": 5, "hybrid": True}, timeout=30)
+        results = response.json().get('results', []) if response.status_code == 200 else []
+        success = (response.status_code == 200 and bool(results) and 'HIPAA' in results[0]['description']
+                   and results[0]['text_rank'] > 0
+                   and all(r['score'] <= results[0]['score'] for r in results)
+                   and all(r['text_rank'] == 0 for r in results if 'HIPAA' not in r['description']))
+        self.log_test("Hybrid Search", success, f"Status: {response.status_code} | "
+                      f"Top: {results[0]['tender_id'] if results else None}")
+        return success
+
     def test_pipeline_health_after_ingestion(self):
         """Test pipeline health after data ingestion"""
         return self.run_test("Pipeline Health (After Ingestion)", "GET", "pipeline-health", 200)
@@ -145,6 +288,7 @@ def main():
     tester.test_tenders_empty()
     tester.test_validation_trigger()
     tester.test_search_without_data()
+    tester.test_search_limits()
     
     # Phase 2: Data Ingestion Tests
     print("\n📤 Phase 2: Data Ingestion & Processing")
@@ -156,7 +300,15 @@ def main():
         # Phase 3: Post-Ingestion Tests
         print("\n🔍 Phase 3: Post-Ingestion Functionality")
         tester.test_tenders_with_data()
+        tester.test_tenders_pagination()
+        tester.test_tenders_export()
+        tester.test_analytics()
+        tester.test_similar_tenders()
+        tester.test_embedding_versions()
         tester.test_search_with_data()
+        tester.test_batch_search()
+        tester.test_filtered_search()
+        tester.test_hybrid_search()
         tester.test_pipeline_health_after_ingestion()
         tester.test_data_quality_after_ingestion()
     else:
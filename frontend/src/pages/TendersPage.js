@@ -5,6 +5,9 @@ import { API } from '../App';
 const TendersPage = () => {
   const [tenders, setTenders] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [similar, setSimilar] = useState({});
 
   useEffect(() => {
     fetchTenders();
@@ -14,6 +17,7 @@ const TendersPage = () => {
     try {
       const response = await axios.get(`${API}/tenders?limit=50`);
       setTenders(response.data);
+      setNextCursor(response.headers['x-next-cursor'] || null);
     } catch (error) {
       console.error('Error fetching tenders:', error);
     } finally {
@@ -21,6 +25,32 @@ const TendersPage = () => {
     }
   };
 
+  const fetchMore = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await axios.get(`${API}/tenders`, { params: { limit: 50, cursor: nextCursor } });
+      setTenders((current) => [...current, ...response.data]);
+      setNextCursor(response.headers['x-next-cursor'] || null);
+    } catch (error) {
+      console.error('Error fetching tenders:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const toggleSimilar = async (id) => {
+    if (similar[id]) {
+      setSimilar(({ [id]: _, ...rest }) => rest);
+      return;
+    }
+    try {
+      const response = await axios.get(`${API}/tenders/${id}/similar`, { params: { limit: 5 } });
+      setSimilar((current) => ({ ...current, [id]: response.data.results }));
+    } catch (error) {
+      console.error('Error fetching similar tenders:', error);
+    }
+  };
+
   if (loading) {
     return (
       <div className="loading" data-testid="tenders-loading">
@@ -61,10 +91,40 @@ const TendersPage = () => {
               <div style={{ marginTop: '1rem', fontSize: '0.75rem', color: '#a0aec0' }}>
                 ID: {tender.tender_id}
               </div>
+              <button
+                onClick={() => toggleSimilar(tender.id)}
+                style={{ marginTop: '0.75rem', background: 'none', border: 'none', color: '#667eea', cursor: 'pointer', padding: 0, fontSize: '0.875rem' }}
+                data-testid={`similar-btn-${index}`}
+              >
+                {similar[tender.id] ? 'Hide similar' : 'More like this'}
+              </button>
+              {similar[tender.id] && (
+                <ul style={{ marginTop: '0.5rem', paddingLeft: '1rem', fontSize: '0.8rem', color: '#4a5568' }} data-testid={`similar-list-${index}`}>
+                  {similar[tender.id].length === 0 && <li>No similar tenders yet</li>}
+                  {similar[tender.id].map((item) => (
+                    <li key={item.id}>
+                      {item.title} ({(item.similarity * 100).toFixed(0)}%)
+                    </li>
+                  ))}
+                </ul>
+              )}
             </div>
           ))}
         </div>
       )}
+
+      {nextCursor && (
+        <div style={{ textAlign: 'center', marginTop: '2rem' }}>
+          <button
+            className="upload-button"
+            onClick={fetchMore}
+            disabled={loadingMore}
+            data-testid="load-more-btn"
+          >
+            {loadingMore ? 'Loading...' : 'Load More'}
+          </button>
+        </div>
+      )}
     </div>
   );
 };
@@ -8,6 +8,7 @@ const UploadPage = () => {
   const [result, setResult] = useState(null);
   const [error, setError] = useState(null);
   const [dragOver, setDragOver] = useState(false);
+  const [jobStage, setJobStage] = useState(null);
   const fileInputRef = useRef(null);
 
   const handleFileChange = (e) => {
@@ -41,6 +42,16 @@ const UploadPage = () => {
     }
   };
 
+  const waitForJob = async (jobId) => {
+    for (;;) {
+      const { data: job } = await axios.get(`${API}/jobs/${jobId}`);
+      if (job.status === 'completed') return job.result;
+      if (job.status === 'failed') throw new Error(job.error || 'Ingestion failed');
+      setJobStage(job.current_stage);
+      await new Promise((resolve) => setTimeout(resolve, 1000));
+    }
+  };
+
   const handleUpload = async () => {
     if (!file) return;
 
@@ -57,15 +68,16 @@ const UploadPage = () => {
           'Content-Type': 'multipart/form-data',
         },
       });
-      setResult(response.data);
+      setResult(await waitForJob(response.data.job_id));
       setFile(null);
       if (fileInputRef.current) {
         fileInputRef.current.value = '';
       }
     } catch (err) {
-      setError(err.response?.data?.detail || 'Upload failed. Please try again.');
+      setError(err.response?.data?.detail || err.message || 'Upload failed. Please try again.');
     } finally {
       setUploading(false);
+      setJobStage(null);
     }
   };
 
@@ -110,7 +122,7 @@ const UploadPage = () => {
           disabled={!file || uploading}
           data-testid="upload-button"
         >
-          {uploading ? 'Processing...' : 'Upload & Process'}
+          {uploading ? (jobStage ? `Processing (${jobStage})...` : 'Processing...') : 'Upload & Process'}
         </button>
 
         <div style={{ marginTop: '1rem' }}>
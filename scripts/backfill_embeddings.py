@@ -0,0 +1,65 @@
+"""Embed every cleaned tender that has no vector yet, using a pool of processes.
+
+Each worker process loads its own copy of the model and is limited to
+--threads intra-op threads, so --workers x --threads should roughly match the
+physical cores. Chunks are committed as they finish. If the run is
+interrupted, running it again continues with the rows that are still NULL.
+
+With --clean-first, unprocessed raw_tenders rows are first cleaned without
+embeddings, so the whole ingest backlog goes through the parallel path.
+
+    python scripts/backfill_embeddings.py --workers 8 --threads 2 --clean-first
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / 'backend'))
+
+import server  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=server.BACKFILL_WORKERS)
+    parser.add_argument('--threads', type=int, default=server.BACKFILL_THREADS_PER_WORKER)
+    parser.add_argument('--chunk-rows', type=int, default=server.BACKFILL_CHUNK_ROWS)
+    parser.add_argument('--clean-first', action='store_true',
+                        help='clean unprocessed raw_tenders rows without embeddings before backfilling')
+    parser.add_argument('--output', default=None, help='write the JSON report to this file')
+    args = parser.parse_args()
+
+    # Every writer thread holds a connection while its chunk is encoded
+    server.init_db_pool(max_size=max(server.DB_POOL_MAX_SIZE, args.workers + 2))
+    # Encode with the active embedding version's model, not the env default
+    server.load_active_embedding_version()
+    # With VECTOR_SEARCH_BACKEND=numpy the new vectors also go to the shared store
+    server.init_vector_backend(sync=False)
+    last_report = [0.0]
+
+    def progress(stats):
+        if time.perf_counter() - last_report[0] >= 10:
+            last_report[0] = time.perf_counter()
+            print(f"   {stats['rows_embedded']}/{stats['pending_at_start']} rows, {stats['rows_per_sec']} rows/s")
+
+    try:
+        if args.clean_first:
+            print("🧹 Cleaning unprocessed raw rows without embeddings")
+            cleaned = server.clean_and_normalize(embed=False)
+            print(f"   {cleaned} rows cleaned")
+        print(f"🧠 Backfilling embeddings with {args.workers} workers x {args.threads} threads")
+        report = server.run_embedding_backfill(args.workers, args.threads, args.chunk_rows, progress=progress)
+    finally:
+        server.close_db_pool()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Recall vs latency of the pgvector ANN index against exact search.
+
+Loads a synthetic clustered corpus of unit vectors into a scratch table
+(ann_bench_vectors), builds the same index the API builds for
+cleaned_tenders, and sweeps hnsw.ef_search (or ivfflat.probes). Each setting
+is compared with an exact sequential scan. The scratch table is dropped
+afterwards unless --keep is given, so a large corpus only has to be loaded
+once.
+
+With several --storage modes the index is rebuilt for each one (halfvec and
+binary search re-rank candidates exactly, as the API does) and the report
+includes the index size relative to full-precision storage.
+
+    python scripts/bench_ann_recall.py --rows 1000000 --index hnsw --storage full halfvec binary
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import psycopg2
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+load_dotenv(ROOT_DIR / 'backend' / '.env')
+sys.path.insert(0, str(ROOT_DIR / 'backend'))
+
+from server import VECTOR_RERANK_FACTOR, vector_candidates_sql, vector_index_sql  # noqa: E402
+
+TABLE = 'ann_bench_vectors'
+DIM = 384
+
+
+def synthetic_vectors(rng, count, centers, noise=0.35):
+    # Clustered data is closer to real embeddings than uniform noise, where every
+    # point is roughly equidistant and ANN recall numbers are meaningless
+    labels = rng.integers(0, len(centers), size=count)
+    vectors = centers[labels] + noise * rng.standard_normal((count, DIM)).astype(np.float32) / np.sqrt(DIM)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def load_corpus(conn, rows, centers, seed, chunk=20000):
+    rng = np.random.default_rng(seed)
+    cur = conn.cursor()
+    cur.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    cur.execute(f"CREATE TABLE {TABLE} (id BIGINT PRIMARY KEY, embedding vector({DIM}))")
+    started = time.perf_counter()
+    for start in range(0, rows, chunk):
+        vectors = synthetic_vectors(rng, min(chunk, rows - start), centers)
+        buffer = io.StringIO()
+        for offset, vector in enumerate(vectors):
+            buffer.write(f"{start + offset}\t[{','.join(f'{x:.6f}' for x in vector)}]\n")
+        buffer.seek(0)
+        cur.copy_expert(f"COPY {TABLE} (id, embedding) FROM STDIN", buffer)
+        conn.commit()
+    cur.close()
+    return time.perf_counter() - started
+
+
+def run_queries(cur, queries, k, storage='full', factor=None):
+    sql = vector_candidates_sql(TABLE, '', '%(qvec)s', '%(k)s', columns='id', storage=storage, factor=factor)
+    results, latencies = [], []
+    for query in queries:
+        literal = f"[{','.join(f'{x:.6f}' for x in query)}]"
+        started = time.perf_counter()
+        cur.execute(sql, {'qvec': literal, 'k': k})
+        results.append({row[0] for row in cur.fetchall()})
+        latencies.append(time.perf_counter() - started)
+    return results, latencies
+
+
+def latency_summary(latencies):
+    ordered = sorted(latencies)
+    return {
+        "p50_ms": round(statistics.median(ordered) * 1000, 2),
+        "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--index', choices=['hnsw', 'ivfflat'], default='hnsw')
+    parser.add_argument('--m', type=int, default=16)
+    parser.add_argument('--ef-construction', type=int, default=64)
+    parser.add_argument('--lists', type=int, default=1000)
+    parser.add_argument('--storage', nargs='+', choices=['full', 'halfvec', 'binary'], default=['full'])
+    parser.add_argument('--rerank-factor', type=int, default=None,
+                        help='candidates per result for compact storage (default: server setting)')
+    parser.add_argument('--sweep', type=int, nargs='+', default=None,
+                        help='ef_search values (hnsw) or probes values (ivfflat) to test')
+    parser.add_argument('--reuse', action='store_true', help='reuse an existing scratch table')
+    parser.add_argument('--keep', action='store_true', help='keep the scratch table afterwards')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', default=None, help='write the JSON report to this file')
+    args = parser.parse_args()
+    sweep = args.sweep or ([10, 20, 40, 80, 160, 320] if args.index == 'hnsw' else [1, 5, 10, 20, 50, 100])
+
+    rng = np.random.default_rng(args.seed)
+    centers = rng.standard_normal((256, DIM)).astype(np.float32)
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    queries = synthetic_vectors(np.random.default_rng(args.seed + 1), args.queries, centers)
+
+    conn = psycopg2.connect(os.environ['POSTGRES_URL'])
+    cur = conn.cursor()
+    report = {"rows": args.rows, "k": args.k, "queries": args.queries, "index": args.index}
+    try:
+        if not args.reuse:
+            print(f"📥 Loading {args.rows} synthetic vectors into {TABLE}")
+            report['load_seconds'] = round(load_corpus(conn, args.rows, centers, args.seed), 1)
+
+        cur.execute("SET enable_indexscan = off")
+        exact, exact_latencies = run_queries(cur, queries, args.k)
+        cur.execute("RESET enable_indexscan")
+        report['exact'] = latency_summary(exact_latencies)
+
+        setting = 'hnsw.ef_search' if args.index == 'hnsw' else 'ivfflat.probes'
+        report['storage'] = {}
+        for storage in args.storage:
+            factor = args.rerank_factor or VECTOR_RERANK_FACTOR[storage]
+            print(f"🏗️  Building {args.index} index ({storage})")
+            started = time.perf_counter()
+            cur.execute(f"DROP INDEX IF EXISTS {TABLE}_embedding_idx")
+            cur.execute(vector_index_sql(args.index, m=args.m, ef_construction=args.ef_construction,
+                                         lists=args.lists, table=TABLE, name=f"{TABLE}_embedding_idx",
+                                         storage=storage))
+            conn.commit()
+            result = {"rerank_factor": factor if storage != 'full' else None,
+                      "build_seconds": round(time.perf_counter() - started, 1)}
+            cur.execute("SELECT pg_relation_size(%s)", (f"{TABLE}_embedding_idx",))
+            result['index_bytes'] = cur.fetchone()[0]
+
+            result['sweep'] = []
+            for value in sweep:
+                # HNSW returns at most ef_search rows, so it has to cover the re-rank pool
+                effective = max(value, args.k * factor) if args.index == 'hnsw' and storage != 'full' else value
+                cur.execute(f"SET {setting} = {int(effective)}")
+                approx, latencies = run_queries(cur, queries, args.k, storage, factor)
+                recall = statistics.mean(len(a & e) / args.k for a, e in zip(approx, exact))
+                point = {setting: effective, "recall": round(recall, 4), **latency_summary(latencies)}
+                result['sweep'].append(point)
+                print(f"   {storage} {setting}={effective}: recall@{args.k}={point['recall']} p50={point['p50_ms']}ms")
+            report['storage'][storage] = result
+
+        if 'full' in report['storage']:
+            full_bytes = report['storage']['full']['index_bytes']
+            for result in report['storage'].values():
+                result['index_size_ratio'] = round(result['index_bytes'] / full_bytes, 3) if full_bytes else None
+    finally:
+        if not args.keep:
+            cur.execute(f"DROP TABLE IF EXISTS {TABLE}")
+            conn.commit()
+        cur.close()
+        conn.close()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
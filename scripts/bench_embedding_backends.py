@@ -0,0 +1,105 @@
+"""Compare embedding inference backends against the default torch fp32 path.
+
+Every backend embeds the same corpus (tender titles and descriptions built
+from sample_data.csv, varied so no two texts are identical). The script
+reports model load time, bulk throughput, single-query latency, and the
+cosine similarity of each vector to the torch reference. A backend passes
+when its minimum cosine reaches EMBEDDING_BACKEND_TOLERANCE in server.py.
+
+    python scripts/bench_embedding_backends.py --texts 5000 --backends torch onnx onnx-int8 torch-int8
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / 'backend'))
+
+import server  # noqa: E402
+
+
+def build_corpus(count):
+    sample = pd.read_csv(ROOT_DIR / 'sample_data.csv').fillna('')
+    base = [f"{row.title}. {row.description}" for row in sample.itertuples()]
+    return [f"{base[i % len(base)]} Lot {i} for {sample['location'].iloc[i % len(sample)]}" for i in range(count)]
+
+
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+
+def run_backend(backend, texts, batch_size, queries):
+    provider = server.EmbeddingModelProvider(server.EMBEDDING_MODEL_NAME, 'cpu', backend)
+    model = provider.get()
+    model.encode(texts[:batch_size], batch_size=batch_size)  # warm up kernels and allocator
+
+    started = time.perf_counter()
+    vectors = model.encode(texts, batch_size=batch_size)
+    elapsed = time.perf_counter() - started
+
+    latencies = []
+    for text in texts[:queries]:
+        query_started = time.perf_counter()
+        model.encode(text)
+        latencies.append(time.perf_counter() - query_started)
+    return vectors, {
+        "load_seconds": provider.load_seconds,
+        "texts_per_sec": round(len(texts) / elapsed, 1),
+        "query_p50_ms": round(statistics.median(latencies) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--texts', type=int, default=2000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--batch-size', type=int, default=server.EMBEDDING_BATCH_SIZE)
+    parser.add_argument('--backends', nargs='+', default=['torch', 'onnx', 'onnx-int8', 'torch-int8'],
+                        choices=sorted(server.EMBEDDING_BACKEND_TOLERANCE))
+    parser.add_argument('--output', default=None, help='write the JSON report to this file')
+    args = parser.parse_args()
+
+    texts = build_corpus(args.texts)
+    print("📏 Reference: torch fp32")
+    reference, reference_stats = run_backend('torch', texts, args.batch_size, args.queries)
+    reference = normalize(reference)
+
+    report = {"model": server.EMBEDDING_MODEL_NAME, "texts": len(texts), "batch_size": args.batch_size,
+              "backends": {}}
+    for backend in args.backends:
+        if backend == 'torch':
+            stats = reference_stats
+            cosines = np.ones(len(texts))
+        else:
+            print(f"⚙️  {backend}")
+            try:
+                vectors, stats = run_backend(backend, texts, args.batch_size, args.queries)
+            except Exception as e:
+                report['backends'][backend] = {"error": str(e)}
+                continue
+            cosines = np.sum(normalize(vectors) * reference, axis=1)
+        tolerance = server.EMBEDDING_BACKEND_TOLERANCE[backend]
+        report['backends'][backend] = {
+            **stats,
+            "speedup": round(stats['texts_per_sec'] / reference_stats['texts_per_sec'], 2),
+            "cosine_mean": round(float(cosines.mean()), 5),
+            "cosine_min": round(float(cosines.min()), 5),
+            "tolerance": tolerance,
+            "within_tolerance": bool(cosines.min() >= tolerance),
+        }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
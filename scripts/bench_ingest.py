@@ -0,0 +1,77 @@
+"""Compare the bulk COPY ingest path with the legacy per-row INSERT loop.
+
+Both paths run against the database in POSTGRES_URL inside a transaction that is
+rolled back afterwards, so raw_tenders is left untouched.
+
+    python scripts/bench_ingest.py --rows 200000
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / 'backend'))
+
+import server  # noqa: E402
+
+
+def build_frame(rows):
+    sample = pd.read_csv(ROOT_DIR / 'sample_data.csv')
+    repeats = rows // len(sample) + 1
+    df = pd.concat([sample] * repeats, ignore_index=True).iloc[:rows].copy()
+    df['tender_id'] = [f"BENCH-{i:09d}" for i in range(len(df))]
+    return df
+
+
+def bulk_path(cur, df):
+    return server.copy_raw_frame(cur, server.prepare_raw_frame(df, 'bench'))
+
+
+def row_path(cur, df):
+    return server.insert_raw_rows(cur, df, 'bench')
+
+
+def time_path(conn, name, fn, df):
+    cur = conn.cursor()
+    started = time.perf_counter()
+    inserted = fn(cur, df)
+    elapsed = time.perf_counter() - started
+    conn.rollback()
+    cur.close()
+    return {
+        "mode": name,
+        "rows": inserted,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(inserted / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--skip-row-loop', action='store_true',
+                        help='only time the bulk path (the row loop is slow on large inputs)')
+    args = parser.parse_args()
+
+    df = build_frame(args.rows)
+    server.init_db_pool()
+    try:
+        with server.get_db_connection() as conn:
+            results = [time_path(conn, 'bulk', bulk_path, df)]
+            if not args.skip_row_loop:
+                results.append(time_path(conn, 'row', row_path, df))
+    finally:
+        server.close_db_pool()
+
+    if len(results) == 2 and results[1]['seconds'] > 0:
+        speedup = results[1]['seconds'] / results[0]['seconds'] if results[0]['seconds'] else None
+        print(f"📊 Bulk speedup over row loop: {speedup:.1f}x" if speedup else "📊 Bulk path too fast to measure")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
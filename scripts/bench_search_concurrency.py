@@ -0,0 +1,146 @@
+"""Measure /api/search latency on a running server, idle and during a large upload.
+
+The script first records a baseline with only search traffic. It then starts a
+large /api/ingest upload and keeps the same search load running until the
+upload finishes. p50/p95/p99 are reported for both phases.
+
+    python scripts/bench_search_concurrency.py --base-url http://localhost:8001 --rows 100000
+"""
+import argparse
+import io
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+import requests
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+QUERIES = [
+    "cloud infrastructure upgrade",
+    "smart city iot platform",
+    "hospital medical equipment",
+    "road construction and maintenance",
+    "cybersecurity audit services",
+]
+
+
+def build_upload(rows):
+    sample = pd.read_csv(ROOT_DIR / 'sample_data.csv')
+    df = pd.concat([sample] * (rows // len(sample) + 1), ignore_index=True).iloc[:rows].copy()
+    df['tender_id'] = [f"LOAD-{int(time.time())}-{i:09d}" for i in range(len(df))]
+    # Vary descriptions so the embedding cache cannot absorb the whole upload
+    df['description'] = df['description'] + ' ref ' + df['tender_id']
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False)
+    return buffer.getvalue().encode('utf-8')
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(latencies, errors):
+    if not latencies:
+        return {"requests": 0, "errors": errors}
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 1),
+    }
+
+
+def search_load(api_url, concurrency, stop):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def worker(offset):
+        session = requests.Session()
+        i = offset
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                response = session.post(f"{api_url}/search",
+                                        json={"query": QUERIES[i % len(QUERIES)], "limit": 5}, timeout=60)
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - started
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors[0] += 1
+            i += 1
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for n in range(concurrency):
+            pool.submit(worker, n)
+        stop.wait()
+    return latencies, errors[0]
+
+
+def run_phase(api_url, concurrency, duration=None, during=None):
+    stop = threading.Event()
+    result = {}
+
+    def background():
+        if during is not None:
+            result['upload'] = during()
+        else:
+            time.sleep(duration)
+        stop.set()
+
+    thread = threading.Thread(target=background)
+    thread.start()
+    latencies, errors = search_load(api_url, concurrency, stop)
+    thread.join()
+    result['search'] = summarize(latencies, errors)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--base-url', default='http://localhost:8001')
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--baseline-seconds', type=float, default=15)
+    args = parser.parse_args()
+    api_url = f"{args.base_url}/api"
+
+    payload = build_upload(args.rows)
+
+    def upload():
+        started = time.perf_counter()
+        response = requests.post(f"{api_url}/ingest",
+                                 files={'file': ('load.csv', payload, 'text/csv')}, timeout=3600)
+        response.raise_for_status()
+        job_id = response.json()['job_id']
+        while True:
+            job = requests.get(f"{api_url}/jobs/{job_id}", timeout=30).json()
+            if job['status'] in ('completed', 'failed'):
+                break
+            time.sleep(0.5)
+        return {"job_status": job['status'], "stages": job['stages'],
+                "seconds": round(time.perf_counter() - started, 1)}
+
+    print(f"🔍 Baseline: {args.concurrency} concurrent searchers for {args.baseline_seconds}s")
+    baseline = run_phase(api_url, args.concurrency, duration=args.baseline_seconds)
+    print(f"📤 Under load: uploading {args.rows} rows while searching")
+    loaded = run_phase(api_url, args.concurrency, during=upload)
+
+    print(json.dumps({"rows": args.rows, "concurrency": args.concurrency,
+                      "baseline": baseline, "during_ingest": loaded}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Time module import and server startup for each embedding model load mode.
+
+For every mode in --modes the script measures a cold `import server` in a
+fresh interpreter, then launches uvicorn and records how long it takes until
+/api/health/live and /api/health/ready answer 200. Pass --history to append
+each run to a JSON-lines file so regressions show up over time.
+
+    python scripts/bench_startup.py --modes background eager --history startup_history.jsonl
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import requests
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+BACKEND_DIR = ROOT_DIR / 'backend'
+
+
+def time_import(mode, repeats):
+    env = dict(os.environ, EMBEDDING_MODEL_LOAD=mode)
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'import server'], cwd=BACKEND_DIR, env=env, check=True)
+        samples.append(time.perf_counter() - started)
+    return round(statistics.median(samples), 3)
+
+
+def wait_for(url, deadline):
+    while time.perf_counter() < deadline:
+        try:
+            if requests.get(url, timeout=2).status_code == 200:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.05)
+    return False
+
+
+def time_server(mode, port, timeout):
+    env = dict(os.environ, EMBEDDING_MODEL_LOAD=mode)
+    api_url = f"http://127.0.0.1:{port}/api"
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-m', 'uvicorn', 'server:app', '--port', str(port)],
+                               cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = started + timeout
+        live = wait_for(f"{api_url}/health/live", deadline)
+        live_seconds = time.perf_counter() - started
+        ready = live and wait_for(f"{api_url}/health/ready", deadline)
+        ready_seconds = time.perf_counter() - started
+        report = requests.get(f"{api_url}/health/ready", timeout=5).json() if live else {}
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    return {
+        "live_seconds": round(live_seconds, 3) if live else None,
+        "ready_seconds": round(ready_seconds, 3) if ready else None,
+        "server_timings": report.get('startup'),
+        "model": report.get('checks', {}).get('model'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modes', nargs='+', default=['background', 'lazy', 'eager'],
+                        choices=['background', 'lazy', 'eager'])
+    parser.add_argument('--import-repeats', type=int, default=3)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--timeout', type=float, default=300)
+    parser.add_argument('--history', default=None, help='append results to this JSON-lines file')
+    args = parser.parse_args()
+
+    report = {"timestamp": datetime.now(timezone.utc).isoformat(), "python": sys.version.split()[0], "modes": {}}
+    for mode in args.modes:
+        print(f"⏱️  {mode}: timing import and startup")
+        report['modes'][mode] = {"import_seconds": time_import(mode, args.import_repeats),
+                                 **time_server(mode, args.port, args.timeout)}
+
+    if args.history:
+        with open(args.history, 'a') as history:
+            history.write(json.dumps(report) + '\n')
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
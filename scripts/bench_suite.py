@@ -0,0 +1,175 @@
+"""End-to-end benchmark of a running server on synthetic data.
+
+Generates (or reuses) a synthetic tender CSV and uploads it through
+/api/ingest. From the job's stage timings it records parse, raw insert and
+clean/embed throughput, plus the quality and health stage times. It then
+times a full POST /api/validate and measures /api/search latency at each
+--concurrency level. The report is written as JSON to --output-dir, tagged
+with the git commit, so runs can be compared with --compare.
+
+Point it at a server backed by a local Postgres with pgvector:
+
+    python scripts/bench_suite.py --base-url http://localhost:8001 --rows 100000 --concurrency 1 8 32
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import requests
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / 'scripts'))
+
+from bench_search_concurrency import run_phase  # noqa: E402
+from generate_tenders import write_csv  # noqa: E402
+
+# Compared by --compare: (path in the report, True when higher is better)
+KEY_METRICS = [
+    (('ingest', 'raw_insert_rows_per_sec'), True),
+    (('ingest', 'clean_rows_per_sec'), True),
+    (('ingest', 'total_seconds'), False),
+    (('quality', 'validate_seconds'), False),
+]
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def multipart_body(path, boundary, chunk_bytes=1 << 20):
+    # Streams the file as multipart/form-data; requests would otherwise build
+    # the whole body in memory, which does not work for multi-GB uploads
+    yield (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{path.name}"\r\n'
+           'Content-Type: text/csv\r\n\r\n').encode()
+    with open(path, 'rb') as handle:
+        while chunk := handle.read(chunk_bytes):
+            yield chunk
+    yield f'\r\n--{boundary}--\r\n'.encode()
+
+
+def wait_until_ready(api_url, timeout):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if requests.get(f"{api_url}/health/ready", timeout=5).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(1)
+    raise SystemExit(f"Server at {api_url} was not ready after {timeout}s")
+
+
+def rate(info):
+    return round(info['rows'] / info['seconds'], 1) if info.get('seconds') else None
+
+
+def run_ingest(api_url, path):
+    boundary = uuid.uuid4().hex
+    started = time.perf_counter()
+    response = requests.post(f"{api_url}/ingest", data=multipart_body(path, boundary),
+                             headers={'Content-Type': f'multipart/form-data; boundary={boundary}'}, timeout=None)
+    response.raise_for_status()
+    upload_seconds = time.perf_counter() - started
+    job_id = response.json()['job_id']
+    while True:
+        job = requests.get(f"{api_url}/jobs/{job_id}", timeout=30).json()
+        if job['status'] in ('completed', 'failed'):
+            break
+        time.sleep(1)
+    if job['status'] != 'completed':
+        raise SystemExit(f"Ingestion job {job_id} failed: {job['error']}")
+    stages = job['stages']
+    return {
+        "job_id": job_id,
+        "upload_seconds": round(upload_seconds, 1),
+        "total_seconds": round(time.perf_counter() - started, 1),
+        "rows": stages['raw_insert']['rows'],
+        "parse_rows_per_sec": rate(stages['parse']),
+        "raw_insert_rows_per_sec": rate(stages['raw_insert']),
+        "clean_rows_per_sec": rate(stages['clean']),
+        "quality_seconds": stages['quality']['seconds'],
+        "health_seconds": stages['health']['seconds'],
+        "embedding": job['result']['embedding'],
+    }
+
+
+def compare(report, baseline):
+    print(f"📊 Compared with {baseline.get('timestamp')} ({baseline.get('git_commit')}):")
+    for path, higher_is_better in KEY_METRICS:
+        now, before = report, baseline
+        for key in path:
+            now, before = (now or {}).get(key), (before or {}).get(key)
+        if now is None or not before:
+            continue
+        change = (now - before) / before * 100
+        better = change >= 0 if higher_is_better else change <= 0
+        print(f"   {'.'.join(path)}: {before} -> {now} ({change:+.1f}%) {'✅' if better else '⚠️'}")
+    for level, search in report['search'].items():
+        before = baseline.get('search', {}).get(level, {}).get('p99_ms')
+        if before and search.get('p99_ms'):
+            print(f"   search c={level} p99_ms: {before} -> {search['p99_ms']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--base-url', default='http://localhost:8001')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--csv', default=None, help='reuse an existing synthetic CSV instead of generating one')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--search-seconds', type=float, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output-dir', default=str(ROOT_DIR / 'bench_results'))
+    parser.add_argument('--compare', default=None, help='earlier report to compare the key numbers with')
+    parser.add_argument('--ready-timeout', type=float, default=300)
+    args = parser.parse_args()
+    api_url = f"{args.base_url}/api"
+
+    report = {"timestamp": datetime.now(timezone.utc).isoformat(), "git_commit": git_commit(),
+              "base_url": args.base_url}
+    wait_until_ready(api_url, args.ready_timeout)
+
+    if args.csv:
+        path = Path(args.csv)
+    else:
+        path = Path(args.output_dir) / f"synthetic-{args.rows}.csv"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # A fresh prefix per run makes every row an insert rather than an upsert of a previous run
+        prefix = f"BENCH{int(time.time())}"
+        print(f"🧪 Generating {args.rows} synthetic tenders")
+        report['generate_seconds'] = round(write_csv(path, args.rows, seed=args.seed, prefix=prefix), 1)
+
+    print(f"📤 Ingesting {path}")
+    report['ingest'] = run_ingest(api_url, path)
+
+    print("🔎 Running a full data-quality validation")
+    started = time.perf_counter()
+    requests.post(f"{api_url}/validate", timeout=None).raise_for_status()
+    report['quality'] = {"validate_seconds": round(time.perf_counter() - started, 2)}
+
+    report['search'] = {}
+    for level in args.concurrency:
+        print(f"🔍 Search with {level} concurrent clients for {args.search_seconds}s")
+        report['search'][str(level)] = run_phase(api_url, level, duration=args.search_seconds)['search']
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output = output_dir / f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}-{report['ingest']['rows']}.json"
+    output.write_text(json.dumps(report, indent=2))
+    print(json.dumps(report, indent=2))
+    print(f"💾 Saved {output}")
+
+    if args.compare:
+        compare(report, json.loads(Path(args.compare).read_text()))
+
+
+if __name__ == "__main__":
+    main()
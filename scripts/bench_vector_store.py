@@ -0,0 +1,110 @@
+"""Benchmark the in-process NumPy vector store on synthetic embeddings.
+
+Builds a store of --rows clustered random vectors for each --dtype in a
+temporary directory. It reports append throughput, single-query p50/p99
+latency, batched query throughput and filtered (allowed-list) latency. For
+float16, it also reports the top-k overlap with float32. No database or
+model is needed.
+
+    python scripts/bench_vector_store.py --rows 1000000 --dtypes float32 float16
+"""
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / 'backend'))
+
+from vector_store import NumpyVectorStore  # noqa: E402
+
+DIM = 384
+
+
+def synthetic_vectors(rows, seed, clusters=50):
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, DIM)).astype(np.float32)
+    for start in range(0, rows, 100000):
+        count = min(100000, rows - start)
+        yield start, centres[rng.integers(0, clusters, size=count)] + rng.normal(scale=0.5, size=(count, DIM)).astype(np.float32)
+
+
+def percentile(samples, q):
+    return round(float(np.percentile(samples, q)) * 1000, 3)
+
+
+def run_dtype(dtype, args, queries, directory):
+    store = NumpyVectorStore(Path(directory) / dtype, DIM, dtype=dtype)
+    started = time.perf_counter()
+    for start, vectors in synthetic_vectors(args.rows, args.seed):
+        store.upsert([f"T-{start + i}" for i in range(len(vectors))], vectors)
+    append_seconds = time.perf_counter() - started
+
+    latencies, results = [], []
+    for query in queries:
+        query_started = time.perf_counter()
+        results.append(store.search(query, args.k))
+        latencies.append(time.perf_counter() - query_started)
+
+    started = time.perf_counter()
+    store.search_many(queries, args.k)
+    batch_seconds = time.perf_counter() - started
+
+    allowed = [f"T-{i}" for i in range(0, args.rows, max(1, int(1 / args.filter_fraction)))]
+    filtered = []
+    for query in queries[:50]:
+        query_started = time.perf_counter()
+        store.search(query, args.k, allowed=allowed)
+        filtered.append(time.perf_counter() - query_started)
+
+    return results, {
+        "append_rows_per_sec": round(args.rows / append_seconds, 1),
+        "matrix_mb": round(store.stats()['matrix_bytes'] / 1e6, 1),
+        "query_p50_ms": percentile(latencies, 50),
+        "query_p99_ms": percentile(latencies, 99),
+        "batch_queries_per_sec": round(len(queries) / batch_seconds, 1),
+        "filtered_p50_ms": round(statistics.median(filtered) * 1000, 3),
+        "filtered_rows": len(allowed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--dtypes', nargs='+', default=['float32', 'float16'], choices=['float32', 'float16'])
+    parser.add_argument('--filter-fraction', type=float, default=0.01,
+                        help='share of rows passed as the allowed list in the filtered test')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None, help='write the JSON report to this file')
+    args = parser.parse_args()
+
+    queries = next(synthetic_vectors(args.queries, args.seed + 1))[1]
+    report = {"rows": args.rows, "dim": DIM, "k": args.k, "dtypes": {}}
+    reference = None
+    with tempfile.TemporaryDirectory() as directory:
+        for dtype in args.dtypes:
+            print(f"⚙️  {dtype}: building {args.rows} rows")
+            results, stats = run_dtype(dtype, args, queries, directory)
+            if reference is None:
+                reference = results
+            else:
+                overlap = [len({key for key, _ in a} & {key for key, _ in b}) / args.k
+                           for a, b in zip(reference, results)]
+                stats['topk_overlap_with_' + args.dtypes[0]] = round(float(np.mean(overlap)), 4)
+            report['dtypes'][dtype] = stats
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
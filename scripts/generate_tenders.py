@@ -0,0 +1,124 @@
+"""Generate synthetic tenders with the sample_data.csv schema, at any scale.
+
+Titles and descriptions are drawn from per-category vocabularies seeded from
+sample_data.csv, so embeddings cluster by category like real data. Values are
+log-normal with a few extreme outliers, and small fractions of rows carry the
+problems the quality checks look for: blank descriptions, invalid currencies,
+deadlines before the publish date, and reworded republications of an earlier
+tender under a new ID. Rows are written in chunks, so 10M rows need only one
+chunk of memory.
+
+    python scripts/generate_tenders.py --rows 1000000 --output /tmp/tenders_1m.csv
+"""
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+COLUMNS = ['tender_id', 'title', 'description', 'organization', 'category', 'value', 'currency',
+           'published_date', 'deadline', 'location', 'status']
+FILLER = ['including', 'with', 'for', 'across', 'covering', 'supporting', 'and', 'through', 'under', 'within']
+EXTRA_TERMS = ['maintenance', 'support', 'training', 'licensing', 'integration', 'migration', 'audit',
+               'consulting', 'procurement', 'deployment', 'monitoring', 'upgrade', 'framework', 'services']
+
+
+def load_vocabulary():
+    sample = pd.read_csv(ROOT_DIR / 'sample_data.csv').fillna('')
+    vocabulary = {}
+    for row in sample.itertuples():
+        words = [w.strip('.,()').lower() for w in f"{row.title} {row.description}".split()]
+        vocabulary[row.category] = sorted({w for w in words if len(w) > 3} | set(EXTRA_TERMS))
+    return sample, vocabulary
+
+
+def generate_chunks(rows, seed=42, chunk_rows=100000, null_rate=0.01, invalid_rate=0.005,
+                    near_duplicate_rate=0.01, prefix='SYN'):
+    rng = np.random.default_rng(seed)
+    sample, vocabulary = load_vocabulary()
+    categories = list(vocabulary)
+    organizations = sample['organization'].unique()
+    locations = sample['location'].unique()
+    epoch = np.datetime64('2024-01-01')
+    recent = []
+
+    for start in range(0, rows, chunk_rows):
+        count = min(chunk_rows, rows - start)
+        category_index = rng.integers(0, len(categories), size=count)
+        titles, descriptions = [], []
+        for i in category_index:
+            words = vocabulary[categories[i]]
+            title_words = rng.choice(words, size=rng.integers(3, 6), replace=False)
+            body = rng.choice(words, size=rng.integers(12, 24))
+            glue = rng.choice(FILLER, size=len(body))
+            titles.append(' '.join(title_words).title())
+            # Interleave content words with filler, dropping the trailing filler word
+            descriptions.append(' '.join(np.column_stack([body, glue]).ravel()[:-1]))
+
+        # Republish a recent tender with a couple of words swapped, under a new ID
+        for i in np.flatnonzero(rng.random(count) < near_duplicate_rate):
+            if recent:
+                words = recent[rng.integers(0, len(recent))].split()
+                for _ in range(2):
+                    words[rng.integers(0, len(words))] = str(rng.choice(EXTRA_TERMS))
+                descriptions[i] = ' '.join(words)
+        recent = (recent + descriptions[:1000])[-5000:]
+
+        published = epoch + rng.integers(0, 900, size=count).astype('timedelta64[D]')
+        deadline = published + rng.integers(14, 120, size=count).astype('timedelta64[D]')
+        values = np.round(rng.lognormal(mean=14, sigma=1.2, size=count), 2)
+        values[rng.random(count) < 0.0005] *= 10000
+        currency = rng.choice(['USD', 'EUR', 'GBP', 'INR'], size=count, p=[0.7, 0.15, 0.1, 0.05]).astype(object)
+
+        invalid = rng.random(count) < invalid_rate
+        currency[invalid] = 'usd'
+        deadline[invalid] = published[invalid] - np.timedelta64(5, 'D')
+
+        frame = pd.DataFrame({
+            'tender_id': [f"{prefix}-{start + i:09d}" for i in range(count)],
+            'title': titles,
+            'description': descriptions,
+            'organization': rng.choice(organizations, size=count),
+            'category': [categories[i] for i in category_index],
+            'value': values,
+            'currency': currency,
+            'published_date': published.astype(str),
+            'deadline': deadline.astype(str),
+            'location': rng.choice(locations, size=count),
+            'status': rng.choice(['Open', 'Closed', 'Awarded'], size=count, p=[0.6, 0.25, 0.15]),
+        }, columns=COLUMNS)
+        frame.loc[rng.random(count) < null_rate, 'description'] = ''
+        yield frame
+
+
+def write_csv(path, rows, **kwargs):
+    started = time.perf_counter()
+    with open(path, 'w', newline='') as handle:
+        for index, frame in enumerate(generate_chunks(rows, **kwargs)):
+            frame.to_csv(handle, index=False, header=index == 0)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--output', required=True)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-rows', type=int, default=100000)
+    parser.add_argument('--near-duplicate-rate', type=float, default=0.01)
+    parser.add_argument('--null-rate', type=float, default=0.01)
+    parser.add_argument('--invalid-rate', type=float, default=0.005)
+    parser.add_argument('--prefix', default='SYN', help='tender_id prefix; vary it to avoid upserting earlier runs')
+    args = parser.parse_args()
+
+    seconds = write_csv(args.output, args.rows, seed=args.seed, chunk_rows=args.chunk_rows,
+                        null_rate=args.null_rate, invalid_rate=args.invalid_rate,
+                        near_duplicate_rate=args.near_duplicate_rate, prefix=args.prefix)
+    size_mb = Path(args.output).stat().st_size / 1e6
+    print(f"✅ Wrote {args.rows} rows ({size_mb:.1f} MB) to {args.output} in {seconds:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
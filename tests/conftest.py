@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# server.py and vector_store.py are run from backend/, not installed
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'backend'))
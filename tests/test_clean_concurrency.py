@@ -0,0 +1,87 @@
+import threading
+import uuid
+
+import psycopg2
+import pytest
+
+import server
+
+ROWS = 60
+DISTINCT_IDS = 50
+
+
+@pytest.fixture
+def database(monkeypatch):
+    try:
+        server.init_db_pool()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"needs a Postgres database at POSTGRES_URL: {e}")
+    server.init_database()
+    # Small pages so the two jobs contend for many of them
+    monkeypatch.setattr(server, 'CLEAN_BATCH_SIZE', 7)
+    server.clean_and_normalize(embed=False)
+    batch_id = str(uuid.uuid4())
+    yield batch_id
+    with server.get_db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("DELETE FROM raw_tenders WHERE batch_id = %s", (batch_id,))
+        cur.execute("DELETE FROM cleaned_tenders WHERE batch_id = %s", (batch_id,))
+        cur.execute("DELETE FROM batch_profiles WHERE batch_id = %s", (batch_id,))
+        server.rebuild_rollups(cur)
+        conn.commit()
+        cur.close()
+    server.close_db_pool()
+
+
+def test_concurrent_jobs_clean_each_page_once(database):
+    batch_id = database
+    category = f"test-{batch_id}"
+    # The last ten rows repeat earlier tender_ids; their copy must win
+    rows = [(f"{batch_id}-{i}", f"{batch_id}-t{i % DISTINCT_IDS}", f"title {i}", f"copy {i}",
+             category, i + 1, batch_id) for i in range(ROWS)]
+    with server.get_db_connection() as conn:
+        cur = conn.cursor()
+        for row in rows:
+            cur.execute("""
+                INSERT INTO raw_tenders (id, tender_id, title, description, category, value, batch_id)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """, row)
+        conn.commit()
+        cur.close()
+
+    errors = []
+
+    def job():
+        try:
+            server.clean_and_normalize(embed=False)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=job) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+
+    # The upsert keeps the first copy's value, so the rollups hold the first fifty
+    expected_total = sum(range(1, DISTINCT_IDS + 1))
+    with server.get_db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT SUM(tender_count), SUM(total_value) FROM spend_rollup
+            WHERE dimension = 'category' AND dim_value = %s
+        """, (category,))
+        assert cur.fetchone() == (DISTINCT_IDS, expected_total)
+        cur.execute("SELECT value_count, value_sum FROM category_value_stats WHERE category = %s", (category,))
+        assert cur.fetchone() == (DISTINCT_IDS, expected_total)
+        cur.execute("SELECT row_count FROM table_counts WHERE table_name = 'cleaned_tenders'")
+        counted = cur.fetchone()[0]
+        cur.execute("SELECT COUNT(*) FROM cleaned_tenders")
+        assert counted == cur.fetchone()[0]
+        cur.execute("SELECT description FROM cleaned_tenders WHERE batch_id = %s AND tender_id = %s",
+                    (batch_id, f"{batch_id}-t0"))
+        assert cur.fetchone() == (f"copy {DISTINCT_IDS}",)
+        cur.execute("SELECT COUNT(*) FROM raw_tenders WHERE batch_id = %s AND processed_at IS NULL", (batch_id,))
+        assert cur.fetchone() == (0,)
+        cur.close()
@@ -0,0 +1,140 @@
+import json
+
+import numpy as np
+import pytest
+
+import server
+from server import BatchProfile, CategoryDriftRule, EmbeddingDriftRule, ValueDriftRule, ValueSketch
+
+
+def sketch_of(values, alpha=0.01):
+    sketch = ValueSketch(alpha)
+    for value in values:
+        sketch.add(float(value))
+    return sketch
+
+
+def profile_of(values, categories, embeddings):
+    profile = BatchProfile()
+    profile.add_rows([{'value': v, 'category': c} for v, c in zip(values, categories)], embeddings)
+    return profile
+
+
+@pytest.fixture
+def values():
+    return np.random.default_rng(1).lognormal(mean=10, sigma=1.5, size=5000)
+
+
+@pytest.mark.parametrize('q', [0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99])
+def test_sketch_quantile_within_relative_error(values, q):
+    sketch = sketch_of(values, alpha=0.01)
+    exact = np.quantile(values, q, method='lower')
+    assert abs(sketch.quantile(q) - exact) <= 0.01 * exact
+
+
+def test_sketch_counts_zero_negative_and_skips_missing():
+    sketch = sketch_of([0, -5, 3])
+    sketch.add(None)
+    sketch.add(float('nan'))
+    assert sketch.count == 3
+    assert sketch.quantile(0) == 0.0
+    assert sketch.quantile(1) == pytest.approx(3, rel=0.01)
+    assert ValueSketch().quantile(0.5) is None
+
+
+def test_sketch_merge_is_associative_and_matches_single_build(values):
+    parts = np.array_split(values, 3)
+    left = sketch_of(parts[0])
+    left.merge(sketch_of(parts[1]))
+    left.merge(sketch_of(parts[2]))
+    right = sketch_of(parts[1])
+    right.merge(sketch_of(parts[2]))
+    grouped = sketch_of(parts[0])
+    grouped.merge(right)
+    whole = sketch_of(values)
+    assert left.to_json() == grouped.to_json() == whole.to_json()
+
+
+def test_sketch_survives_json_round_trip(values):
+    sketch = sketch_of(values)
+    restored = ValueSketch.from_json(json.loads(json.dumps(sketch.to_json())))
+    assert restored.to_json() == sketch.to_json()
+    assert restored.quantile(0.5) == sketch.quantile(0.5)
+
+
+def test_profile_merge_matches_single_build(values):
+    dim = server.model_provider.dim
+    rng = np.random.default_rng(2)
+    embeddings = rng.normal(size=(len(values), dim)).tolist()
+    categories = rng.choice(['works', 'goods', 'services'], size=len(values)).tolist()
+    merged = profile_of(values[:2000], categories[:2000], embeddings[:2000])
+    merged.merge(profile_of(values[2000:], categories[2000:], embeddings[2000:]))
+    whole = profile_of(values, categories, embeddings)
+    assert merged.row_count == whole.row_count
+    assert merged.category_counts == whole.category_counts
+    assert merged.value_sketch.to_json() == whole.value_sketch.to_json()
+    np.testing.assert_allclose(merged.centroid(), whole.centroid())
+    assert merged.mean_variance() == pytest.approx(whole.mean_variance())
+
+
+def test_zero_and_deferred_embeddings_are_not_profiled():
+    dim = server.model_provider.dim
+    profile = BatchProfile()
+    profile.add_embeddings([[0.0] * dim, None, [1.0] * dim])
+    assert profile.embedding_count == 1
+
+
+def test_category_psi_is_zero_for_identical_batches():
+    counts = {'works': 500, 'goods': 300, 'services': 200}
+    rule = CategoryDriftRule(server.DRIFT_CATEGORY_PSI_THRESHOLD)
+    measured = rule.measure(BatchProfile(1000, category_counts=dict(counts)),
+                            BatchProfile(1000, category_counts=dict(counts)))
+    assert measured['psi'] == pytest.approx(0.0, abs=1e-9)
+
+
+def test_category_psi_exceeds_threshold_for_shifted_mix():
+    rule = CategoryDriftRule(server.DRIFT_CATEGORY_PSI_THRESHOLD)
+    baseline = BatchProfile(1000, category_counts={'works': 500, 'goods': 300, 'services': 200})
+    current = BatchProfile(1000, category_counts={'works': 100, 'goods': 200, 'services': 300, 'consulting': 400})
+    measured = rule.measure(current, baseline)
+    assert measured['psi'] > server.DRIFT_CATEGORY_PSI_THRESHOLD
+    assert next(iter(measured['top_categories'])) == 'consulting'
+
+
+def test_value_drift_scores_shifted_distribution(values):
+    rule = ValueDriftRule(server.DRIFT_VALUE_THRESHOLD)
+    same = rule.measure(BatchProfile(value_sketch=sketch_of(values[:2500])),
+                        BatchProfile(value_sketch=sketch_of(values[2500:])))
+    assert same['score'] < server.DRIFT_VALUE_THRESHOLD
+    shifted = rule.measure(BatchProfile(value_sketch=sketch_of(values * 5)),
+                           BatchProfile(value_sketch=sketch_of(values)))
+    assert shifted['score'] > server.DRIFT_VALUE_THRESHOLD
+
+
+def test_embedding_drift_centroid_cosine():
+    dim = server.model_provider.dim
+    rng = np.random.default_rng(3)
+    direction = np.zeros(dim)
+    direction[0] = 1.0
+    other = np.zeros(dim)
+    other[1] = 1.0
+    rule = EmbeddingDriftRule(server.DRIFT_EMBEDDING_THRESHOLD)
+
+    def batch(centre):
+        profile = BatchProfile()
+        profile.add_embeddings((centre + 0.05 * rng.normal(size=(500, dim))).tolist())
+        return profile
+
+    assert rule.measure(batch(direction), batch(direction))['centroid_cosine_distance'] < 0.01
+    assert rule.measure(batch(other), batch(direction))['score'] > server.DRIFT_EMBEDDING_THRESHOLD
+
+
+def test_drift_rule_reports_only_above_threshold():
+    rule = CategoryDriftRule(server.DRIFT_CATEGORY_PSI_THRESHOLD)
+    baseline = BatchProfile(1000, category_counts={'works': 1000})
+    stats = {'batch_id': 'b', '_drift_profiles': (BatchProfile(1000, category_counts={'works': 1000}), baseline, 3)}
+    assert rule.evaluate(None, stats) is None
+    stats['_drift_profiles'] = (BatchProfile(1000, category_counts={'goods': 1000}), baseline, 3)
+    message, details, rows = rule.evaluate(None, stats)
+    assert details['baseline_batches'] == 3
+    assert rows == 1000
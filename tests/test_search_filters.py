@@ -0,0 +1,62 @@
+from datetime import date
+
+import server
+from server import SearchFilters, build_search_filters, plan_vector_source
+
+
+class ProbeCursor:
+    # Answers plan_vector_source's row-count probe without a database
+    def __init__(self, matching_rows):
+        self.matching_rows = matching_rows
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    def fetchone(self):
+        _, params = self.executed[-1]
+        return {'n': min(self.matching_rows, params['f_probe_cap'])}
+
+
+def test_no_filters():
+    assert build_search_filters(None) == ('', {})
+    assert build_search_filters(SearchFilters()) == ('', {})
+
+
+def test_filters_combine_with_and():
+    filter_sql, params = build_search_filters(SearchFilters(
+        category='Energy', status='Open', min_value=10, max_value=20, deadline_to=date(2025, 3, 1)))
+    assert filter_sql == (" AND category = %(f_category)s AND status = %(f_status)s"
+                          " AND value >= %(f_min_value)s AND value <= %(f_max_value)s"
+                          " AND deadline <= %(f_deadline_to)s")
+    assert params == {'f_category': 'Energy', 'f_status': 'Open', 'f_min_value': 10, 'f_max_value': 20,
+                      'f_deadline_to': date(2025, 3, 1)}
+
+
+def test_zero_bounds_are_applied():
+    filter_sql, params = build_search_filters(SearchFilters(min_value=0))
+    assert filter_sql == " AND value >= %(f_min_value)s"
+    assert params == {'f_min_value': 0}
+
+
+def test_unfiltered_search_scans_the_index():
+    cur = ProbeCursor(0)
+    assert plan_vector_source(cur, '', {}) == ([], 'cleaned_tenders', '')
+    assert cur.executed == []
+
+
+def test_selective_filter_uses_exact_candidates():
+    filter_sql, params = build_search_filters(SearchFilters(category='Energy'))
+    cur = ProbeCursor(server.SEARCH_EXACT_FILTER_MAX_ROWS)
+    ctes, source, source_filter = plan_vector_source(cur, filter_sql, params)
+    assert source == 'candidates'
+    assert source_filter == ''
+    assert len(ctes) == 1 and 'MATERIALIZED' in ctes[0] and filter_sql in ctes[0]
+
+
+def test_broad_filter_post_filters_the_index_scan():
+    filter_sql, params = build_search_filters(SearchFilters(status='Open'))
+    cur = ProbeCursor(server.SEARCH_EXACT_FILTER_MAX_ROWS + 1)
+    assert plan_vector_source(cur, filter_sql, params) == ([], 'cleaned_tenders', filter_sql)
+    # The probe stops counting one row past the cap
+    assert cur.executed[0][1]['f_probe_cap'] == server.SEARCH_EXACT_FILTER_MAX_ROWS + 1
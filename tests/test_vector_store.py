@@ -0,0 +1,151 @@
+import numpy as np
+import pytest
+
+from vector_store import NumpyVectorStore
+
+DIM = 8
+
+
+@pytest.fixture
+def vectors():
+    return np.random.default_rng(0).normal(size=(1500, DIM)).astype(np.float32)
+
+
+def keys(n, start=0):
+    return [f"k{i}" for i in range(start, start + n)]
+
+
+def top_key(store, query, allowed=None):
+    return store.search(query, 1, allowed)[0][0]
+
+
+def test_upsert_grows_capacity_and_reupsert_overwrites_in_place(tmp_path, vectors):
+    store = NumpyVectorStore(tmp_path, DIM)
+    store.upsert(keys(1500), vectors)
+    assert store.count == 1500
+    assert store.capacity >= 1500
+    assert top_key(store, vectors[1200]) == 'k1200'
+
+    store.upsert(['k3'], [vectors[7]])
+    assert store.count == 1500
+    assert (tmp_path / 'keys.txt').read_text().splitlines() == keys(1500)
+    hits = store.search(vectors[7], 2)
+    assert sorted(key for key, _ in hits) == ['k3', 'k7']
+    assert [score for _, score in hits] == pytest.approx([1.0, 1.0])
+
+
+def test_search_matches_brute_force(tmp_path, vectors):
+    store = NumpyVectorStore(tmp_path, DIM)
+    store.upsert(keys(1500), vectors)
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    query = vectors[42] + 0.5
+    expected = np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:10]
+    assert [key for key, _ in store.search(query, 10)] == [f"k{i}" for i in expected]
+
+
+def test_allowed_restricts_candidates_and_ignores_unknown_keys(tmp_path, vectors):
+    store = NumpyVectorStore(tmp_path, DIM)
+    store.upsert(keys(100), vectors[:100])
+    hits = store.search(vectors[5], 10, allowed=['k10', 'k20', 'missing'])
+    assert sorted(key for key, _ in hits) == ['k10', 'k20']
+    assert store.search(vectors[5], 10, allowed=[]) == []
+
+
+def test_zero_vector_is_never_returned(tmp_path, vectors):
+    store = NumpyVectorStore(tmp_path, DIM)
+    store.upsert(['zero', 'a'], [np.zeros(DIM), vectors[0]])
+    assert [key for key, _ in store.search(vectors[0], 5)] == ['a']
+    assert [key for key, _ in store.search(vectors[0], 5, allowed=['zero'])] == []
+
+
+def test_delete_then_compact_keeps_live_keys_searchable(tmp_path, vectors):
+    store = NumpyVectorStore(tmp_path, DIM)
+    store.upsert(keys(1500), vectors)
+    store.delete(keys(100))
+    assert store.tombstones() == 100
+    assert 'k0' not in [key for key, _ in store.search(vectors[0], 5)]
+
+    store.compact()
+    assert store.count == 1400
+    assert store.tombstones() == 0
+    assert not list(tmp_path.glob('*.compact'))
+    assert top_key(store, vectors[100]) == 'k100'
+    assert top_key(store, vectors[1499]) == 'k1499'
+    reopened = NumpyVectorStore(tmp_path, DIM)
+    assert reopened.count == 1400
+    assert top_key(reopened, vectors[700]) == 'k700'
+
+
+def test_delete_compacts_once_tombstones_pile_up(tmp_path, vectors):
+    store = NumpyVectorStore(tmp_path, DIM)
+    store.upsert(keys(1500), vectors)
+    store.delete(keys(500))
+    assert store.count == 1000
+    assert store.tombstones() == 0
+
+
+def test_compact_interrupted_before_commit_keeps_old_files(tmp_path, vectors):
+    store = NumpyVectorStore(tmp_path, DIM)
+    store.upsert(keys(100), vectors[:100])
+    (tmp_path / 'vectors.bin.compact').write_bytes(b'partial')
+    (tmp_path / 'keys.txt.compact').write_text('k1\n')
+
+    reopened = NumpyVectorStore(tmp_path, DIM)
+    assert reopened.count == 100
+    assert top_key(reopened, vectors[50]) == 'k50'
+    assert not list(tmp_path.glob('*.compact'))
+
+
+def test_compact_interrupted_after_commit_rolls_forward(tmp_path, vectors, monkeypatch):
+    store = NumpyVectorStore(tmp_path, DIM)
+    store.upsert(keys(1500), vectors)
+    store._alive[:100] = 0
+
+    def crash(self):
+        if (self.path / 'meta.json.compact').exists():
+            raise KeyboardInterrupt
+    with monkeypatch.context() as patch:
+        patch.setattr(NumpyVectorStore, '_finish_compact', crash)
+        with pytest.raises(KeyboardInterrupt):
+            store.compact()
+    assert (tmp_path / 'meta.json.compact').exists()
+
+    reopened = NumpyVectorStore(tmp_path, DIM)
+    assert reopened.count == 1400
+    assert reopened.tombstones() == 0
+    assert top_key(reopened, vectors[1000]) == 'k1000'
+    assert not list(tmp_path.glob('*.compact'))
+
+
+def test_keys_past_count_are_trimmed_on_load(tmp_path, vectors):
+    store = NumpyVectorStore(tmp_path, DIM)
+    store.upsert(keys(10), vectors[:10])
+    # A writer that appended keys but died before committing meta.json
+    with open(tmp_path / 'keys.txt', 'a') as handle:
+        handle.write('orphan1\norphan2\n')
+
+    reopened = NumpyVectorStore(tmp_path, DIM)
+    assert reopened.count == 10
+    assert (tmp_path / 'keys.txt').read_text().splitlines() == keys(10)
+    reopened.upsert(['k10'], [vectors[10]])
+    assert top_key(reopened, vectors[10]) == 'k10'
+
+
+def test_reader_sees_another_instances_writes(tmp_path, vectors):
+    writer = NumpyVectorStore(tmp_path, DIM)
+    reader = NumpyVectorStore(tmp_path, DIM)
+    writer.upsert(keys(10), vectors[:10])
+    assert top_key(reader, vectors[3]) == 'k3'
+    writer.upsert(keys(1500), vectors)
+    writer.delete(keys(500))
+    assert reader.search(vectors[0], 1)[0][0] != 'k0'
+    assert top_key(reader, vectors[1200]) == 'k1200'
+
+
+def test_layout_change_resets_store(tmp_path, vectors):
+    store = NumpyVectorStore(tmp_path, DIM, model_name='a')
+    store.upsert(keys(10), vectors[:10])
+    reopened = NumpyVectorStore(tmp_path, DIM, model_name='b')
+    assert reopened.reset
+    assert reopened.count == 0
+    assert reopened.search(vectors[0], 1) == []